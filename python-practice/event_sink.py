@@ -0,0 +1,196 @@
+# Shared event sink for the mini projects
+# Used by: week11-oop/03_bank_account.py, week12-oop-advanced/03_game_characters.py,
+#          week13-error-handling/03_robust_file_processor.py, week15-libraries/03_weather_analyzer.py,
+#          projects/banking/
+
+"""Pluggable destinations for the messages the mini projects report
+
+Classes call emit() with an event name, a text template and the values
+that fill it, instead of calling print(). The active sink decides what
+happens next:
+
+    PrintSink       prints each message straight away (the default,
+                    so the projects look the same as before)
+    NullSink        drops everything; emit() returns immediately
+    RingBufferSink  keeps the last N events in memory
+    QueueSink       hands events to a background thread that formats
+                    them and writes many lines per write() call
+
+Text is only built by a sink that needs it, so bulk runs with a
+NullSink or RingBufferSink never format or print a message.
+"""
+
+import queue
+import sys
+import threading
+from collections import deque
+from contextlib import contextmanager
+from typing import Any, Dict, Iterator, List, NamedTuple, Optional, TextIO
+
+
+class Event(NamedTuple):
+    """One thing that happened, with the values that describe it"""
+    name: str
+    template: str
+    fields: Dict[str, Any]
+    
+    def render(self) -> str:
+        """The event as the text the projects used to print"""
+        return self.template.format(**self.fields)
+
+
+class NullSink:
+    """Discards every event"""
+    
+    enabled = False
+    
+    def emit(self, event: Event) -> None:
+        pass
+
+
+class PrintSink:
+    """Prints each event as it happens"""
+    
+    enabled = True
+    
+    def emit(self, event: Event) -> None:
+        print(event.render())
+
+
+class RingBufferSink:
+    """Keeps the most recent events, unformatted"""
+    
+    enabled = True
+    
+    def __init__(self, capacity: int = 1000):
+        self.events: deque = deque(maxlen=capacity)
+    
+    def emit(self, event: Event) -> None:
+        self.events.append(event)
+    
+    def lines(self) -> List[str]:
+        """Render the buffered events"""
+        return [event.render() for event in self.events]
+    
+    def clear(self) -> None:
+        self.events.clear()
+
+
+class QueueSink:
+    """Formats and writes events on a background thread, in batches
+    
+    emit() only puts the event on a queue. The writer thread takes up to
+    batch_size events at a time and writes them with a single write()
+    call, so the caller never waits on the terminal or file. An event
+    that fails to render, or a write that fails, is reported on stderr
+    and counted in errors; the writer keeps going.
+    """
+    
+    enabled = True
+    
+    def __init__(self, stream: Optional[TextIO] = None, batch_size: int = 512):
+        self.stream = stream  # None means whatever sys.stdout is at write time
+        self.batch_size = batch_size
+        self._queue: "queue.SimpleQueue[Optional[Event]]" = queue.SimpleQueue()
+        self._idle = threading.Condition()
+        self._pending = 0
+        self._closed = False
+        self.errors = 0
+        self._writer = threading.Thread(target=self._run, name="event-writer", daemon=True)
+        self._writer.start()
+    
+    def emit(self, event: Event) -> None:
+        with self._idle:
+            self._pending += 1
+        self._queue.put(event)
+    
+    def _run(self) -> None:
+        while True:
+            event = self._queue.get()
+            batch = [event]
+            while len(batch) < self.batch_size:
+                try:
+                    batch.append(self._queue.get_nowait())
+                except queue.Empty:
+                    break
+            events = [e for e in batch if e is not None]
+            try:
+                if events:
+                    self._write(events)
+            except Exception as error:
+                self._report(f"could not write {len(events)} events", error)
+            finally:
+                with self._idle:
+                    self._pending -= len(events)
+                    self._idle.notify_all()
+            if len(events) < len(batch):
+                return
+    
+    def _write(self, events: List[Event]) -> None:
+        """Render a batch, skipping events that fail, and write it in one call"""
+        lines = []
+        for event in events:
+            try:
+                lines.append(event.render() + "\n")
+            except Exception as error:
+                self._report(f"could not format event {event.name!r}", error)
+        stream = self.stream or sys.stdout
+        stream.write("".join(lines))
+        stream.flush()
+    
+    def _report(self, problem: str, error: Exception) -> None:
+        self.errors += 1
+        print(f"QueueSink: {problem}: {error!r}", file=sys.stderr)
+    
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """Wait until every event emitted so far has been written
+        
+        Returns False if timeout seconds passed first.
+        """
+        with self._idle:
+            return self._idle.wait_for(lambda: self._pending == 0, timeout)
+    
+    def close(self) -> None:
+        """Write what is queued and stop the writer thread"""
+        if not self._closed:
+            self._closed = True
+            self._queue.put(None)
+            self._writer.join()
+    
+    def __enter__(self) -> "QueueSink":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+
+
+# The sink every emit() goes to
+_sink: Any = PrintSink()
+
+
+def get_sink() -> Any:
+    return _sink
+
+
+def set_sink(sink: Any) -> Any:
+    """Send all events to a new sink; returns the previous one"""
+    global _sink
+    previous, _sink = _sink, sink
+    return previous
+
+
+@contextmanager
+def using_sink(sink: Any) -> Iterator[Any]:
+    """Use a sink for the duration of a with block"""
+    previous = set_sink(sink)
+    try:
+        yield sink
+    finally:
+        set_sink(previous)
+
+
+def emit(name: str, template: str, /, **fields: Any) -> None:
+    """Report an event to the active sink (fields may use any names)"""
+    sink = _sink
+    if sink.enabled:
+        sink.emit(Event(name, template, fields))
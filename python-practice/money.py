@@ -0,0 +1,176 @@
+# Shared money type for the mini projects and lessons
+# Used by: week11-oop/03_bank_account.py, week12-oop-advanced/02_properties_encapsulation.py,
+#          week13-error-handling/02_custom_exceptions.py, projects/banking/
+
+"""Exact money amounts stored as whole cents
+
+Floats can't represent most cents exactly (0.1 + 0.2 != 0.3), so sums
+drift. Money keeps an int number of cents, which is always exact:
+
+    Money(1250)        $12.50
+    Money.of(12.5)     the same, converted from dollars
+
+Adding or subtracting a plain number rounds it to cents first, and
+multiplying by a float rate rounds half-to-even. Comparisons with plain
+numbers are exact, so Money(100) == 1 but Money(100) != 1.004.
+"""
+
+from functools import lru_cache
+from typing import Any, Optional, Tuple, Union
+
+# Rates are applied to cents as fixed-point integers with this scale
+RATE_SCALE = 10 ** 12
+
+# Display strings are cached per amount of cents, not per Money object,
+# so a million accounts don't each carry a string around
+FORMAT_CACHE_SIZE = 4096
+
+
+def round_half_even(numerator: int, denominator: int) -> int:
+    """Integer division rounded to nearest, ties to even (banker's rounding)"""
+    quotient, remainder = divmod(numerator, denominator)
+    twice = 2 * remainder
+    if twice > denominator or (twice == denominator and quotient % 2 == 1):
+        quotient += 1
+    return quotient
+
+
+@lru_cache(maxsize=FORMAT_CACHE_SIZE)
+def format_cents(cents: int) -> str:
+    """Display text like "$12.50" for an amount of cents (recent amounts are cached)"""
+    sign = "-" if cents < 0 else ""
+    dollars, cents = divmod(abs(cents), 100)
+    return f"{sign}${dollars}.{cents:02d}"
+
+
+def to_cents(amount: "Union[Money, float]") -> int:
+    """Convert a dollar amount (or Money) to whole cents"""
+    if isinstance(amount, Money):
+        return amount._cents
+    return int(round(amount * 100))
+
+
+class Money:
+    """Immutable amount of money stored as a whole number of cents"""
+    
+    # __slots__ replaces the per-instance __dict__ with one fixed field
+    __slots__ = ("_cents",)
+    
+    def __init__(self, cents: int = 0):
+        self._cents = cents
+    
+    @classmethod
+    def of(cls, amount: "Union[Money, float]") -> "Money":
+        """Money from a dollar amount; Money values are returned as-is"""
+        if isinstance(amount, Money):
+            return amount
+        return cls(int(round(amount * 100)))
+    
+    # Read-only property: there is no setter, so Money never changes
+    @property
+    def cents(self) -> int:
+        return self._cents
+    
+    # --- Arithmetic (plain numbers are rounded to cents) ---
+    
+    def __add__(self, other: "Union[Money, float]") -> "Money":
+        if isinstance(other, Money):
+            return Money(self._cents + other._cents)
+        if isinstance(other, (int, float)):
+            return Money(self._cents + int(round(other * 100)))
+        return NotImplemented
+    
+    __radd__ = __add__
+    
+    def __sub__(self, other: "Union[Money, float]") -> "Money":
+        if isinstance(other, Money):
+            return Money(self._cents - other._cents)
+        if isinstance(other, (int, float)):
+            return Money(self._cents - int(round(other * 100)))
+        return NotImplemented
+    
+    def __rsub__(self, other: float) -> "Money":
+        if isinstance(other, (int, float)):
+            return Money(int(round(other * 100)) - self._cents)
+        return NotImplemented
+    
+    def __mul__(self, factor: float) -> "Money":
+        if isinstance(factor, int) and not isinstance(factor, bool):
+            return Money(self._cents * factor)
+        if isinstance(factor, float):
+            scaled = int(round(factor * RATE_SCALE))
+            return Money(round_half_even(self._cents * scaled, RATE_SCALE))
+        return NotImplemented
+    
+    __rmul__ = __mul__
+    
+    def __truediv__(self, other: "Union[Money, float]") -> "Union[Money, float]":
+        if isinstance(other, Money):
+            return self._cents / other._cents
+        if isinstance(other, (int, float)):
+            return self * (1 / other)
+        return NotImplemented
+    
+    def __neg__(self) -> "Money":
+        return Money(-self._cents)
+    
+    def __pos__(self) -> "Money":
+        return self
+    
+    def __abs__(self) -> "Money":
+        return self if self._cents >= 0 else Money(-self._cents)
+    
+    # --- Comparisons (exact, so equal values always hash the same) ---
+    
+    def _pair(self, other: Any) -> Optional[Tuple[Any, Any]]:
+        """Both sides in the same unit: cents for Money and ints, dollars for floats"""
+        if isinstance(other, Money):
+            return self._cents, other._cents
+        if isinstance(other, int):
+            return self._cents, other * 100
+        if isinstance(other, float):
+            return self._cents / 100, other
+        return None
+    
+    def __eq__(self, other: Any) -> bool:
+        pair = self._pair(other)
+        return NotImplemented if pair is None else pair[0] == pair[1]
+    
+    def __lt__(self, other: Any) -> bool:
+        pair = self._pair(other)
+        return NotImplemented if pair is None else pair[0] < pair[1]
+    
+    def __le__(self, other: Any) -> bool:
+        pair = self._pair(other)
+        return NotImplemented if pair is None else pair[0] <= pair[1]
+    
+    def __gt__(self, other: Any) -> bool:
+        pair = self._pair(other)
+        return NotImplemented if pair is None else pair[0] > pair[1]
+    
+    def __ge__(self, other: Any) -> bool:
+        pair = self._pair(other)
+        return NotImplemented if pair is None else pair[0] >= pair[1]
+    
+    def __hash__(self) -> int:
+        # Whole dollars hash like the matching int, the rest like the float
+        dollars, cents = divmod(self._cents, 100)
+        return hash(dollars) if cents == 0 else hash(self._cents / 100)
+    
+    # --- Conversion and formatting ---
+    
+    def __bool__(self) -> bool:
+        return self._cents != 0
+    
+    def __float__(self) -> float:
+        return self._cents / 100
+    
+    def __str__(self) -> str:
+        return format_cents(self._cents)
+    
+    def __format__(self, spec: str) -> str:
+        """Plain {} gives "$12.50"; numeric specs like .2f format the dollars"""
+        return str(self) if not spec else format(self._cents / 100, spec)
+    
+    def __repr__(self) -> str:
+        return f"Money({self._cents})"
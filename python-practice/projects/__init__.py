@@ -0,0 +1,76 @@
+# Importable package for the mini projects
+# The lesson files keep their week folders and numbered names (which are
+# not valid module names); this package gives each one an import name.
+
+"""The weekly mini projects as importable modules
+
+    from projects.bank_account import BankAccount
+    from projects.banking.bank import Bank
+    import projects
+    projects.game_characters.Warrior("Conan")
+
+Nothing is loaded when the package itself is imported. A project module
+is only executed the first time it is imported or used as an attribute,
+and each file is compiled once and cached in __pycache__ as usual.
+Project files only run their demos under `if __name__ == "__main__"`,
+so importing them never prints, prompts for input or needs pandas.
+
+The bank account lesson keeps only the account classes; the ledger,
+logging, Bank and benchmarks around them are ordinary modules in the
+projects.banking subpackage.
+"""
+
+import importlib
+import importlib.util
+import os
+import sys
+from typing import Any, Dict, List
+
+# Import name -> lesson file, relative to the python-practice folder
+PROJECTS: Dict[str, str] = {
+    "calculator": "week7-functions/03_calculator.py",
+    "text_analyzer": "week8-functions/03_text_analyzer.py",
+    "note_taking_app": "week9-files/03_note_taking_app.py",
+    "contact_manager": "week10-files/03_contact_manager.py",
+    "bank_account": "week11-oop/03_bank_account.py",
+    "game_characters": "week12-oop-advanced/03_game_characters.py",
+    "robust_file_processor": "week13-error-handling/03_robust_file_processor.py",
+    "tested_calculator": "week14-testing/03_tested_calculator.py",
+    "weather_analyzer": "week15-libraries/03_weather_analyzer.py",
+}
+
+__all__ = sorted(PROJECTS)
+
+_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+class _ProjectFinder:
+    """Finds projects.<name> in its week folder"""
+    
+    @staticmethod
+    def find_spec(fullname: str, path: Any = None, target: Any = None) -> Any:
+        package, _, name = fullname.rpartition(".")
+        if package != __name__ or name not in PROJECTS:
+            return None
+        location = os.path.join(_ROOT, PROJECTS[name])
+        return importlib.util.spec_from_file_location(fullname, location)
+
+
+if not any(isinstance(finder, _ProjectFinder) for finder in sys.meta_path):
+    sys.meta_path.append(_ProjectFinder())
+
+# The projects share event_sink.py, which lives next to this package
+if _ROOT not in sys.path:
+    sys.path.append(_ROOT)
+
+
+def __getattr__(name: str) -> Any:
+    """Load a project the first time it is used as projects.<name>"""
+    if name in PROJECTS:
+        return importlib.import_module(f"{__name__}.{name}")
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def __dir__() -> List[str]:
+    """The project names, so dir(projects) lists what can be imported"""
+    return sorted(PROJECTS)
@@ -0,0 +1,18 @@
+# Banking infrastructure behind the Week 11 bank account lesson
+# The account classes stay in week11-oop/03_bank_account.py (projects.bank_account)
+
+"""Storage, indexing and batch jobs for the bank account classes
+
+    account_numbers  AccountNumberAllocator and account_id()
+    ledger           TransactionLedger and TransactionLimit
+    fraud            FraudDetector
+    storage          AccountRow, WriteAheadLog and AccountSnapshot
+    bank             Bank, which owns and indexes accounts
+    projection       SavingsProjection
+    reconcile        LedgerReconciler
+    sharding         ShardedBank
+    statements       generate_statements()
+    benchmarks       python -m projects.banking.benchmarks [--shards | --statements]
+
+Nothing is imported here, so loading one module never loads the rest.
+"""
@@ -0,0 +1,124 @@
+# Account numbers for the Week 11 bank accounts
+# Used by: week11-oop/03_bank_account.py, projects/banking/storage.py
+
+"""Unique, check-digited account numbers"""
+
+import os
+import threading
+from typing import Optional
+
+try:
+    import fcntl
+except ImportError:  # Windows: the allocator file lock only covers this process
+    fcntl = None
+
+
+def _luhn_digit(digits: str) -> int:
+    """Luhn check digit for a string of digits"""
+    total = 0
+    for position, ch in enumerate(reversed(digits)):
+        value = int(ch)
+        if position % 2 == 0:
+            value *= 2
+            if value > 9:
+                value -= 9
+        total += value
+    return (10 - total % 10) % 10
+
+
+class AccountNumberAllocator:
+    """Hands out unique, fixed-width, check-digited account numbers
+    
+    Numbers look like ACC00000000421 (prefix, 10-digit id, Luhn check
+    digit). Ids are reserved in blocks: each thread takes a whole block
+    at once and then numbers accounts from it without touching any
+    shared state. With a path, the high-water mark is stored in a file
+    that is locked while a block is reserved, so several processes (and
+    restarts) sharing the file never hand out the same id.
+    """
+    
+    PREFIX = "ACC"
+    ID_DIGITS = 10
+    WIDTH = len(PREFIX) + ID_DIGITS + 1
+    
+    def __init__(self, path: Optional[str] = None, block_size: int = 100):
+        if block_size < 1:
+            raise ValueError("Block size must be positive")
+        self.path = path
+        self.block_size = block_size
+        self._high_water = 0   # Highest id reserved by this allocator
+        self._floor = 0        # Ids at or below this must not be issued
+        self._lock = threading.Lock()
+        self._local = threading.local()
+    
+    def next_id(self) -> int:
+        """Next free id from this thread's block"""
+        local = self._local
+        next_id = getattr(local, "next_id", 1)
+        if next_id > getattr(local, "end", 0) or next_id <= self._floor:
+            next_id = self._reserve_block()
+            local.end = next_id + self.block_size - 1
+        local.next_id = next_id + 1
+        return next_id
+    
+    def next_number(self) -> str:
+        """Next free account number"""
+        return self.format(self.next_id())
+    
+    def _reserve_block(self) -> int:
+        """Claim the next block of ids; returns its first id"""
+        with self._lock:
+            start = max(self._high_water, self._floor)
+            if self.path is not None:
+                start = max(start, self._exchange_high_water(start + self.block_size))
+            start += 1
+            self._high_water = start + self.block_size - 1
+            if self._high_water >= 10 ** self.ID_DIGITS:
+                raise OverflowError("Account numbers exhausted")
+            return start
+    
+    def _exchange_high_water(self, proposed: int) -> int:
+        """Read the stored mark and raise it past our block; returns the old mark"""
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            if fcntl is not None:
+                fcntl.flock(fd, fcntl.LOCK_EX)
+            text = os.read(fd, 32).strip()
+            stored = int(text) if text else 0
+            # Another process may have moved the mark since we computed ours
+            new_mark = max(proposed, stored + self.block_size)
+            os.lseek(fd, 0, os.SEEK_SET)
+            os.ftruncate(fd, 0)
+            os.write(fd, str(new_mark).encode("ascii"))
+            os.fsync(fd)
+            return new_mark - self.block_size
+        finally:
+            os.close(fd)  # Also releases the lock
+    
+    def reserve(self, account_id: int) -> None:
+        """Never issue this id or anything below it (used after recovery)"""
+        with self._lock:
+            self._floor = max(self._floor, account_id)
+    
+    @classmethod
+    def format(cls, account_id: int) -> str:
+        """Account number for an id"""
+        digits = f"{account_id:0{cls.ID_DIGITS}d}"
+        return f"{cls.PREFIX}{digits}{_luhn_digit(digits)}"
+    
+    @classmethod
+    def is_valid(cls, account_number: str) -> bool:
+        """True if the number has the right shape and check digit"""
+        digits = account_number[len(cls.PREFIX):]
+        return (len(account_number) == cls.WIDTH
+                and account_number.startswith(cls.PREFIX)
+                and digits.isdigit()
+                and _luhn_digit(digits[:-1]) == int(digits[-1]))
+
+
+def account_id(account_number: str) -> int:
+    """Numeric id embedded in an account number (0 if there is none)"""
+    if AccountNumberAllocator.is_valid(account_number):
+        return int(account_number[len(AccountNumberAllocator.PREFIX):-1])
+    digits = "".join(ch for ch in account_number if ch.isdigit())
+    return int(digits) if digits else 0
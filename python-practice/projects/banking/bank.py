@@ -0,0 +1,660 @@
+# The bank that owns the Week 11 bank accounts
+# Used by: week11-oop/03_bank_account.py (main), projects/banking/sharding.py
+
+"""Bank: a registry of accounts with indexes, logging and batch jobs"""
+
+import os
+import threading
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+from money import RATE_SCALE, Money, round_half_even, to_cents
+from projects.bank_account import (
+    BankAccount, CheckingAccount, CreditCard, SavingsAccount, locked,
+)
+from projects.banking.fraud import FraudDetector
+from projects.banking.ledger import TransactionLedger
+from projects.banking.projection import SavingsProjection
+from projects.banking.reconcile import LedgerReconciler, ReconciliationReport
+from projects.banking.storage import AccountRow, AccountSnapshot, WriteAheadLog
+
+
+# Account classes by the type code stored in logs and snapshots
+ACCOUNT_TYPES = [BankAccount, SavingsAccount, CheckingAccount, CreditCard]
+
+
+def account_row(account: BankAccount) -> AccountRow:
+    """Everything needed to rebuild an account"""
+    account_type = ACCOUNT_TYPES.index(type(account))
+    number, holder = account.account_number, account.account_holder
+    if isinstance(account, SavingsAccount):
+        return AccountRow(number, holder, account_type, account._balance_cents, account.interest_rate)
+    if isinstance(account, CheckingAccount):
+        return AccountRow(number, holder, account_type, account._balance_cents,
+                          float(account.overdraft_limit))
+    if isinstance(account, CreditCard):
+        return AccountRow(number, holder, account_type, account._balance_cents,
+                          float(account.credit_limit), account.apr, account.cycle_start,
+                          account.statement_balance.cents, account.minimum_payment.cents,
+                          account.payment_due or 0.0, account.billing_day)
+    return AccountRow(number, holder, account_type, account._balance_cents, 0.0)
+
+
+def restore_account(row: AccountRow) -> BankAccount:
+    """Rebuild an account from a stored state without printing
+    
+    The stored number is passed to the constructor, so restoring neither
+    allocates a new id nor counts towards BankAccount.total_accounts.
+    """
+    account_class = ACCOUNT_TYPES[row.account_type]
+    balance = Money(row.balance)
+    if account_class is SavingsAccount:
+        account = SavingsAccount(row.holder, balance, interest_rate=row.param,
+                                 account_number=row.number)
+    elif account_class is CheckingAccount:
+        account = CheckingAccount(row.holder, balance, overdraft_limit=row.param,
+                                  account_number=row.number)
+    elif account_class is CreditCard:
+        account = CreditCard(row.holder, balance, credit_limit=row.param, apr=row.apr,
+                             account_number=row.number)
+        account.cycle_start = row.cycle_start
+        account.statement_balance = Money(row.statement_balance)
+        account.minimum_payment = Money(row.minimum_payment)
+        account.payment_due = row.payment_due or None
+        if row.billing_day:
+            account._billing_day = row.billing_day
+    else:
+        account = account_class(row.holder, balance, account_number=row.number)
+    if balance < 0:
+        # The constructor only records positive opening balances
+        account._record(TransactionLedger.INITIAL, balance, log=False)
+    return account
+
+
+class Bank:
+    """Owns many accounts and indexes them for fast lookups
+    
+    - by account number: dict, O(1)
+    - by account holder: dict of dicts, O(1) per holder
+    - credit cards by billing day: dict of dicts, O(1) per day
+    - by balance: sorted list of (balance cents, account_number), rebuilt
+      lazily: a balance change only marks the list stale, and the next
+      balance query re-sorts it (O(log n) to search once sorted)
+    
+    Account balances are guarded by per-account locks; the bank's own lock
+    only protects the index structures when accounts join or leave and
+    when the balance index is re-sorted. Deposits, withdrawals and
+    transfers never take it.
+    
+    A bank restored from a snapshot starts with no account objects: each
+    account is built the first time it is looked up. Iteration and
+    balance ranges load the rest first; len() and total_balance() read
+    the rows not built yet straight from the snapshot.
+    """
+    
+    # Per-row result codes returned by apply_batch()
+    POSTED = 0
+    INVALID_AMOUNT = 1
+    UNKNOWN_ACCOUNT = 2
+    INSUFFICIENT_FUNDS = 3
+    OVERDRAFT_EXCEEDED = 4
+    LIMIT_EXCEEDED = 5
+    
+    def __init__(self, name: str, wal: Optional[WriteAheadLog] = None,
+                 detector: Optional[FraudDetector] = None):
+        self.name = name
+        self.wal = wal
+        self.detector = detector
+        self._accounts: Dict[str, BankAccount] = {}
+        self._by_holder: Dict[str, Dict[str, BankAccount]] = {}
+        self._cards_by_day: Dict[int, Dict[str, CreditCard]] = {}
+        self._by_balance: List[Tuple[int, str]] = []  # Replaced, never edited in place
+        self._new_numbers: List[str] = []   # Added since the last re-sort
+        self._balances_stale = False
+        self._index_lock = threading.Lock()
+        
+        # Lazily loaded snapshot rows and the snapshot accounts closed since
+        self._snapshot: Optional[AccountSnapshot] = None
+        self._snapshot_closed: set = set()
+        self._snapshot_pending = 0  # Snapshot rows not built yet
+        self._snapshot_cards: Optional[Dict[int, List[str]]] = None  # Billing day -> numbers
+        self._load_lock = threading.RLock()
+    
+    def add_account(self, account: BankAccount) -> None:
+        """Take ownership of an account and index it"""
+        if account.account_number in self:
+            raise ValueError(f"Account {account.account_number} already exists")
+        self._index_account(account, log=True)
+    
+    def _index_account(self, account: BankAccount, log: bool = False) -> None:
+        """Insert an account into every index, optionally logging it"""
+        with account._lock, self._index_lock:
+            if account.account_number in self._accounts:
+                raise ValueError(f"Account {account.account_number} already exists")
+            if account._bank is not None:
+                raise ValueError(f"Account {account.account_number} belongs to another bank")
+            
+            self._accounts[account.account_number] = account
+            self._by_holder.setdefault(account.account_holder, {})[account.account_number] = account
+            self._new_numbers.append(account.account_number)
+            self._balances_stale = True
+            if isinstance(account, CreditCard):
+                self._cards_by_day.setdefault(account.billing_day, {})[account.account_number] = account
+            account._bank = self
+            if log and self.wal is not None:
+                self.wal.log_open(account_row(account))
+    
+    def close_account(self, account_number: str) -> BankAccount:
+        """Remove an account from the bank and all indexes"""
+        account = self._lookup(account_number)
+        if account is None:
+            raise KeyError(f"No account {account_number}")
+        if self._snapshot is not None:
+            self._snapshot_closed.add(account_number)
+        
+        with account._lock, self._index_lock:
+            del self._accounts[account_number]
+            holder_accounts = self._by_holder[account.account_holder]
+            del holder_accounts[account_number]
+            if not holder_accounts:
+                del self._by_holder[account.account_holder]
+            if isinstance(account, CreditCard):
+                del self._cards_by_day[account.billing_day][account_number]
+            self._balances_stale = True  # The re-sort drops it
+            account._bank = None
+            if self.wal is not None:
+                self.wal.log_close(account_number)
+        return account
+    
+    def get_account(self, account_number: str) -> Optional[BankAccount]:
+        """Find an account by number"""
+        return self._lookup(account_number)
+    
+    def _lookup(self, account_number: str) -> Optional[BankAccount]:
+        """Find an account, building it from the snapshot if needed"""
+        account = self._accounts.get(account_number)
+        if account is None and self._snapshot is not None:
+            account = self._materialize(account_number)
+        return account
+    
+    def _materialize(self, account_number: str) -> Optional[BankAccount]:
+        """Build one account from its snapshot row"""
+        with self._load_lock:
+            account = self._accounts.get(account_number)
+            if (account is not None or self._snapshot is None
+                    or account_number in self._snapshot_closed):
+                return account
+            slot = self._snapshot.find(account_number)
+            if slot is None:
+                return None
+            account = self._account_from_row(self._snapshot.row(slot))
+            self._index_account(account)
+            self._snapshot_pending -= 1
+            return account
+    
+    def _load_all(self) -> None:
+        """Build every account still only present in the snapshot"""
+        if self._snapshot is None:
+            return
+        with self._load_lock:
+            snapshot = self._snapshot
+            if snapshot is None:
+                return
+            loaded = []
+            for slot in range(len(snapshot)):
+                number = snapshot.number_at(slot)
+                if number in self._accounts or number in self._snapshot_closed:
+                    continue
+                account = self._account_from_row(snapshot.row(slot))
+                account._bank = self
+                loaded.append(account)
+            
+            # Index in bulk; the balance list is sorted on the next query
+            with self._index_lock:
+                for account in loaded:
+                    self._accounts[account.account_number] = account
+                    self._by_holder.setdefault(account.account_holder, {})[account.account_number] = account
+                    self._new_numbers.append(account.account_number)
+                    if isinstance(account, CreditCard):
+                        self._cards_by_day.setdefault(account.billing_day, {})[account.account_number] = account
+                self._balances_stale = True
+            
+            self._snapshot = None
+            self._snapshot_closed.clear()
+            self._snapshot_pending = 0
+            self._snapshot_cards = None
+            snapshot.close()
+    
+    @staticmethod
+    def _account_from_row(row: Sequence[Any]) -> BankAccount:
+        """Build an account from an AccountRow (or a tuple of its leading fields)"""
+        return restore_account(AccountRow(*row))
+    
+    def _cards_billed_on(self, day: int) -> List[CreditCard]:
+        """Credit cards whose cycle closes on a day of the month
+        
+        Snapshot cards are found by a one-time scan of the row type codes
+        and stored billing days, and only the cards billed on this day are
+        built.
+        """
+        if self._snapshot is not None:
+            with self._load_lock:
+                snapshot = self._snapshot
+                if snapshot is not None and self._snapshot_cards is None:
+                    card_type = ACCOUNT_TYPES.index(CreditCard)
+                    self._snapshot_cards = {}
+                    for slot in range(len(snapshot)):
+                        if snapshot.type_at(slot) == card_type:
+                            card_day = snapshot.billing_day_at(slot)
+                            self._snapshot_cards.setdefault(card_day, []).append(
+                                snapshot.number_at(slot)
+                            )
+                if snapshot is not None:
+                    for number in self._snapshot_cards.get(day, []):
+                        self._lookup(number)
+        with self._index_lock:
+            return list(self._cards_by_day.get(day, {}).values())
+    
+    def _billing_day_changed(self, card: CreditCard, old_day: int) -> None:
+        """Move a card to its new billing day in the index and log the move"""
+        with self._index_lock:
+            del self._cards_by_day[old_day][card.account_number]
+            self._cards_by_day.setdefault(card.billing_day, {})[card.account_number] = card
+            if self.wal is not None:
+                self.wal.log_billing_day(card.account_number, card.billing_day)
+    
+    def accounts_for(self, account_holder: str) -> List[BankAccount]:
+        """All accounts owned by one holder"""
+        self._load_all()
+        return list(self._by_holder.get(account_holder, {}).values())
+    
+    def accounts_by_balance(self, min_balance: "Union[Money, float, None]" = None,
+                            max_balance: "Union[Money, float, None]" = None) -> List[BankAccount]:
+        """Accounts with a balance in [min_balance, max_balance], lowest first"""
+        by_balance = self._sorted_balances()
+        if min_balance is None:
+            lo = 0
+        else:
+            lo = bisect_left(by_balance, (to_cents(min_balance), ""))
+        if max_balance is None:
+            hi = len(by_balance)
+        else:
+            # The largest code point sorts after any account number
+            hi = bisect_right(by_balance, (to_cents(max_balance), chr(0x10FFFF)))
+        return [self._accounts[number] for _, number in by_balance[lo:hi]]
+    
+    def top_balances(self, n: int) -> List[BankAccount]:
+        """The n accounts with the highest balance, highest first"""
+        by_balance = self._sorted_balances()
+        keys = by_balance[-n:] if n > 0 else []
+        return [self._accounts[number] for _, number in reversed(keys)]
+    
+    def total_balance(self) -> Money:
+        """Sum of all balances held by the bank
+        
+        Rows still only in the snapshot are summed straight from the file,
+        so this does not build their accounts.
+        """
+        with self._load_lock:
+            total = sum(account._balance_cents for account in list(self._accounts.values()))
+            snapshot = self._snapshot
+            if snapshot is not None:
+                for slot in range(len(snapshot)):
+                    row = snapshot.row(slot)
+                    if row.number not in self._accounts and row.number not in self._snapshot_closed:
+                        total += row.balance
+        return Money(total)
+    
+    def _sorted_balances(self) -> List[Tuple[int, str]]:
+        """The balance index, re-sorted first if any balance changed
+        
+        Balances are re-read in the previous sorted order, so the list is
+        nearly sorted already and Timsort fixes it in close to linear time.
+        The returned list is never modified afterwards, so callers can
+        search it without holding the lock.
+        """
+        self._load_all()
+        with self._index_lock:
+            if self._balances_stale:
+                self._balances_stale = False  # Changes from now on mark it again
+                accounts = self._accounts
+                numbers = [number for _, number in self._by_balance] + self._new_numbers
+                self._new_numbers = []
+                keys = [(accounts[number]._balance_cents, number)
+                        for number in dict.fromkeys(numbers) if number in accounts]
+                keys.sort()
+                self._by_balance = keys
+            return self._by_balance
+    
+    def activity_totals(self) -> Dict[str, Any]:
+        """Bank-wide roll-up of every account's running totals
+        
+        Only the per-account aggregates are read; no ledger is scanned.
+        """
+        self._load_all()
+        kind_sums = [0] * len(TransactionLedger.LABELS)
+        lowest_balance = 0
+        transactions = 0
+        for account in list(self._accounts.values()):
+            ledger = account.transaction_history
+            kind_sums = list(map(int.__add__, kind_sums, ledger.kind_totals))
+            lowest_balance = min(lowest_balance, ledger.lowest_balance)
+            transactions += len(ledger)
+        
+        return {
+            "deposits": Money(kind_sums[TransactionLedger.INITIAL]
+                              + kind_sums[TransactionLedger.DEPOSIT]),
+            "withdrawals": Money(-kind_sums[TransactionLedger.WITHDRAWAL]),
+            "interest": Money(kind_sums[TransactionLedger.INTEREST]),
+            "overdraft_peak": Money(-lowest_balance),
+            "transactions": transactions,
+        }
+    
+    def apply_batch(self, account_numbers: Sequence[str], amounts: Sequence[float]) -> array:
+        """Post many deposits (positive) and withdrawals (negative) at once
+        
+        Rows are checked in order against a running balance per account, so
+        overdraft and insufficient-funds rules behave exactly as if each row
+        were posted alone. Nothing is printed; the result is one status code
+        per row (see POSTED and friends). Each touched account's balance is
+        written once at the end, so the balance index moves once per account
+        instead of once per row.
+        
+        Every amount is converted to cents before anything is locked or
+        recorded, so an amount that is not a number (NaN, infinity, text)
+        raises without posting any row. The final balances are written in a
+        finally block, so if something fails mid-batch, every row already in
+        the ledger and the log also reaches its balance.
+        """
+        if len(account_numbers) != len(amounts):
+            raise ValueError("account_numbers and amounts must have the same length")
+        cents = [to_cents(amount) for amount in amounts]
+        
+        results = array("b", bytes(len(amounts)))
+        pending: Dict[str, int] = {}
+        accounts = self._accounts
+        timestamp = time.time()
+        touched = [a for a in map(self._lookup, set(account_numbers)) if a is not None]
+        
+        with locked(*touched):
+            try:
+                self._post_rows(account_numbers, cents, results, pending, timestamp)
+            finally:
+                # Write each final balance once
+                for number, balance in pending.items():
+                    accounts[number].balance = Money(balance)
+        
+        return results
+    
+    def _post_rows(self, account_numbers: Sequence[str], amounts: Sequence[int],
+                   results: array, pending: Dict[str, int], timestamp: float) -> None:
+        """Validate rows (amounts in cents) in order, tracking running balances in pending"""
+        accounts = self._accounts
+        detector = self.detector
+        for row, (number, amount) in enumerate(zip(account_numbers, amounts)):
+            account = accounts.get(number)
+            if account is None:
+                results[row] = self.UNKNOWN_ACCOUNT
+                continue
+            if amount == 0:
+                results[row] = self.INVALID_AMOUNT
+                continue
+            
+            balance = pending.get(number, account._balance_cents)
+            status = self._row_status(account, balance, amount)
+            if status != self.POSTED:
+                results[row] = status
+                continue
+            
+            new_balance = balance + amount
+            pending[number] = new_balance
+            kind = TransactionLedger.DEPOSIT if amount > 0 else TransactionLedger.WITHDRAWAL
+            account.transaction_history.record(kind, amount, new_balance, timestamp)
+            if self.wal is not None:
+                self.wal.log_entry(kind, number, amount)
+            if detector is not None and amount < 0:
+                detector.observe(number, -amount, new_balance, timestamp,
+                                 account.OVERDRAFT_ALERTS)
+    
+    def _row_status(self, account: BankAccount, balance_cents: int, amount_cents: int) -> int:
+        """Status code for moving amount_cents on an account at this balance
+        
+        A POSTED result has already been counted against the daily limit.
+        """
+        if amount_cents < 0 and balance_cents + amount_cents < account._min_balance()._cents:
+            if isinstance(account, (CheckingAccount, CreditCard)):
+                return self.OVERDRAFT_EXCEEDED
+            return self.INSUFFICIENT_FUNDS
+        limit = account.transaction_limit
+        if limit is not None and not limit.try_use(abs(amount_cents), amount_cents < 0):
+            return self.LIMIT_EXCEEDED
+        return self.POSTED
+    
+    def transfer(self, source_number: str, target_number: str,
+                 amount: "Union[Money, float]") -> bool:
+        """Transfer between two accounts of this bank by account number"""
+        source = self._lookup(source_number)
+        target = self._lookup(target_number)
+        if source is None or target is None:
+            raise KeyError(f"Unknown account in transfer {source_number} -> {target_number}")
+        return source.transfer(target, amount)
+    
+    def accrue_interest(self, periods_per_year: int = 12, periods: int = 1) -> int:
+        """Compound interest into every savings account in one pass
+        
+        Each account earns interest_rate / periods_per_year per period,
+        compounded over the given number of periods (e.g. 12 and 1 for a
+        month, or 365 and 30 for 30 days of daily compounding). Interest
+        is computed in integer cents against a fixed-point growth factor
+        and rounded half-to-even. Each account gets one ledger entry, and
+        the balance index is marked stale once at the end. Returns the total
+        interest credited in cents.
+        """
+        self._load_all()
+        savings = [a for a in self._accounts.values() if isinstance(a, SavingsAccount)]
+        
+        # One growth factor per distinct rate, shared by all its accounts
+        factors: Dict[float, int] = {}
+        for account in savings:
+            rate = account.interest_rate
+            if rate not in factors:
+                growth = (1 + rate / periods_per_year) ** periods - 1
+                factors[rate] = int(round(growth * RATE_SCALE))
+        
+        total = 0
+        timestamp = time.time()
+        with locked(*savings):
+            balances = array("q", (a._balance_cents for a in savings))
+            interest = array("q", (
+                round_half_even(cents * factors[a.interest_rate], RATE_SCALE)
+                if cents > 0 else 0
+                for a, cents in zip(savings, balances)
+            ))
+            
+            for account, cents, earned in zip(savings, balances, interest):
+                if earned == 0:
+                    continue
+                # Bypass the balance setter; the index is marked stale below
+                account._balance_cents = cents + earned
+                account.transaction_history.record(
+                    TransactionLedger.INTEREST, earned, cents + earned, timestamp
+                )
+                if self.wal is not None:
+                    self.wal.log_entry(TransactionLedger.INTEREST, account.account_number, earned)
+                total += earned
+            
+            self._balances_stale = True
+        return total
+    
+    def close_billing_cycles(self, now: Optional[float] = None) -> int:
+        """Close the statement cycle of every credit card billed today
+        
+        Each card's average daily balance comes from two lookups in its
+        ledger's running balance integral, and the cards come from the
+        billing-day index, so the cost grows with the number of cards
+        billed today, not with accounts or transactions. Interest is posted
+        as one ledger entry per card, the new statement is logged, and the
+        balance index is marked stale once. Cards already closed today are
+        skipped. Returns the total interest charged in cents.
+        """
+        now = time.time() if now is None else now
+        today = datetime.fromtimestamp(now).date()
+        due = [card for card in self._cards_billed_on(today.day)
+               if datetime.fromtimestamp(card.cycle_start).date() < today]
+        
+        total = 0
+        with locked(*due):
+            for card in due:
+                interest = card._cycle_interest(now)
+                if interest:
+                    # Bypass the balance setter; the index is marked stale below
+                    card._balance_cents -= interest
+                    card.transaction_history.record(
+                        TransactionLedger.FINANCE_CHARGE, -interest, card._balance_cents, now
+                    )
+                    if self.wal is not None:
+                        self.wal.log_entry(TransactionLedger.FINANCE_CHARGE,
+                                           card.account_number, -interest)
+                    total += interest
+                card._close_statement(now, interest)
+                if self.wal is not None:
+                    self.wal.log_cycle(account_row(card))
+            
+            if total:
+                self._balances_stale = True
+        return total
+    
+    def project_savings(self, rate_shifts: Sequence[Sequence[float]],
+                        contributions: Optional[Sequence[Sequence[float]]] = None,
+                        periods_per_year: int = 12) -> "SavingsProjection":
+        """Project every savings account forward under N scenarios (see SavingsProjection)"""
+        self._load_all()
+        savings = [a for a in self._accounts.values() if isinstance(a, SavingsAccount)]
+        return SavingsProjection(savings, rate_shifts, contributions, periods_per_year)
+    
+    def reconcile(self, reconciler: Optional["LedgerReconciler"] = None) -> "ReconciliationReport":
+        """Check every balance against its ledger (see LedgerReconciler)"""
+        return (reconciler or LedgerReconciler()).run(self)
+    
+    @classmethod
+    def recover(cls, name: str, wal_path: str, **wal_options: Any) -> "Bank":
+        """Rebuild a bank by replaying its write-ahead log
+        
+        A torn record at the end of the log is cut off, then the log is
+        reopened for appending so the recovered bank keeps logging.
+        """
+        bank = cls(name)
+        bank._replay_log(wal_path, 0, wal_options)
+        return bank
+    
+    @classmethod
+    def restore(cls, name: str, snapshot_path: str, wal_path: str,
+                **wal_options: Any) -> "Bank":
+        """Reopen a bank from a snapshot plus the log written after it
+        
+        No account objects are built up front; only accounts touched by
+        the log tail (and later lookups) are materialised.
+        """
+        bank = cls(name)
+        bank._snapshot = AccountSnapshot(snapshot_path)
+        bank._snapshot_pending = len(bank._snapshot)
+        BankAccount._reserve_account_id(bank._snapshot.max_account_id)
+        try:
+            bank._replay_log(wal_path, bank._snapshot.wal_offset, wal_options)
+        except ValueError:
+            bank._snapshot.close()
+            raise
+        return bank
+    
+    def checkpoint(self, snapshot_path: str) -> int:
+        """Write every account to a snapshot; returns the number written
+        
+        All account locks are held while the rows and log offset are
+        captured, so the snapshot is a consistent cut of the log.
+        """
+        self._load_all()
+        accounts = list(self._accounts.values())
+        with locked(*accounts), self._index_lock:
+            wal_offset = self.wal.position() if self.wal is not None else 0
+            rows = [account_row(account) for account in accounts]
+        AccountSnapshot.write(snapshot_path, rows, wal_offset)
+        return len(rows)
+    
+    def _replay_log(self, wal_path: str, start: int, wal_options: Dict[str, Any]) -> None:
+        """Replay log records after start, cut a torn tail, reopen the log
+        
+        A log shorter than start (rotated or deleted after the snapshot was
+        taken) raises ValueError, as the records after start are missing.
+        """
+        size = os.path.getsize(wal_path) if os.path.exists(wal_path) else 0
+        if size < start:
+            raise ValueError(f"{wal_path} has {size} bytes but the snapshot covers "
+                             f"the first {start}; the log was replaced or cut short")
+        valid_end = start
+        if size:
+            for valid_end, record in WriteAheadLog.read_records(wal_path, start):
+                self._replay(record)
+            with open(wal_path, "r+b") as f:
+                f.truncate(valid_end)
+        self.wal = WriteAheadLog(wal_path, **wal_options)
+    
+    def _replay(self, record: Tuple[Any, ...]) -> None:
+        """Apply one log record without printing or re-logging"""
+        record_type, timestamp = record[0], record[1]
+        
+        if record_type == WriteAheadLog.OPEN:
+            self.add_account(self._account_from_row(record[2:]))
+        elif record_type == WriteAheadLog.CLOSE:
+            self.close_account(record[2])
+        elif record_type == WriteAheadLog.TRANSFER:
+            source_number, target_number, amount = record[2:]
+            self._replay_entry(TransactionLedger.TRANSFER_OUT, source_number, -amount, timestamp)
+            self._replay_entry(TransactionLedger.TRANSFER_IN, target_number, amount, timestamp)
+        elif record_type == WriteAheadLog.CYCLE:
+            card = self._lookup(record[2])
+            card.cycle_start, statement, minimum, due = record[3:]
+            card.statement_balance = Money(statement)
+            card.minimum_payment = Money(minimum)
+            card.payment_due = due or None
+        elif record_type == WriteAheadLog.BILLING_DAY:
+            self._lookup(record[2]).billing_day = record[3]
+        else:
+            number, amount = record[2:]
+            self._replay_entry(record_type, number, amount, timestamp)
+    
+    def _replay_entry(self, kind: int, account_number: str, amount_cents: int,
+                      timestamp: float) -> None:
+        account = self._lookup(account_number)
+        account.balance = Money(account._balance_cents + amount_cents)
+        account.transaction_history.record(
+            kind, amount_cents, account._balance_cents, timestamp
+        )
+    
+    def _balance_changed(self, account: BankAccount, old_cents: int) -> None:
+        """Mark the balance index stale; it is re-sorted on the next query
+        
+        Called on every balance change, so it takes no lock: the flag only
+        ever goes from False to True here, and _sorted_balances() clears it
+        before it re-reads the balances, so a change racing with a re-sort
+        just marks the index stale again.
+        """
+        if not self._balances_stale:
+            self._balances_stale = True
+    
+    def __len__(self) -> int:
+        """Accounts built so far plus snapshot rows not built yet"""
+        with self._load_lock:
+            return len(self._accounts) + self._snapshot_pending
+    
+    def __contains__(self, account_number: str) -> bool:
+        return self._lookup(account_number) is not None
+    
+    def __iter__(self) -> Iterator[BankAccount]:
+        self._load_all()
+        return iter(list(self._accounts.values()))
+    
+    def __str__(self) -> str:
+        return f"Bank {self.name}: {len(self)} accounts - {self.total_balance()}"
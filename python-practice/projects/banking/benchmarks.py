@@ -0,0 +1,142 @@
+# Benchmarks for the Week 11 bank accounts
+# Run from python-practice/:
+#   python3 -m projects.banking.benchmarks               transfers across threads
+#   python3 -m projects.banking.benchmarks --shards      sharded bank
+#   python3 -m projects.banking.benchmarks --statements  statement files
+
+"""Throughput measurements for transfers, shards and statements"""
+
+import random
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Sequence
+
+from event_sink import NullSink, using_sink
+from projects.bank_account import BankAccount, CheckingAccount
+from projects.banking.bank import Bank
+from projects.banking.sharding import ShardedBank
+from projects.banking.statements import generate_statements
+
+
+def benchmark_transfers(thread_counts: Sequence[int] = (1, 2, 4, 8),
+                        num_accounts: int = 1000,
+                        transfers_per_run: int = 40000) -> Dict[int, float]:
+    """Measure transfer throughput as more threads share one bank
+    
+    Each run uses a fresh bank and random account pairs, so most transfers
+    touch different locks. Returns transfers per second for each thread
+    count. On a GIL build the numbers stay roughly flat (no lock convoy);
+    on a free-threaded build they grow with the thread count.
+    """
+    results: Dict[int, float] = {}
+    
+    for threads in thread_counts:
+        bank = Bank("Benchmark Bank")
+        numbers = []
+        for i in range(num_accounts):
+            account = CheckingAccount(f"Holder {i}", 1000, 500)
+            bank.add_account(account)
+            numbers.append(account.account_number)
+        
+        per_thread = transfers_per_run // threads
+        
+        def worker(seed: int) -> None:
+            rng = random.Random(seed)
+            for _ in range(per_thread):
+                source, target = rng.sample(numbers, 2)
+                bank.transfer(source, target, rng.randint(1, 50))
+        
+        with using_sink(NullSink()):
+            start = time.perf_counter()
+            with ThreadPoolExecutor(max_workers=threads) as pool:
+                list(pool.map(worker, range(threads)))
+            elapsed = time.perf_counter() - start
+        
+        # Money only moves between accounts, so the total never changes
+        assert bank.total_balance() == num_accounts * 1000
+        results[threads] = per_thread * threads / elapsed
+    
+    print(f"{'Threads':>8} {'Transfers/sec':>15}")
+    for threads, rate in results.items():
+        print(f"{threads:>8} {rate:>15,.0f}")
+    return results
+
+
+def benchmark_sharded(shard_counts: Sequence[int] = (1, 2, 4),
+                      num_accounts: int = 10000,
+                      rows_per_run: int = 200000,
+                      batch_size: int = 5000) -> Dict[str, float]:
+    """Compare batched posting on one Bank against ShardedBank
+    
+    The same random deposits and withdrawals are posted to a single
+    in-process Bank and then to sharded banks of each size. Returns rows
+    per second keyed by mode. Shards only help when there are free cores
+    to run them on.
+    """
+    rng = random.Random(42)
+    accounts = [CheckingAccount(f"Holder {i}", 1000, 500) for i in range(num_accounts)]
+    numbers = [account.account_number for account in accounts]
+    batches = []
+    for _ in range(rows_per_run // batch_size):
+        batch_numbers = [rng.choice(numbers) for _ in range(batch_size)]
+        batch_amounts = [rng.randint(-80, 100) or 1 for _ in range(batch_size)]
+        batches.append((batch_numbers, batch_amounts))
+    rows = len(batches) * batch_size
+    
+    results: Dict[str, float] = {}
+    bank = Bank("Benchmark Bank")
+    for account in accounts:
+        bank.add_account(account)
+    start = time.perf_counter()
+    for batch_numbers, batch_amounts in batches:
+        bank.apply_batch(batch_numbers, batch_amounts)
+    results["single"] = rows / (time.perf_counter() - start)
+    
+    for shards in shard_counts:
+        with ShardedBank("Benchmark Bank", shards) as sharded:
+            sharded.add_accounts(accounts)
+            start = time.perf_counter()
+            for batch_numbers, batch_amounts in batches:
+                sharded.apply_batch(batch_numbers, batch_amounts)
+            results[f"{shards} shards"] = rows / (time.perf_counter() - start)
+    
+    print(f"{'Mode':>10} {'Rows/sec':>12} {'Speedup':>8}")
+    for mode, rate in results.items():
+        print(f"{mode:>10} {rate:>12,.0f} {rate / results['single']:>7.2f}x")
+    return results
+
+
+def benchmark_statements(num_accounts: int = 2000, entries_per_account: int = 50,
+                         compression: str = "gzip") -> Dict[str, float]:
+    """Time generate_statements on a bank of busy accounts
+    
+    Statements are written to a temporary directory that is removed
+    afterwards. Returns the summary from generate_statements.
+    """
+    bank = Bank("Benchmark Bank")
+    with using_sink(NullSink()):
+        for i in range(num_accounts):
+            account = BankAccount(f"Holder {i}", 1000)
+            bank.add_account(account)
+            for j in range(entries_per_account - 1):
+                account.deposit(j % 50 + 1)
+    
+    with tempfile.TemporaryDirectory() as directory:
+        summary = generate_statements(bank, directory, compression=compression)
+    print(f"Wrote {summary['accounts']:,} statements ({summary['rows']:,} rows) "
+          f"to {summary['files']:,} files in {summary['seconds']:.2f}s: "
+          f"{summary['accounts_per_sec']:,.0f} accounts/sec, "
+          f"{summary['rows_per_sec']:,.0f} rows/sec, {summary['bytes']:,} bytes")
+    return summary
+
+
+
+if __name__ == "__main__":
+    if "--shards" in sys.argv:
+        benchmark_sharded()
+    elif "--statements" in sys.argv:
+        benchmark_statements()
+    else:
+        benchmark_transfers()
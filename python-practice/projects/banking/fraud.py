@@ -0,0 +1,150 @@
+# Fraud scoring for the Week 11 bank accounts
+# Used by: projects/banking/bank.py (Bank(detector=...))
+
+"""Streaming anomaly scores for debits"""
+
+import threading
+import time
+from array import array
+from collections import deque
+from typing import Callable, Dict, NamedTuple, Optional
+
+from money import Money
+
+
+class FraudAlert(NamedTuple):
+    """One suspicious debit flagged by a FraudDetector"""
+    account_number: str
+    timestamp: float
+    amount: Money
+    reason: str
+    score: float
+
+
+class FraudDetector:
+    """Streaming anomaly scoring for withdrawals and outgoing transfers
+    
+    Each account gets one slot in a set of flat arrays holding its online
+    statistics: a Welford running mean and variance of debit amounts, an
+    exponentially weighted moving average (EWMA), and a ring of the last
+    velocity_count debit times. Scoring a debit reads and updates only
+    that slot, so it is O(1) and never looks at the ledger.
+    
+    A debit is flagged when it is an outlier (z-score against the
+    account's history), when it is one of velocity_count debits inside
+    velocity_window seconds, or when it takes the balance into overdraft.
+    The overdraft rule is skipped for credit cards, whose balance is
+    normally below zero.
+    
+    The deviation used for the z-score is at least min_std_ratio of the
+    mean (and at least one cent), so an account that always debits the
+    same amount is not flagged for a debit one cent higher.
+    """
+    
+    def __init__(self, z_threshold: float = 4.0, min_samples: int = 10,
+                 min_std_ratio: float = 0.05,
+                 ewma_alpha: float = 0.1, velocity_count: int = 5,
+                 velocity_window: float = 60.0,
+                 on_alert: Optional[Callable[[FraudAlert], None]] = None,
+                 max_alerts: int = 1000):
+        self.z_threshold = z_threshold
+        self.min_samples = min_samples
+        self.min_std_ratio = min_std_ratio
+        self.ewma_alpha = ewma_alpha
+        self.velocity_count = velocity_count
+        self.velocity_window = velocity_window
+        self.on_alert = on_alert
+        self.alerts: deque = deque(maxlen=max_alerts)  # Most recent alerts
+        
+        self._slots: Dict[str, int] = {}
+        self._slot_lock = threading.Lock()
+        # One entry per account slot
+        self._count = array("q")
+        self._mean = array("d")
+        self._m2 = array("d")
+        self._ewma = array("d")
+        self._ring_next = array("l")
+        # velocity_count entries per slot
+        self._ring = array("d")
+    
+    def _slot(self, account_number: str) -> int:
+        """Array position for an account, allocated on first use"""
+        slot = self._slots.get(account_number)
+        if slot is None:
+            with self._slot_lock:
+                slot = self._slots.get(account_number)
+                if slot is None:
+                    slot = len(self._count)
+                    self._count.append(0)
+                    self._mean.append(0.0)
+                    self._m2.append(0.0)
+                    self._ewma.append(0.0)
+                    self._ring_next.append(0)
+                    self._ring.extend([float("-inf")] * self.velocity_count)
+                    self._slots[account_number] = slot
+        return slot
+    
+    def observe(self, account_number: str, amount_cents: int, balance_cents: int,
+                timestamp: Optional[float] = None, check_overdraft: bool = True) -> float:
+        """Score one debit of amount_cents that left balance_cents; returns the z-score
+        
+        The caller must hold the account's lock, as the ledger paths do.
+        Pass check_overdraft=False for accounts that normally run below zero.
+        """
+        if timestamp is None:
+            timestamp = time.time()
+        slot = self._slot(account_number)
+        amount = float(amount_cents)
+        
+        # Score against the statistics from before this debit
+        count = self._count[slot]
+        mean = self._mean[slot]
+        score = 0.0
+        if count >= 2:
+            std = (self._m2[slot] / (count - 1)) ** 0.5
+            std = max(std, self.min_std_ratio * abs(mean), 1.0)
+            score = (amount - mean) / std
+        reasons = []
+        if count >= self.min_samples and score >= self.z_threshold:
+            reasons.append("unusual amount")
+        
+        ring_start = slot * self.velocity_count
+        position = ring_start + self._ring_next[slot]
+        if self.velocity_count and timestamp - self._ring[position] <= self.velocity_window:
+            reasons.append("velocity")
+        if check_overdraft and balance_cents < 0 <= balance_cents + amount_cents:
+            reasons.append("overdraft")
+        
+        # Welford and EWMA updates
+        count += 1
+        delta = amount - mean
+        mean += delta / count
+        self._count[slot] = count
+        self._mean[slot] = mean
+        self._m2[slot] += delta * (amount - mean)
+        self._ewma[slot] = amount if count == 1 else (
+            self.ewma_alpha * amount + (1 - self.ewma_alpha) * self._ewma[slot])
+        if self.velocity_count:
+            self._ring[position] = timestamp
+            self._ring_next[slot] = (self._ring_next[slot] + 1) % self.velocity_count
+        
+        for reason in reasons:
+            alert = FraudAlert(account_number, timestamp, Money(amount_cents), reason, score)
+            self.alerts.append(alert)
+            if self.on_alert is not None:
+                self.on_alert(alert)
+        return score
+    
+    def stats(self, account_number: str) -> Dict[str, float]:
+        """Current statistics for one account (debit amounts in dollars)"""
+        slot = self._slots.get(account_number)
+        if slot is None:
+            return {"count": 0, "mean": 0.0, "std": 0.0, "ewma": 0.0}
+        count = self._count[slot]
+        variance = self._m2[slot] / (count - 1) if count > 1 else 0.0
+        return {
+            "count": count,
+            "mean": self._mean[slot] / 100,
+            "std": variance ** 0.5 / 100,
+            "ewma": self._ewma[slot] / 100,
+        }
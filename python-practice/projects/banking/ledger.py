@@ -0,0 +1,253 @@
+# Transaction ledger and daily limits for the Week 11 bank accounts
+# Used by: week11-oop/03_bank_account.py
+
+"""Per-account transaction records
+
+    TransactionLedger   every balance change, stored in compact columns
+    TransactionLimit    rolling 24-hour limits on count and amount
+"""
+
+import time
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Callable, Iterator, List, NamedTuple, Optional, Tuple, Union
+
+from money import Money
+
+
+class LedgerEntry(NamedTuple):
+    """One decoded ledger row"""
+    index: int
+    timestamp: float
+    kind: int
+    amount: "Money"
+    balance: "Money"
+
+
+class TransactionLedger:
+    """Column-oriented transaction record for one account
+    
+    Each transaction is stored as one slot in four compact arrays
+    (amount in cents, kind code, timestamp, running balance in cents)
+    instead of a formatted string. Text is only built when the ledger
+    is rendered, so totals and filters work directly on the numbers.
+    
+    Timestamps are kept in non-decreasing order, which makes the
+    timestamp column a sorted index: time-range lookups and
+    balance-as-of queries are binary searches.
+    """
+    
+    # Kind codes stored in the kinds column
+    INITIAL = 0
+    DEPOSIT = 1
+    WITHDRAWAL = 2
+    INTEREST = 3
+    TRANSFER_OUT = 4
+    TRANSFER_IN = 5
+    FINANCE_CHARGE = 6
+    
+    LABELS = {
+        INITIAL: "Initial deposit",
+        DEPOSIT: "Deposit",
+        WITHDRAWAL: "Withdrawal",
+        INTEREST: "Interest",
+        TRANSFER_OUT: "Transfer out",
+        TRANSFER_IN: "Transfer in",
+        FINANCE_CHARGE: "Interest charge",
+    }
+    
+    def __init__(self, track_average: bool = False):
+        self.amounts = array("q")      # Signed amount in cents
+        self.kinds = array("b")        # One of the kind codes above
+        self.timestamps = array("d")   # Seconds since the epoch
+        self.balances = array("q")     # Balance in cents after the entry
+        # Integral of balance over time up to the entry; 8 more bytes a row,
+        # so only ledgers that need average balances (credit cards) keep it
+        self.balance_seconds: Optional[array] = array("d") if track_average else None
+        
+        # Running aggregates, updated as entries are recorded
+        self.kind_totals = array("q", [0] * len(self.LABELS))
+        self.lowest_balance = 0
+    
+    def record(self, kind: int, amount_cents: int, balance_cents: int,
+               timestamp: Optional[float] = None) -> None:
+        """Append one transaction to the ledger"""
+        if timestamp is None:
+            timestamp = time.time()
+        if self.timestamps and timestamp < self.timestamps[-1]:
+            # Keep the column sorted if the clock steps backwards
+            timestamp = self.timestamps[-1]
+        seconds = self.balance_seconds
+        if seconds is not None:
+            if self.balances:
+                held = self.balances[-1] * (timestamp - self.timestamps[-1])
+                seconds.append(seconds[-1] + held)
+            else:
+                seconds.append(0.0)
+        self.amounts.append(amount_cents)
+        self.kinds.append(kind)
+        self.timestamps.append(timestamp)
+        self.balances.append(balance_cents)
+        self.kind_totals[kind] += amount_cents
+        if balance_cents < self.lowest_balance:
+            self.lowest_balance = balance_cents
+    
+    def total(self, kind: Optional[int] = None) -> int:
+        """Sum of amounts in cents, optionally for a single kind (O(1))"""
+        if kind is None:
+            return sum(self.kind_totals)
+        return self.kind_totals[kind]
+    
+    def indices(self, kind: int) -> List[int]:
+        """Positions of all entries of the given kind"""
+        return [i for i, k in enumerate(self.kinds) if k == kind]
+    
+    def entry(self, index: int) -> LedgerEntry:
+        """Decode one row"""
+        return LedgerEntry(index, self.timestamps[index], self.kinds[index],
+                           Money(self.amounts[index]), Money(self.balances[index]))
+    
+    def index_range(self, start: Optional[float] = None,
+                    end: Optional[float] = None) -> Tuple[int, int]:
+        """Row positions [lo, hi) with start <= timestamp <= end"""
+        lo = 0 if start is None else bisect_left(self.timestamps, start)
+        hi = len(self) if end is None else bisect_right(self.timestamps, end)
+        return lo, max(lo, hi)
+    
+    def balance_at(self, timestamp: float) -> int:
+        """Balance in cents as of a moment in time (0 before the first entry)"""
+        i = bisect_right(self.timestamps, timestamp)
+        return self.balances[i - 1] if i else 0
+    
+    def balance_integral(self, timestamp: float) -> float:
+        """Balance (cents) integrated over time (seconds) up to a moment"""
+        if self.balance_seconds is None:
+            raise ValueError("This ledger was created without track_average")
+        i = bisect_right(self.timestamps, timestamp)
+        if not i:
+            return 0.0
+        return self.balance_seconds[i - 1] + self.balances[i - 1] * (timestamp - self.timestamps[i - 1])
+    
+    def average_balance(self, start: float, end: float) -> float:
+        """Time-weighted average balance in cents between two moments
+        
+        Two binary searches on the running integral, however many
+        entries fall in between.
+        """
+        if end <= start:
+            return float(self.balance_at(start))
+        return (self.balance_integral(end) - self.balance_integral(start)) / (end - start)
+    
+    def iter_range(self, start: Optional[float] = None,
+                   end: Optional[float] = None) -> Iterator[LedgerEntry]:
+        """Stream the entries in a time range one at a time"""
+        lo, hi = self.index_range(start, end)
+        for i in range(lo, hi):
+            yield self.entry(i)
+    
+    def page(self, start: Optional[float] = None, end: Optional[float] = None,
+             cursor: Optional[int] = None,
+             limit: int = 100) -> Tuple[List[LedgerEntry], Optional[int]]:
+        """One page of entries in a time range plus the cursor for the next
+        
+        Pass the returned cursor back to continue; it is None after the
+        last page. Only the rows on the page are decoded.
+        """
+        lo, hi = self.index_range(start, end)
+        if cursor is not None:
+            lo = max(lo, cursor)
+        stop = min(hi, lo + limit)
+        rows = [self.entry(i) for i in range(lo, stop)]
+        return rows, (stop if stop < hi else None)
+    
+    @classmethod
+    def format_entry(cls, kind: int, amount: int) -> str:
+        """Render one entry (kind code, signed cents) the way the old string history did"""
+        label = cls.LABELS[kind]
+        if kind == cls.INITIAL:
+            return f"{label}: {Money(amount)}"
+        sign = "+" if amount >= 0 else "-"
+        return f"{label}: {sign}{Money(abs(amount))}"
+    
+    def __len__(self) -> int:
+        return len(self.kinds)
+    
+    def __getitem__(self, index: "Union[int, slice]") -> "Union[str, List[str]]":
+        """One formatted entry, or a list of them for a slice like history[-5:]"""
+        if isinstance(index, slice):
+            return [self.format_entry(self.kinds[i], self.amounts[i])
+                    for i in range(len(self))[index]]
+        index = range(len(self))[index]
+        return self.format_entry(self.kinds[index], self.amounts[index])
+    
+    def __iter__(self) -> Iterator[str]:
+        """Yield formatted entries one at a time"""
+        for kind, amount in zip(self.kinds, self.amounts):
+            yield self.format_entry(kind, amount)
+    
+    def __bool__(self) -> bool:
+        return len(self) > 0
+
+
+class TransactionLimit:
+    """Rolling 24-hour limits on transaction count and amount debited
+    
+    The count limit keeps a ring buffer with the timestamps of the last
+    max_count transactions: a new one is refused while the oldest of them
+    is still inside the window. Debits (withdrawals and outgoing
+    transfers) are summed into hourly buckets, so the amount window has
+    one-hour resolution. Both checks are constant time however long the
+    account's history grows.
+    """
+    
+    WINDOW = 24 * 60 * 60     # Seconds in the rolling window
+    BUCKETS = 24              # One amount bucket per hour
+    BUCKET_SECONDS = WINDOW // BUCKETS
+    
+    __slots__ = ("max_count", "max_amount", "_clock", "_times", "_next",
+                 "_bucket_ids", "_bucket_cents")
+    
+    def __init__(self, max_count: Optional[int] = None,
+                 max_amount: "Union[Money, float, None]" = None,
+                 clock: Callable[[], float] = time.time):
+        self.max_count = max_count
+        self.max_amount = None if max_amount is None else Money.of(max_amount)
+        self._clock = clock
+        
+        # Ring buffer of the last max_count transaction times
+        self._times = array("d", [float("-inf")] * (max_count or 0))
+        self._next = 0
+        
+        # Debited cents per bucket, tagged with the hour number they hold
+        self._bucket_ids = array("q", [-1] * self.BUCKETS)
+        self._bucket_cents = array("q", [0] * self.BUCKETS)
+    
+    def debited_in_window(self, now: Optional[float] = None) -> Money:
+        """Amount debited during the last 24 hours"""
+        now = self._clock() if now is None else now
+        oldest_hour = int(now // self.BUCKET_SECONDS) - self.BUCKETS + 1
+        return Money(sum(cents for hour, cents in zip(self._bucket_ids, self._bucket_cents)
+                         if hour >= oldest_hour))
+    
+    def try_use(self, amount_cents: int, debit: bool) -> bool:
+        """Count one transaction if it fits within the limits"""
+        now = self._clock()
+        
+        if self.max_count is not None:
+            if self.max_count == 0 or now - self._times[self._next] < self.WINDOW:
+                return False
+        if debit and self.max_amount is not None:
+            if self.debited_in_window(now)._cents + amount_cents > self.max_amount._cents:
+                return False
+        
+        if self.max_count:
+            self._times[self._next] = now
+            self._next = (self._next + 1) % self.max_count
+        if debit:
+            hour = int(now // self.BUCKET_SECONDS)
+            slot = hour % self.BUCKETS
+            if self._bucket_ids[slot] != hour:
+                self._bucket_ids[slot] = hour
+                self._bucket_cents[slot] = 0
+            self._bucket_cents[slot] += amount_cents
+        return True
@@ -0,0 +1,115 @@
+# Savings projections for the Week 11 bank accounts
+# Used by: projects/banking/bank.py (Bank.project_savings)
+
+"""Savings balances projected under many rate scenarios at once"""
+
+from array import array
+from typing import List, Optional, Sequence, Tuple
+
+from projects.bank_account import SavingsAccount
+
+
+class SavingsProjection:
+    """Projected savings balances for N scenarios over M periods
+    
+    rate_shifts[s][m] is added to every account's own interest_rate in
+    period m of scenario s, and contributions[s][m] is deposited into
+    every account at the end of that period. Each period an account
+    grows by g = 1 + rate / periods_per_year and then receives c, which
+    is linear in the opening balance, so after M periods
+    
+        balance = opening * G + C
+    
+    where G and C depend only on the account's rate and the scenario.
+    They are worked out once per distinct rate (closed form when the
+    scenario's row is constant, one pass over the periods otherwise), and
+    each account then costs one multiply-add per scenario. Book totals
+    use the summed opening balance of each rate group, so they never
+    touch individual accounts. Projections are planning figures in float
+    dollars and are not rounded to cents like posted interest.
+    """
+    
+    def __init__(self, accounts: Sequence[SavingsAccount],
+                 rate_shifts: Sequence[Sequence[float]],
+                 contributions: Optional[Sequence[Sequence[float]]] = None,
+                 periods_per_year: int = 12):
+        periods = len(rate_shifts[0]) if rate_shifts else 0
+        if contributions is None:
+            contributions = [[0.0] * periods for _ in rate_shifts]
+        if len(contributions) != len(rate_shifts) or any(
+                len(row) != periods for row in list(rate_shifts) + list(contributions)):
+            raise ValueError("rate_shifts and contributions must both be N x M")
+        self.scenarios = len(rate_shifts)
+        self.periods = periods
+        self.periods_per_year = periods_per_year
+        self.rate_shifts = rate_shifts
+        self.contributions = contributions
+        self.account_numbers = [a.account_number for a in accounts]
+        
+        # Group accounts by their base rate
+        self.rates: List[float] = sorted({a.interest_rate for a in accounts})
+        group_of = {rate: i for i, rate in enumerate(self.rates)}
+        self._group = array("l", (group_of[a.interest_rate] for a in accounts))
+        self._opening = array("d", (a._balance_cents / 100 for a in accounts))
+        self._group_opening = array("d", [0.0] * len(self.rates))
+        self._group_size = array("l", [0] * len(self.rates))
+        for group, opening in zip(self._group, self._opening):
+            self._group_opening[group] += opening
+            self._group_size[group] += 1
+        
+        # growth[s][k] and offset[s][k]: G and C for rate group k in scenario s
+        self.growth: List[array] = []
+        self.offset: List[array] = []
+        for shifts, deposits in zip(rate_shifts, contributions):
+            growth = array("d")
+            offset = array("d")
+            for rate in self.rates:
+                g_total, c_total = self._compound(rate, shifts, deposits)
+                growth.append(g_total)
+                offset.append(c_total)
+            self.growth.append(growth)
+            self.offset.append(offset)
+    
+    def _compound(self, rate: float, shifts: Sequence[float],
+                  deposits: Sequence[float]) -> Tuple[float, float]:
+        """G and C for one base rate over one scenario row"""
+        periods = len(shifts)
+        if periods and all(d == shifts[0] for d in shifts) and all(c == deposits[0] for c in deposits):
+            # Constant row: compound growth and the annuity formula
+            g = 1 + (rate + shifts[0]) / self.periods_per_year
+            g_total = g ** periods
+            c_total = deposits[0] * (g_total - 1) / (g - 1) if g != 1 else deposits[0] * periods
+            return g_total, c_total
+        g_total, c_total = 1.0, 0.0
+        for shift, deposit in zip(shifts, deposits):
+            g = 1 + (rate + shift) / self.periods_per_year
+            g_total *= g
+            c_total = c_total * g + deposit
+        return g_total, c_total
+    
+    def balances(self, scenario: int) -> array:
+        """Projected final balance (dollars) of each account, in account_numbers order"""
+        growth = self.growth[scenario]
+        offset = self.offset[scenario]
+        return array("d", (opening * growth[k] + offset[k]
+                           for opening, k in zip(self._opening, self._group)))
+    
+    def final_totals(self) -> array:
+        """Projected book total at the end of each scenario"""
+        return array("d", (
+            sum(opening * g + size * c for opening, size, g, c
+                in zip(self._group_opening, self._group_size, growth, offset))
+            for growth, offset in zip(self.growth, self.offset)
+        ))
+    
+    def path(self, scenario: int) -> array:
+        """Projected book total after each period of one scenario"""
+        totals = array("d", [0.0] * self.periods)
+        shifts = self.rate_shifts[scenario]
+        deposits = self.contributions[scenario]
+        for rate, opening, size in zip(self.rates, self._group_opening, self._group_size):
+            balance = opening
+            for m, (shift, deposit) in enumerate(zip(shifts, deposits)):
+                balance = balance * (1 + (rate + shift) / self.periods_per_year) + size * deposit
+                totals[m] += balance
+        return totals
@@ -0,0 +1,181 @@
+# Ledger reconciliation for the Week 11 bank accounts
+# Used by: projects/banking/bank.py (Bank.reconcile)
+
+"""Check every balance against its ledger, in parallel and incrementally"""
+
+import json
+import os
+import time
+import zlib
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from typing import TYPE_CHECKING, Any, Dict, List, NamedTuple, Optional, Sequence, Tuple
+
+from money import Money
+from projects.bank_account import BankAccount
+from projects.banking.ledger import TransactionLedger
+
+if TYPE_CHECKING:  # bank.py imports this module
+    from projects.banking.bank import Bank
+
+
+class Mismatch(NamedTuple):
+    """One reconciliation failure"""
+    account_number: str
+    problem: str            # "ledger" (broken running balance) or "balance"
+    row: int                # Ledger row where it was found
+    expected: Money         # What the ledger says
+    actual: Money           # What is stored
+
+
+class ReconciliationReport(NamedTuple):
+    """Summary of one reconciliation run"""
+    accounts: int
+    segments_checked: int
+    segments_skipped: int
+    mismatches: List[Mismatch]
+    seconds: float
+    
+    def __str__(self) -> str:
+        lines = [f"Reconciled {self.accounts:,} accounts in {self.seconds:.2f}s: "
+                 f"{self.segments_checked:,} segments checked, "
+                 f"{self.segments_skipped:,} unchanged, {len(self.mismatches)} mismatches"]
+        for m in self.mismatches:
+            lines.append(f"  {m.account_number} {m.problem} at row {m.row}: "
+                         f"ledger {m.expected}, found {m.actual}")
+        return "\n".join(lines)
+
+
+# One account's work: number, stored cents, first row, opening cents, amounts, balances
+LedgerWork = Tuple[str, int, int, int, array, array]
+
+
+def _verify_ledgers(items: Sequence[LedgerWork],
+                    segment_rows: int) -> List[Tuple[str, Optional[Mismatch], List[int]]]:
+    """Replay ledger rows from a known opening balance
+    
+    Returns, per account, a mismatch (or None) and the closing balance
+    at each segment boundary that was crossed.
+    """
+    results = []
+    for number, stored, first_row, balance, amounts, balances in items:
+        mismatch = None
+        closings = []
+        for offset, (amount, recorded) in enumerate(zip(amounts, balances)):
+            balance += amount
+            if balance != recorded:
+                mismatch = Mismatch(number, "ledger", first_row + offset,
+                                    Money(balance), Money(recorded))
+                break
+            if (first_row + offset + 1) % segment_rows == 0:
+                closings.append(balance)
+        if mismatch is None and balance != stored:
+            mismatch = Mismatch(number, "balance", first_row + len(amounts),
+                                Money(balance), Money(stored))
+        results.append((number, mismatch, closings))
+    return results
+
+
+class LedgerReconciler:
+    """Checks every account's stored balance against its ledger
+    
+    Each ledger is cut into segments of segment_rows rows. A full segment
+    that verified cleanly is remembered by its CRC-32 and its closing
+    balance. On the next run the checksums are recomputed (cheap, in C)
+    and replay starts at the first segment whose checksum changed, from
+    the remembered closing balance of the segment before it, so nightly
+    runs only re-verify what changed. Replay runs on a process pool in
+    chunks of accounts. The remembered state can be saved between runs.
+    """
+    
+    SEGMENT_ROWS = 4096
+    
+    def __init__(self, segment_rows: int = SEGMENT_ROWS, chunk_size: int = 1000,
+                 workers: Optional[int] = None):
+        self.segment_rows = segment_rows
+        self.chunk_size = chunk_size
+        self.workers = workers or os.cpu_count() or 1
+        # number -> [(crc, closing cents)] for each verified full segment
+        self.verified: Dict[str, List[Tuple[int, int]]] = {}
+    
+    def _checksum(self, ledger: TransactionLedger, lo: int, hi: int) -> int:
+        crc = zlib.crc32(memoryview(ledger.amounts)[lo:hi])
+        crc = zlib.crc32(memoryview(ledger.kinds)[lo:hi], crc)
+        return zlib.crc32(memoryview(ledger.balances)[lo:hi], crc)
+    
+    def _plan(self, account: BankAccount) -> Tuple[LedgerWork, List[int], int]:
+        """Work item for one account, its full-segment checksums, and segments skipped"""
+        with account._lock:
+            ledger = account.transaction_history
+            rows = len(ledger)
+            size = self.segment_rows
+            crcs = [self._checksum(ledger, lo, lo + size) for lo in range(0, rows - size + 1, size)]
+            known = self.verified.get(account.account_number, [])
+            same = 0
+            while same < len(known) and same < len(crcs) and known[same][0] == crcs[same]:
+                same += 1
+            first_row = same * size
+            opening = known[same - 1][1] if same else 0
+            work = (account.account_number, account._balance_cents, first_row, opening,
+                    ledger.amounts[first_row:], ledger.balances[first_row:])
+        return work, crcs, same
+    
+    def run(self, bank: "Bank") -> ReconciliationReport:
+        """Reconcile every account in a bank"""
+        started = time.perf_counter()
+        accounts = 0
+        checked = skipped = 0
+        mismatches: List[Mismatch] = []
+        pending_crcs: Dict[str, List[int]] = {}
+        kept: Dict[str, List[Tuple[int, int]]] = {}
+        
+        def collect(done: Any) -> None:
+            for future in done:
+                for number, mismatch, closings in future.result():
+                    if mismatch is not None:
+                        mismatches.append(mismatch)
+                        kept.pop(number, None)
+                        continue
+                    crcs = pending_crcs.pop(number)
+                    segments = kept.get(number, [])
+                    segments += zip(crcs[len(segments):], closings)
+                    kept[number] = segments
+        
+        with ProcessPoolExecutor(max_workers=self.workers) as pool:
+            in_flight = set()
+            chunk: List[LedgerWork] = []
+            for account in bank:
+                work, crcs, same = self._plan(account)
+                accounts += 1
+                skipped += same
+                total_segments = -(-len(account.transaction_history) // self.segment_rows)
+                checked += max(total_segments - same, 0)
+                pending_crcs[work[0]] = crcs
+                kept[work[0]] = self.verified.get(work[0], [])[:same]
+                chunk.append(work)
+                if len(chunk) >= self.chunk_size:
+                    in_flight.add(pool.submit(_verify_ledgers, chunk, self.segment_rows))
+                    chunk = []
+                    if len(in_flight) >= 2 * self.workers:
+                        done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                        collect(done)
+            if chunk:
+                in_flight.add(pool.submit(_verify_ledgers, chunk, self.segment_rows))
+            collect(wait(in_flight)[0])
+        
+        self.verified = kept
+        mismatches.sort()
+        return ReconciliationReport(accounts, checked, skipped, mismatches,
+                                    time.perf_counter() - started)
+    
+    def save(self, path: str) -> None:
+        """Store the verified-segment state for the next run"""
+        with open(path, "w") as f:
+            json.dump(self.verified, f)
+    
+    def load(self, path: str) -> None:
+        """Load state written by save(); a missing file means a full run"""
+        if os.path.exists(path):
+            with open(path) as f:
+                self.verified = {number: [tuple(segment) for segment in segments]
+                                 for number, segments in json.load(f).items()}
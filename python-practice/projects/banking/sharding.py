@@ -0,0 +1,345 @@
+# Sharded banks for the Week 11 bank accounts
+# Used by: projects/banking/benchmarks.py
+
+"""A bank split across worker processes, with two-phase commit transfers"""
+
+import multiprocessing
+import os
+from array import array
+from typing import Any, Dict, List, Optional, Sequence, Tuple, Union
+
+from event_sink import NullSink, using_sink
+from money import Money, to_cents
+from projects.bank_account import BankAccount, locked
+from projects.banking.account_numbers import account_id
+from projects.banking.bank import Bank, account_row
+from projects.banking.ledger import TransactionLedger
+from projects.banking.storage import AccountRow
+
+
+class _Shard:
+    """Worker-side half of a ShardedBank: one Bank plus pending transfers
+    
+    Runs inside a shard process. Every method takes whole batches so one
+    pipe round trip carries many operations.
+    """
+    
+    def __init__(self, name: str):
+        self.bank = Bank(name)
+        self.pending: Dict[int, Tuple[str, int]] = {}  # txid -> (number, signed cents)
+    
+    def open(self, rows: Sequence[AccountRow]) -> int:
+        """Create accounts from stored rows"""
+        for row in rows:
+            self.bank._index_account(Bank._account_from_row(row))
+        return len(rows)
+    
+    def apply_batch(self, numbers: Sequence[str], amounts: Sequence[float]) -> array:
+        return self.bank.apply_batch(numbers, amounts)
+    
+    def transfer(self, sources: Sequence[str], targets: Sequence[str],
+                 cents: Sequence[int]) -> array:
+        """Transfers where both accounts live in this shard"""
+        bank = self.bank
+        results = array("b", bytes(len(cents)))
+        for row, (source_number, target_number, amount) in enumerate(zip(sources, targets, cents)):
+            source = bank._lookup(source_number)
+            target = bank._lookup(target_number)
+            if source is None or target is None:
+                results[row] = Bank.UNKNOWN_ACCOUNT
+                continue
+            with locked(source, target):
+                status = bank._row_status(source, source._balance_cents, -amount)
+                if status == Bank.POSTED:
+                    money = Money(amount)
+                    source.balance -= money
+                    source._record(TransactionLedger.TRANSFER_OUT, -money, log=False)
+                    target.balance += money
+                    target._record(TransactionLedger.TRANSFER_IN, money, log=False)
+                    source._log_transfer(target, money)
+            results[row] = status
+        return results
+    
+    def prepare(self, txids: Sequence[int], numbers: Sequence[str],
+                cents: Sequence[int]) -> array:
+        """Phase one: vote on each half of a cross-shard transfer
+        
+        A debit (negative cents) is checked and the money is held by taking
+        it off the balance now, so nothing else can spend it before commit.
+        A credit only needs the account to exist.
+        """
+        bank = self.bank
+        votes = array("b", bytes(len(txids)))
+        for row, (txid, number, amount) in enumerate(zip(txids, numbers, cents)):
+            account = bank._lookup(number)
+            if account is None:
+                votes[row] = Bank.UNKNOWN_ACCOUNT
+                continue
+            if amount < 0:
+                with account._lock:
+                    votes[row] = bank._row_status(account, account._balance_cents, amount)
+                    if votes[row] == Bank.POSTED:
+                        account.balance += Money(amount)
+            if votes[row] == Bank.POSTED:
+                self.pending[txid] = (number, amount)
+        return votes
+    
+    def finish(self, commit: Sequence[int], abort: Sequence[int]) -> int:
+        """Phase two: apply committed halves and release aborted holds
+        
+        A released debit still counts towards the account's daily limit.
+        """
+        bank = self.bank
+        for txid in commit:
+            number, amount = self.pending.pop(txid)
+            account = bank._lookup(number)
+            money = Money(amount)
+            with account._lock:
+                if amount < 0:
+                    account._record(TransactionLedger.TRANSFER_OUT, money)
+                else:
+                    account.balance += money
+                    account._record(TransactionLedger.TRANSFER_IN, money)
+        for txid in abort:
+            number, amount = self.pending.pop(txid)
+            if amount < 0:
+                account = bank._lookup(number)
+                with account._lock:
+                    account.balance -= Money(amount)
+        return len(commit) + len(abort)
+    
+    def balance(self, number: str) -> Optional[int]:
+        account = self.bank._lookup(number)
+        return None if account is None else account._balance_cents
+    
+    def total_balance(self) -> int:
+        return self.bank.total_balance()._cents
+    
+    def count(self) -> int:
+        return len(self.bank)
+
+
+def _shard_main(conn: Any, name: str) -> None:
+    """Shard process loop: run (method, args) commands until told to stop"""
+    shard = _Shard(name)
+    with using_sink(NullSink()):
+        while True:
+            command, args = conn.recv()
+            if command == "stop":
+                break
+            try:
+                conn.send((True, getattr(shard, command)(*args)))
+            except Exception as error:
+                conn.send((False, error))
+    conn.close()
+
+
+class ShardedBank:
+    """A bank whose accounts are spread over several worker processes
+    
+    Each account lives in exactly one shard, chosen from its account
+    number, and each shard is a separate process with its own Bank, so
+    shards run on separate cores instead of sharing one GIL. Commands go
+    over pipes in batches: a batch is split per shard, sent to every
+    shard before any reply is read, and the replies are stitched back
+    into row order.
+    
+    Transfers between shards use two-phase commit. In phase one the
+    source shard holds the money and the target shard confirms the
+    account; only when both vote yes does phase two move the money,
+    otherwise the hold is released.
+    """
+    
+    def __init__(self, name: str, shards: Optional[int] = None):
+        self.name = name
+        count = shards or os.cpu_count() or 1
+        self._conns = []
+        self._processes = []
+        self._next_txid = 0
+        self._routes: Dict[str, int] = {}  # Cached account number -> shard
+        for index in range(count):
+            parent_conn, child_conn = multiprocessing.Pipe()
+            process = multiprocessing.Process(
+                target=_shard_main, args=(child_conn, f"{name} #{index}"), daemon=True
+            )
+            process.start()
+            child_conn.close()
+            self._conns.append(parent_conn)
+            self._processes.append(process)
+    
+    @property
+    def shard_count(self) -> int:
+        return len(self._conns)
+    
+    def shard_of(self, account_number: str) -> int:
+        """Index of the shard that owns an account"""
+        shard = self._routes.get(account_number)
+        if shard is None:
+            shard = account_id(account_number) % len(self._conns)
+        return shard
+    
+    def _call(self, commands: Dict[int, Tuple[str, tuple]]) -> Dict[int, Any]:
+        """Send one command to each listed shard, then collect every reply"""
+        for index, command in commands.items():
+            self._conns[index].send(command)
+        replies = {}
+        error = None
+        for index in commands:
+            ok, value = self._conns[index].recv()
+            if ok:
+                replies[index] = value
+            elif error is None:
+                error = value
+        if error is not None:
+            raise error
+        return replies
+    
+    def _split(self, numbers: Sequence[str]) -> List[List[int]]:
+        """Row positions grouped by owning shard"""
+        groups: List[List[int]] = [[] for _ in self._conns]
+        routes = self._routes
+        shard_of = self.shard_of
+        for row, number in enumerate(numbers):
+            shard = routes.get(number)
+            groups[shard_of(number) if shard is None else shard].append(row)
+        return groups
+    
+    def add_accounts(self, accounts: Sequence[BankAccount]) -> None:
+        """Copy accounts into their shards
+        
+        The shard keeps its own copy; the objects passed in are not
+        updated by later operations on the sharded bank.
+        """
+        rows: Dict[int, List[AccountRow]] = {}
+        for account in accounts:
+            row = account_row(account)
+            shard = self.shard_of(account.account_number)
+            self._routes[account.account_number] = shard
+            rows.setdefault(shard, []).append(row)
+        self._call({index: ("open", (group,)) for index, group in rows.items()})
+    
+    def add_account(self, account: BankAccount) -> None:
+        self.add_accounts([account])
+    
+    def apply_batch(self, account_numbers: Sequence[str], amounts: Sequence[float]) -> array:
+        """Post deposits and withdrawals; same status codes as Bank.apply_batch"""
+        if len(account_numbers) != len(amounts):
+            raise ValueError("account_numbers and amounts must have the same length")
+        groups = self._split(account_numbers)
+        replies = self._call({
+            index: ("apply_batch", ([account_numbers[r] for r in rows], [amounts[r] for r in rows]))
+            for index, rows in enumerate(groups) if rows
+        })
+        results = array("b", bytes(len(amounts)))
+        for index, codes in replies.items():
+            for row, code in zip(groups[index], codes):
+                results[row] = code
+        return results
+    
+    def transfer_batch(self, source_numbers: Sequence[str], target_numbers: Sequence[str],
+                       amounts: Sequence[float]) -> array:
+        """Run many transfers; one status code per row
+        
+        Transfers inside one shard run there directly in one round trip.
+        Cross-shard ones are prepared in a second and committed or aborted
+        in a third; every round trip goes to all involved shards at once.
+        """
+        if not len(source_numbers) == len(target_numbers) == len(amounts):
+            raise ValueError("sources, targets and amounts must have the same length")
+        shard_of = self.shard_of
+        results = array("b", bytes(len(amounts)))
+        local: Dict[int, Tuple[List[int], List[str], List[str], List[int]]] = {}
+        halves: Dict[int, Tuple[List[int], List[str], List[int]]] = {}
+        cross: Dict[int, int] = {}  # txid -> row
+        
+        for row, (source, target, amount) in enumerate(zip(source_numbers, target_numbers, amounts)):
+            cents = to_cents(amount)
+            if cents <= 0 or source == target:
+                results[row] = Bank.INVALID_AMOUNT
+                continue
+            source_shard = shard_of(source)
+            target_shard = shard_of(target)
+            if source_shard == target_shard:
+                group = local.setdefault(source_shard, ([], [], [], []))
+                group[0].append(row)
+                group[1].append(source)
+                group[2].append(target)
+                group[3].append(cents)
+                continue
+            txid = self._next_txid
+            self._next_txid += 1
+            cross[txid] = row
+            for shard, number, signed in ((source_shard, source, -cents), (target_shard, target, cents)):
+                half = halves.setdefault(shard, ([], [], []))
+                half[0].append(txid)
+                half[1].append(number)
+                half[2].append(signed)
+        
+        replies = self._call({shard: ("transfer", group[1:]) for shard, group in local.items()})
+        for shard, codes in replies.items():
+            for row, code in zip(local[shard][0], codes):
+                results[row] = code
+        
+        votes = self._call({shard: ("prepare", half) for shard, half in halves.items()})
+        
+        # A transfer commits only if both halves voted yes
+        failed: Dict[int, int] = {}
+        for shard, codes in votes.items():
+            for txid, code in zip(halves[shard][0], codes):
+                if code != Bank.POSTED and txid not in failed:
+                    failed[txid] = code
+        decisions: Dict[int, Tuple[List[int], List[int]]] = {}
+        for shard, codes in votes.items():
+            commit, abort = decisions.setdefault(shard, ([], []))
+            for txid, code in zip(halves[shard][0], codes):
+                if code != Bank.POSTED:
+                    continue
+                (abort if txid in failed else commit).append(txid)
+        for txid, row in cross.items():
+            results[row] = failed.get(txid, Bank.POSTED)
+        self._call({shard: ("finish", decision) for shard, decision in decisions.items()
+                    if decision[0] or decision[1]})
+        return results
+    
+    def transfer(self, source_number: str, target_number: str,
+                 amount: "Union[Money, float]") -> bool:
+        """Transfer between two accounts by number"""
+        return self.transfer_batch([source_number], [target_number], [amount])[0] == Bank.POSTED
+    
+    def get_balance(self, account_number: str) -> Optional[Money]:
+        """Balance of one account, or None if no shard has it"""
+        cents = self._call({self.shard_of(account_number): ("balance", (account_number,))})
+        value = cents[self.shard_of(account_number)]
+        return None if value is None else Money(value)
+    
+    def total_balance(self) -> Money:
+        """Sum of all balances across shards"""
+        replies = self._call({index: ("total_balance", ()) for index in range(len(self._conns))})
+        return Money(sum(replies.values()))
+    
+    def __len__(self) -> int:
+        replies = self._call({index: ("count", ()) for index in range(len(self._conns))})
+        return sum(replies.values())
+    
+    def close(self) -> None:
+        """Stop the shard processes"""
+        for conn in self._conns:
+            try:
+                conn.send(("stop", ()))
+            except (BrokenPipeError, OSError):
+                pass
+        for process in self._processes:
+            process.join(timeout=5)
+        for conn in self._conns:
+            conn.close()
+        self._conns = []
+        self._processes = []
+    
+    def __enter__(self) -> "ShardedBank":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+    
+    def __str__(self) -> str:
+        return f"Sharded bank {self.name}: {len(self)} accounts in {self.shard_count} shards"
@@ -0,0 +1,129 @@
+# Statement files for the Week 11 bank accounts
+# Used by: projects/banking/benchmarks.py
+
+"""Write one compressed statement file per account, in parallel"""
+
+import gzip
+import lzma
+import os
+import time
+from array import array
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, wait
+from datetime import datetime
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Sequence, Tuple
+
+from money import Money
+from projects.bank_account import BankAccount
+from projects.banking.ledger import TransactionLedger
+
+if TYPE_CHECKING:
+    from projects.banking.bank import Bank
+
+
+# Statement file formats: opener, file extension and opener options.
+# gzip's default level 9 is much slower than 6 for almost no gain on text.
+STATEMENT_FORMATS = {
+    "gzip": (gzip.open, ".txt.gz", {"compresslevel": 6}),
+    "lzma": (lzma.open, ".txt.xz", {}),
+    "text": (open, ".txt", {}),
+}
+
+# What a statement worker receives per account:
+# number, holder, opening cents, then timestamps/kinds/amounts/balances for the period
+StatementRows = Tuple[str, str, int, array, array, array, array]
+
+
+def _statement_rows(account: BankAccount, start: Optional[float],
+                    end: Optional[float]) -> StatementRows:
+    """Copy the ledger columns for one account's statement period"""
+    with account._lock:
+        ledger = account.transaction_history
+        lo, hi = ledger.index_range(start, end)
+        opening = ledger.balances[lo - 1] if lo else 0
+        return (account.account_number, account.account_holder, opening,
+                ledger.timestamps[lo:hi], ledger.kinds[lo:hi],
+                ledger.amounts[lo:hi], ledger.balances[lo:hi])
+
+
+def _write_statement_file(path: str, compression: str,
+                          accounts: Sequence[StatementRows]) -> Tuple[int, int, int]:
+    """Render statements into one file; returns (accounts, rows, bytes written)"""
+    opener, _, options = STATEMENT_FORMATS[compression]
+    format_entry = TransactionLedger.format_entry
+    rows = 0
+    minute, when = None, ""
+    with opener(path, "wt", encoding="utf-8", **options) as out:
+        for number, holder, opening, timestamps, kinds, amounts, balances in accounts:
+            out.write(f"--- Statement for {holder} ---\n")
+            out.write(f"Account Number: {number}\n")
+            out.write(f"Opening Balance: {Money(opening)}\n")
+            # One line at a time; a statement is never built as one string
+            for i in range(len(kinds)):
+                if timestamps[i] // 60 != minute:
+                    minute = timestamps[i] // 60
+                    when = datetime.fromtimestamp(timestamps[i]).strftime("%Y-%m-%d %H:%M")
+                out.write(f"  {when}  {format_entry(kinds[i], amounts[i])}  Balance: {Money(balances[i])}\n")
+            closing = balances[-1] if len(balances) else opening
+            out.write(f"Closing Balance: {Money(closing)}\n")
+            out.write("-" * 50 + "\n")
+            rows += len(kinds)
+    return len(accounts), rows, os.path.getsize(path)
+
+
+def generate_statements(bank: "Bank", directory: str,
+                        start: Optional[float] = None, end: Optional[float] = None,
+                        accounts_per_file: int = 1000, compression: str = "gzip",
+                        workers: Optional[int] = None) -> Dict[str, float]:
+    """Write compressed statements for every account in a bank
+    
+    Accounts are grouped into files of accounts_per_file (1 gives one file
+    per account, named after it). Each group's ledger columns for the
+    period are copied and handed to a process pool that renders and
+    compresses the file, with only a couple of groups per worker in
+    flight so memory stays flat however many accounts there are.
+    Returns a summary with throughput figures; nothing is printed.
+    """
+    if compression not in STATEMENT_FORMATS:
+        raise ValueError(f"Unknown compression {compression!r}")
+    if accounts_per_file < 1:
+        raise ValueError("accounts_per_file must be positive")
+    os.makedirs(directory, exist_ok=True)
+    extension = STATEMENT_FORMATS[compression][1]
+    workers = workers or os.cpu_count() or 1
+    totals = {"files": 0, "accounts": 0, "rows": 0, "bytes": 0}
+    
+    def collect(done: Any) -> None:
+        for future in done:
+            accounts, rows, size = future.result()
+            totals["files"] += 1
+            totals["accounts"] += accounts
+            totals["rows"] += rows
+            totals["bytes"] += size
+    
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        in_flight = set()
+        group: List[StatementRows] = []
+        accounts = sorted(bank, key=lambda account: account.account_number)
+        for position, account in enumerate(accounts):
+            group.append(_statement_rows(account, start, end))
+            if len(group) < accounts_per_file and position < len(accounts) - 1:
+                continue
+            if accounts_per_file == 1:
+                name = f"{group[0][0]}{extension}"
+            else:
+                name = f"statements-{position // accounts_per_file:06d}{extension}"
+            in_flight.add(pool.submit(_write_statement_file,
+                                      os.path.join(directory, name), compression, group))
+            group = []
+            if len(in_flight) >= 2 * workers:
+                done, in_flight = wait(in_flight, return_when=FIRST_COMPLETED)
+                collect(done)
+        collect(wait(in_flight)[0])
+    elapsed = time.perf_counter() - started
+    
+    summary: Dict[str, float] = dict(totals)
+    summary["seconds"] = elapsed
+    summary["accounts_per_sec"] = totals["accounts"] / elapsed if elapsed else 0.0
+    summary["rows_per_sec"] = totals["rows"] / elapsed if elapsed else 0.0
+    return summary
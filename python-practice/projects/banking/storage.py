@@ -0,0 +1,390 @@
+# On-disk formats for the Week 11 bank accounts
+# Used by: projects/banking/bank.py
+
+"""Write-ahead log and snapshot files
+
+    AccountRow      the stored state of one account
+    WriteAheadLog   every change, appended and fsynced in groups
+    AccountSnapshot a fixed-width checkpoint read lazily through mmap
+"""
+
+import mmap
+import os
+import struct
+import threading
+import time
+import zlib
+from typing import Any, Iterator, NamedTuple, Optional, Sequence, Tuple
+
+from projects.banking.account_numbers import account_id
+
+
+class AccountRow(NamedTuple):
+    """Stored state of one account, as kept in logs and snapshots
+    
+    param is the interest rate, overdraft limit or credit limit. The
+    card fields (apr to billing_day) are zero for other account types,
+    and payment_due is 0.0 when no payment is due.
+    """
+    number: str
+    holder: str
+    account_type: int
+    balance: int                # Cents
+    param: float
+    apr: float = 0.0
+    cycle_start: float = 0.0
+    statement_balance: int = 0  # Cents
+    minimum_payment: int = 0    # Cents
+    payment_due: float = 0.0
+    billing_day: int = 0
+
+
+class WriteAheadLog:
+    """Append-only binary log of every account mutation
+    
+    Records are framed as (length, crc32, payload) so a torn write at the
+    end of the file is detected and ignored on recovery. Appends go into
+    an in-memory buffer; the buffer is written and fsynced as one group
+    when it holds group_size records or every group_latency seconds,
+    whichever comes first. Call sync() to force a group commit.
+    
+    Every append returns a sequence number. deposit(), withdraw() and
+    transfer() return as soon as their record is buffered; a caller that
+    must know the change is on disk calls wait_durable(), which blocks
+    until the group holding that thread's last record has been fsynced.
+    """
+    
+    # Record types (ledger kinds 0-5 are logged as-is)
+    OPEN = 10
+    CLOSE = 11
+    TRANSFER = 12
+    CYCLE = 13          # A card's statement after its cycle closed
+    BILLING_DAY = 14    # A card moved to another billing day
+    
+    _FRAME = struct.Struct("<II")       # payload length, crc32
+    _HEAD = struct.Struct("<Bd")        # record type, timestamp
+    _STR_LEN = struct.Struct("<H")
+    _AMOUNT = struct.Struct("<q")       # cents
+    _OPEN = struct.Struct("<Bqd")       # account type, balance cents, rate/limit
+    _CARD = struct.Struct("<ddqqdB")    # apr, cycle start, statement, minimum, due, day (cards only)
+    _CYCLE = struct.Struct("<dqqd")     # cycle start, statement, minimum, due
+    _DAY = struct.Struct("<B")
+    
+    def __init__(self, path: str, group_size: int = 256,
+                 group_latency: Optional[float] = 0.01):
+        self.path = path
+        self.group_size = group_size
+        self.group_latency = group_latency
+        self.fsync_count = 0
+        self._file = open(path, "ab")
+        self._buffer = bytearray()
+        self._pending = 0
+        self._buffer_lock = threading.Lock()    # Guards the buffer
+        self._write_lock = threading.Lock()     # Serialises file writes
+        self._appended = 0      # Sequence number of the last buffered record
+        self._durable = 0       # Sequence number of the last fsynced record
+        self._durable_changed = threading.Condition()
+        self._local = threading.local()     # Each thread's last sequence number
+        self._closed = threading.Event()
+        self._flusher: Optional[threading.Thread] = None
+        if group_latency is not None:
+            self._flusher = threading.Thread(target=self._flush_periodically, daemon=True)
+            self._flusher.start()
+    
+    # --- Encoding ---
+    
+    @classmethod
+    def _pack_str(cls, text: str) -> bytes:
+        data = text.encode("utf-8")
+        return cls._STR_LEN.pack(len(data)) + data
+    
+    def _append(self, record_type: int, body: bytes) -> int:
+        """Frame one record and add it to the current group; returns its sequence number"""
+        payload = self._HEAD.pack(record_type, time.time()) + body
+        frame = self._FRAME.pack(len(payload), zlib.crc32(payload)) + payload
+        with self._buffer_lock:
+            self._buffer += frame
+            self._pending += 1
+            self._appended += 1
+            sequence = self._appended
+            group_full = self._pending >= self.group_size
+        self._local.sequence = sequence
+        if group_full:
+            self.sync()
+        return sequence
+    
+    def log_open(self, row: AccountRow) -> int:
+        """Record an account joining the bank with its current state"""
+        body = (self._pack_str(row.number) + self._pack_str(row.holder)
+                + self._OPEN.pack(row.account_type, row.balance, row.param))
+        if row.billing_day:  # Only cards have a billing day
+            body += self._CARD.pack(*row[5:])
+        return self._append(self.OPEN, body)
+    
+    def log_close(self, account_number: str) -> int:
+        """Record an account leaving the bank"""
+        return self._append(self.CLOSE, self._pack_str(account_number))
+    
+    def log_entry(self, kind: int, account_number: str, amount_cents: int) -> int:
+        """Record a signed balance change of one ledger kind"""
+        return self._append(kind, self._pack_str(account_number) + self._AMOUNT.pack(amount_cents))
+    
+    def log_cycle(self, row: AccountRow) -> int:
+        """Record the statement figures of a card whose cycle just closed"""
+        body = self._pack_str(row.number) + self._CYCLE.pack(
+            row.cycle_start, row.statement_balance, row.minimum_payment, row.payment_due
+        )
+        return self._append(self.CYCLE, body)
+    
+    def log_billing_day(self, account_number: str, day: int) -> int:
+        """Record a card's new billing day"""
+        return self._append(self.BILLING_DAY, self._pack_str(account_number) + self._DAY.pack(day))
+    
+    def log_transfer(self, source_number: str, target_number: str, amount_cents: int) -> int:
+        """Record both sides of a transfer as one atomic record"""
+        body = (self._pack_str(source_number) + self._pack_str(target_number)
+                + self._AMOUNT.pack(amount_cents))
+        return self._append(self.TRANSFER, body)
+    
+    # --- Group commit ---
+    
+    def sync(self) -> None:
+        """Write and fsync every buffered record"""
+        with self._write_lock:
+            with self._buffer_lock:
+                if not self._buffer:
+                    return
+                data = bytes(self._buffer)
+                self._buffer.clear()
+                self._pending = 0
+                last = self._appended
+            # Appenders keep filling the next group while this one is synced
+            self._file.write(data)
+            self._file.flush()
+            os.fsync(self._file.fileno())
+            self.fsync_count += 1
+            with self._durable_changed:
+                self._durable = last
+                self._durable_changed.notify_all()
+    
+    @property
+    def durable_sequence(self) -> int:
+        """Sequence number of the last record known to be on disk"""
+        return self._durable
+    
+    def wait_durable(self, sequence: Optional[int] = None,
+                     timeout: Optional[float] = None) -> bool:
+        """Block until a record has been fsynced; returns False on timeout
+        
+        sequence defaults to the last record this thread appended, so
+        account.deposit(10); wal.wait_durable() waits for that deposit.
+        Without a background flusher the group is synced right away.
+        """
+        if sequence is None:
+            sequence = getattr(self._local, "sequence", 0)
+        if self._durable >= sequence:
+            return True
+        if self._flusher is None or self._closed.is_set():
+            self.sync()
+        with self._durable_changed:
+            return self._durable_changed.wait_for(lambda: self._durable >= sequence, timeout)
+    
+    def position(self) -> int:
+        """Sync, then return the file offset just past the last record"""
+        self.sync()
+        with self._write_lock:
+            return self._file.tell()
+    
+    def _flush_periodically(self) -> None:
+        """Background loop enforcing the group latency bound"""
+        while not self._closed.wait(self.group_latency):
+            self.sync()
+    
+    def close(self) -> None:
+        """Flush remaining records and close the file"""
+        if self._closed.is_set():
+            return
+        self._closed.set()
+        if self._flusher is not None:
+            self._flusher.join()
+        self.sync()
+        self._file.close()
+    
+    def __enter__(self) -> "WriteAheadLog":
+        return self
+    
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+        return False
+    
+    # --- Reading ---
+    
+    @classmethod
+    def read_records(cls, path: str, start: int = 0) -> Iterator[Tuple[int, Tuple[Any, ...]]]:
+        """Yield (end_offset, record) for every intact record after start
+        
+        Each record is a tuple starting with (record_type, timestamp).
+        Reading stops at the first incomplete or corrupt frame.
+        """
+        with open(path, "rb") as f:
+            f.seek(start)
+            data = f.read()
+        
+        offset = 0
+        while offset + cls._FRAME.size <= len(data):
+            length, crc = cls._FRAME.unpack_from(data, offset)
+            payload_start = offset + cls._FRAME.size
+            payload = data[payload_start:payload_start + length]
+            if len(payload) < length or zlib.crc32(payload) != crc:
+                break
+            offset = payload_start + length
+            yield start + offset, cls._decode(payload)
+    
+    @classmethod
+    def _decode(cls, payload: bytes) -> Tuple[Any, ...]:
+        record_type, timestamp = cls._HEAD.unpack_from(payload, 0)
+        pos = cls._HEAD.size
+        
+        def read_str() -> str:
+            nonlocal pos
+            (size,) = cls._STR_LEN.unpack_from(payload, pos)
+            pos += cls._STR_LEN.size
+            text = payload[pos:pos + size].decode("utf-8")
+            pos += size
+            return text
+        
+        if record_type == cls.OPEN:
+            number, holder = read_str(), read_str()
+            account_type, balance, param = cls._OPEN.unpack_from(payload, pos)
+            pos += cls._OPEN.size
+            card = cls._CARD.unpack_from(payload, pos) if pos < len(payload) else ()
+            return (record_type, timestamp, number, holder, account_type, balance, param) + card
+        if record_type == cls.CLOSE:
+            return (record_type, timestamp, read_str())
+        if record_type == cls.TRANSFER:
+            source, target = read_str(), read_str()
+            (amount,) = cls._AMOUNT.unpack_from(payload, pos)
+            return (record_type, timestamp, source, target, amount)
+        if record_type == cls.CYCLE:
+            number = read_str()
+            return (record_type, timestamp, number) + cls._CYCLE.unpack_from(payload, pos)
+        if record_type == cls.BILLING_DAY:
+            number = read_str()
+            return (record_type, timestamp, number) + cls._DAY.unpack_from(payload, pos)
+        number = read_str()
+        (amount,) = cls._AMOUNT.unpack_from(payload, pos)
+        return (record_type, timestamp, number, amount)
+
+
+class AccountSnapshot:
+    """Fixed-width checkpoint of every account, read lazily through mmap
+    
+    The file is a header followed by one fixed-size row per account,
+    sorted by account number. Opening it only maps the file; a lookup is
+    a binary search over the mapped rows and only the row asked for is
+    decoded. The header stores the log offset the snapshot covers, so a
+    restart only replays the log after that point.
+    """
+    
+    MAGIC = b"BANKSNAP"
+    VERSION = 3
+    NUMBER_WIDTH = 16
+    HOLDER_WIDTH = 64
+    
+    _HEADER = struct.Struct("<8sIQQQ")      # magic, version, rows, log offset, max id
+    # number, holder, type, cents, rate/limit, then the card fields of AccountRow
+    _ROW = struct.Struct(f"<{NUMBER_WIDTH}s{HOLDER_WIDTH}sBqdddqqdB")
+    _TYPE_OFFSET = NUMBER_WIDTH + HOLDER_WIDTH
+    _DAY_OFFSET = _ROW.size - 1
+    
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, self.count, self.wal_offset, self.max_account_id = \
+            self._HEADER.unpack_from(self._map, 0)
+        if magic != self.MAGIC or version != self.VERSION:
+            self._map.close()
+            raise ValueError(f"{path} is not a version {self.VERSION} account snapshot")
+    
+    @classmethod
+    def _fixed(cls, text: str, width: int, field: str) -> bytes:
+        data = text.encode("utf-8")
+        if len(data) > width:
+            raise ValueError(f"{field} {text!r} is longer than {width} bytes")
+        return data.ljust(width, b"\0")
+    
+    @classmethod
+    def write(cls, path: str, rows: Sequence[AccountRow], wal_offset: int = 0) -> None:
+        """Write account rows to a new snapshot
+        
+        The file is written next to the target and renamed into place, so a
+        crash mid-write never leaves a half-written snapshot behind.
+        """
+        encoded = sorted(
+            (cls._fixed(row.number, cls.NUMBER_WIDTH, "Account number"),
+             cls._fixed(row.holder, cls.HOLDER_WIDTH, "Account holder"))
+            + tuple(row[2:])
+            for row in (AccountRow(*row) for row in rows)
+        )
+        max_id = max((account_id(row[0]) for row in rows), default=0)
+        
+        buffer = bytearray(cls._HEADER.size + cls._ROW.size * len(encoded))
+        cls._HEADER.pack_into(buffer, 0, cls.MAGIC, cls.VERSION, len(encoded), wal_offset, max_id)
+        offset = cls._HEADER.size
+        for row in encoded:
+            cls._ROW.pack_into(buffer, offset, *row)
+            offset += cls._ROW.size
+        
+        temp_path = path + ".tmp"
+        with open(temp_path, "wb") as f:
+            f.write(buffer)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, path)
+    
+    def _row_offset(self, slot: int) -> int:
+        return self._HEADER.size + slot * self._ROW.size
+    
+    def number_at(self, slot: int) -> str:
+        """Account number stored in one row"""
+        start = self._row_offset(slot)
+        return self._map[start:start + self.NUMBER_WIDTH].rstrip(b"\0").decode("utf-8")
+    
+    def type_at(self, slot: int) -> int:
+        """Account type code stored in one row"""
+        return self._map[self._row_offset(slot) + self._TYPE_OFFSET]
+    
+    def billing_day_at(self, slot: int) -> int:
+        """Billing day stored in one row (0 for accounts that are not cards)"""
+        return self._map[self._row_offset(slot) + self._DAY_OFFSET]
+    
+    def row(self, slot: int) -> AccountRow:
+        """Decode one row"""
+        number, holder, *state = self._ROW.unpack_from(self._map, self._row_offset(slot))
+        return AccountRow(number.rstrip(b"\0").decode("utf-8"),
+                          holder.rstrip(b"\0").decode("utf-8"), *state)
+    
+    def find(self, account_number: str) -> Optional[int]:
+        """Binary search for an account's row; None when absent"""
+        try:
+            key = self._fixed(account_number, self.NUMBER_WIDTH, "Account number")
+        except ValueError:
+            return None
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            start = self._row_offset(mid)
+            if self._map[start:start + self.NUMBER_WIDTH] < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        if lo < self.count and self.number_at(lo) == account_number:
+            return lo
+        return None
+    
+    def __len__(self) -> int:
+        return self.count
+    
+    def close(self) -> None:
+        self._map.close()
@@ -4,11 +4,87 @@
 import pytest
 import sys
 import os
+import gzip
+import io
+import lzma
+import statistics
+import threading
+import time
+from datetime import datetime
 
 # Add parent directory to path to import the module
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
 
-from week11_oop.bank_account_03 import BankAccount, SavingsAccount, CheckingAccount
+from event_sink import Event, NullSink, QueueSink, RingBufferSink, using_sink
+from money import Money
+from projects.bank_account import BankAccount, CheckingAccount, CreditCard, SavingsAccount
+from projects.banking.account_numbers import AccountNumberAllocator
+from projects.banking.bank import Bank
+from projects.banking.fraud import FraudDetector
+from projects.banking.ledger import TransactionLedger, TransactionLimit
+from projects.banking.projection import SavingsProjection
+from projects.banking.reconcile import LedgerReconciler
+from projects.banking.sharding import ShardedBank
+from projects.banking.statements import generate_statements
+from projects.banking.storage import AccountRow, AccountSnapshot, WriteAheadLog
+
+
+class TestMoney:
+    """Test the integer-cents Money type"""
+    
+    def test_exact_sums(self):
+        """Test sums of cents do not drift like floats"""
+        total = sum([Money.of(0.1)] * 10, Money())
+        assert total == Money.of(1)
+        assert total.cents == 100
+    
+    def test_arithmetic_with_numbers(self):
+        """Test Money mixes with plain numbers at cent precision"""
+        assert Money.of(10) + 2.5 == Money(1250)
+        assert 20 - Money.of(7.25) == Money(1275)
+        assert -Money(500) == -5
+        assert abs(Money(-500)) == 5
+    
+    def test_multiply_rounds_half_even(self):
+        """Test rates round half-to-even"""
+        assert Money(25) * 0.1 == Money(2)
+        assert Money(35) * 0.1 == Money(4)
+        assert Money(100) * 3 == Money(300)
+    
+    def test_formatting(self):
+        """Test display text and numeric format specs"""
+        assert str(Money(123456)) == "$1234.56"
+        assert str(Money(-5)) == "-$0.05"
+        assert f"{Money(1999):.2f}" == "19.99"
+    
+    def test_formatting_is_cached(self):
+        """Test equal amounts share one cached display string"""
+        first, second = str(Money(987654)), str(Money(987654))
+        assert first is second
+    
+    def test_slots(self):
+        """Test Money and accounts have no per-instance dict"""
+        assert not hasattr(Money(1), "__dict__")
+        assert not hasattr(CheckingAccount("John Doe"), "__dict__")
+    
+    def test_hash_matches_equality(self):
+        """Test equal values hash equally"""
+        assert hash(Money.of(12.5)) == hash(12.5)
+        assert len({Money(100), Money.of(1)}) == 1
+        assert hash(Money(100)) == hash(1) == hash(1.0)
+    
+    def test_equality_is_exact(self):
+        """Test plain numbers only equal Money when they are the same amount"""
+        assert Money(100) == 1
+        assert Money.of(0.29) == 0.29
+        assert Money(100) != 1.004
+        assert Money(100) < 1.004
+    
+    def test_balance_stored_as_cents(self):
+        """Test accounts keep an int and build Money on read"""
+        account = BankAccount("John Doe", 12.5)
+        assert account._balance_cents == 1250
+        assert account.balance == Money(1250)
 
 
 class TestBankAccount:
@@ -72,6 +148,221 @@ class TestBankAccount:
         assert account1.account_number != account2.account_number
 
 
+class TestAccountNumberAllocator:
+    """Test block-based account number allocation"""
+    
+    def test_fixed_width_and_check_digit(self):
+        """Test numbers are fixed width and validate"""
+        number = AccountNumberAllocator.format(421)
+        assert len(number) == AccountNumberAllocator.WIDTH
+        assert AccountNumberAllocator.is_valid(number)
+        typo = number[:-2] + str((int(number[-2]) + 1) % 10) + number[-1]
+        assert not AccountNumberAllocator.is_valid(typo)
+        assert not AccountNumberAllocator.is_valid("ACC0001")
+    
+    def test_threads_get_separate_blocks(self):
+        """Test threads draw unique ids from their own blocks"""
+        allocator = AccountNumberAllocator(block_size=10)
+        created = []
+        
+        def create():
+            created.extend(allocator.next_id() for _ in range(25))
+        
+        threads = [threading.Thread(target=create) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(set(created)) == 100
+    
+    def test_shared_file_across_allocators(self, tmp_path):
+        """Test allocators sharing a file (like processes) never overlap"""
+        path = str(tmp_path / "ids")
+        first = AccountNumberAllocator(path, block_size=5)
+        second = AccountNumberAllocator(path, block_size=5)
+        ids = [first.next_id() for _ in range(7)] + [second.next_id() for _ in range(7)]
+        assert len(set(ids)) == 14
+    
+    def test_high_water_survives_restart(self, tmp_path):
+        """Test a restarted allocator continues past issued ids"""
+        path = str(tmp_path / "ids")
+        before = AccountNumberAllocator(path, block_size=5)
+        issued = [before.next_id() for _ in range(3)]
+        after = AccountNumberAllocator(path, block_size=5)
+        assert after.next_id() > max(issued)
+    
+    def test_reserve_skips_recovered_ids(self):
+        """Test reserved ids are not handed out again"""
+        allocator = AccountNumberAllocator(block_size=10)
+        allocator.next_id()
+        allocator.reserve(50)
+        assert allocator.next_id() == 51
+
+
+class TestEventSink:
+    """Test account messages going through the event sink"""
+    
+    def test_default_prints(self, capsys):
+        """Test the default sink keeps the familiar text output"""
+        account = BankAccount("John Doe", 100)
+        account.deposit(50)
+        assert "Deposited $50.00. New balance: $150.00" in capsys.readouterr().out
+    
+    def test_null_sink_is_silent(self, capsys):
+        """Test nothing is printed with a no-op sink"""
+        account = BankAccount("John Doe", 100)
+        with using_sink(NullSink()):
+            account.deposit(50)
+            account.withdraw(500)
+        assert capsys.readouterr().out == ""
+        assert account.get_balance() == 150
+    
+    def test_ring_buffer_keeps_structured_events(self, capsys):
+        """Test events carry their fields and render on demand"""
+        account = BankAccount("John Doe", 100)
+        sink = RingBufferSink(capacity=2)
+        with using_sink(sink):
+            account.deposit(10)
+            account.withdraw(5)
+            account.withdraw(500)
+        assert capsys.readouterr().out == ""
+        assert [event.name for event in sink.events] == ["withdraw", "withdraw_refused"]
+        assert sink.events[0].fields["amount"] == 5
+        assert sink.lines()[1] == "Insufficient funds. Balance: $105.00"
+    
+    def test_queue_sink_writes_in_batches(self):
+        """Test the background writer delivers every line in order"""
+        account = BankAccount("John Doe", 0)
+        out = io.StringIO()
+        with QueueSink(out) as sink, using_sink(sink):
+            for _ in range(100):
+                account.deposit(1)
+            sink.flush()
+        lines = out.getvalue().splitlines()
+        assert len(lines) == 100
+        assert lines[-1] == "Deposited $1.00. New balance: $100.00"
+    
+    def test_queue_sink_survives_errors(self, capsys):
+        """Test a bad template or a failing stream is reported and flush() still returns"""
+        out = io.StringIO()
+        with QueueSink(out) as sink:
+            sink.emit(Event("bad", "Missing {field}", {}))
+            sink.emit(Event("good", "Still written", {}))
+            assert sink.flush(timeout=5)
+            assert out.getvalue() == "Still written\n"
+            out.close()  # Writing to a closed StringIO raises ValueError
+            sink.emit(Event("good", "Lost", {}))
+            assert sink.flush(timeout=5)
+        assert sink.errors == 2
+        assert "could not format event 'bad'" in capsys.readouterr().err
+
+
+class TestTransactionLedger:
+    """Test the columnar transaction ledger"""
+    
+    def test_entries_stored_in_cents(self):
+        """Test amounts and running balances are kept as integer cents"""
+        account = BankAccount("John Doe", 100)
+        account.deposit(50.25)
+        account.withdraw(30)
+        ledger = account.transaction_history
+        assert list(ledger.amounts) == [10000, 5025, -3000]
+        assert list(ledger.balances) == [10000, 15025, 12025]
+        assert list(ledger.kinds) == [
+            TransactionLedger.INITIAL, TransactionLedger.DEPOSIT, TransactionLedger.WITHDRAWAL
+        ]
+    
+    def test_total_matches_balance(self):
+        """Test the sum of all entries equals the balance"""
+        account = BankAccount("John Doe", 100)
+        account.deposit(40)
+        account.withdraw(15)
+        assert account.transaction_history.total() == 12500
+        assert account.transaction_history.total(TransactionLedger.WITHDRAWAL) == -1500
+    
+    def test_rendered_entries(self):
+        """Test entries are formatted only when read"""
+        account = BankAccount("John Doe", 100)
+        account.deposit(50)
+        account.withdraw(30)
+        assert list(account.transaction_history) == [
+            "Initial deposit: $100.00",
+            "Deposit: +$50.00",
+            "Withdrawal: -$30.00",
+        ]
+        assert account.transaction_history[-1] == "Withdrawal: -$30.00"
+    
+    def test_slicing(self):
+        """Test slices return lists of formatted entries like the old string list"""
+        account = BankAccount("John Doe", 100)
+        for amount in (10, 20, 30):
+            account.deposit(amount)
+        history = account.transaction_history
+        assert history[-2:] == ["Deposit: +$20.00", "Deposit: +$30.00"]
+        assert history[::3] == ["Initial deposit: $100.00", "Deposit: +$30.00"]
+        assert history[5:] == []
+    
+    def test_show_history(self, capsys):
+        """Test show_transaction_history renders the ledger"""
+        account = BankAccount("John Doe", 100)
+        account.deposit(25)
+        account.show_transaction_history()
+        captured = capsys.readouterr()
+        assert "Deposit: +$25.00" in captured.out
+
+
+class TestRunningTotals:
+    """Test incrementally maintained account aggregates"""
+    
+    def test_account_totals(self):
+        """Test deposits, withdrawals and count update with each transaction"""
+        account = BankAccount("John Doe", 100)
+        account.deposit(50)
+        account.withdraw(30)
+        account.withdraw(500)  # Refused, not counted
+        assert account.total_deposits == 150
+        assert account.total_withdrawals == 30
+        assert account.transaction_count == 3
+        assert account.interest_earned == 0
+    
+    def test_interest_and_overdraft_peak(self):
+        """Test interest earned and the deepest overdraft are tracked"""
+        savings = SavingsAccount("Saver", 1000, 0.10)
+        savings.add_interest()
+        assert savings.interest_earned == 100
+        
+        checking = CheckingAccount("Checker", 100, 200)
+        checking.withdraw(250)
+        checking.deposit(100)
+        checking.withdraw(20)
+        assert checking.overdraft_peak == 150
+    
+    def test_totals_include_batch_postings(self):
+        """Test postings made through a batch update the totals too"""
+        bank = Bank("Totals Bank")
+        account = BankAccount("John Doe", 100)
+        bank.add_account(account)
+        bank.apply_batch([account.account_number] * 2, [40, -25])
+        assert account.total_deposits == 140
+        assert account.total_withdrawals == 25
+    
+    def test_bank_rollup(self):
+        """Test the bank-wide roll-up sums every account's totals"""
+        bank = Bank("Totals Bank")
+        savings = SavingsAccount("Saver", 1000, 0.10)
+        checking = CheckingAccount("Checker", 100, 200)
+        bank.add_account(savings)
+        bank.add_account(checking)
+        savings.add_interest()
+        checking.withdraw(150)
+        totals = bank.activity_totals()
+        assert totals["deposits"] == 1100
+        assert totals["withdrawals"] == 150
+        assert totals["interest"] == 100
+        assert totals["overdraft_peak"] == 50
+        assert totals["transactions"] == 4
+
+
 class TestSavingsAccount:
     """Test SavingsAccount functionality"""
     
@@ -124,6 +415,1130 @@ class TestCheckingAccount:
         assert "overdraft" in captured.out.lower()
 
 
+class TestHistoryQueries:
+    """Test time-indexed ledger queries"""
+    
+    @pytest.fixture
+    def ledger(self):
+        ledger = TransactionLedger()
+        balance = 0
+        for day in range(10):
+            balance += 100
+            ledger.record(TransactionLedger.DEPOSIT, 10000, balance * 100, timestamp=day * 86400.0)
+        return ledger
+    
+    def test_balance_at(self, ledger):
+        """Test point-in-time balances"""
+        assert ledger.balance_at(-1) == 0
+        assert ledger.balance_at(0) == 10000
+        assert ledger.balance_at(3.5 * 86400) == 40000
+        assert ledger.balance_at(1e12) == 100000
+    
+    def test_iter_range(self, ledger):
+        """Test a time range returns only the entries inside it"""
+        entries = list(ledger.iter_range(2 * 86400, 4 * 86400))
+        assert [e.index for e in entries] == [2, 3, 4]
+        assert entries[0].balance == 300
+        assert entries[0].amount == 100
+    
+    def test_pages_with_cursor(self, ledger):
+        """Test paging through a range with cursors"""
+        rows, cursor = ledger.page(start=86400, limit=4)
+        assert [r.index for r in rows] == [1, 2, 3, 4]
+        rows, cursor = ledger.page(start=86400, cursor=cursor, limit=4)
+        assert [r.index for r in rows] == [5, 6, 7, 8]
+        rows, cursor = ledger.page(start=86400, cursor=cursor, limit=4)
+        assert [r.index for r in rows] == [9]
+        assert cursor is None
+    
+    def test_timestamps_stay_sorted(self):
+        """Test a backwards clock step does not break the time index"""
+        ledger = TransactionLedger()
+        ledger.record(TransactionLedger.DEPOSIT, 100, 100, timestamp=50.0)
+        ledger.record(TransactionLedger.DEPOSIT, 100, 200, timestamp=40.0)
+        assert list(ledger.timestamps) == [50.0, 50.0]
+    
+    def test_account_balance_at(self):
+        """Test the account-level point-in-time balance"""
+        account = BankAccount("John Doe", 100)
+        account.deposit(50)
+        assert account.balance_at(time.time()) == 150
+        assert account.balance_at(0) == 0
+
+
+class TestCreditCard:
+    """Test credit card accounts and billing cycles"""
+    
+    DAY = 24 * 60 * 60
+    
+    def test_charges_within_limit(self):
+        """Test charges draw down to the credit limit and payments restore it"""
+        card = CreditCard("John Doe", credit_limit=500)
+        assert card.charge(300)
+        assert not card.charge(300)
+        assert card.owed == 300
+        card.pay(100)
+        assert card.owed == 200
+        assert card.get_balance() == -200
+    
+    def test_average_balance_integral(self):
+        """Test the time-weighted average balance from the ledger"""
+        ledger = TransactionLedger(track_average=True)
+        ledger.record(TransactionLedger.DEPOSIT, 1000, 1000, timestamp=0.0)
+        ledger.record(TransactionLedger.DEPOSIT, 1000, 2000, timestamp=10.0)
+        assert ledger.average_balance(0, 20) == pytest.approx(1500)
+        assert ledger.average_balance(5, 10) == pytest.approx(1000)
+        assert ledger.average_balance(-10, 0) == 0
+    
+    def test_close_billing_cycle(self):
+        """Test interest, minimum payment and due date at cycle close"""
+        bank = Bank("Card Bank")
+        card = CreditCard("John Doe", credit_limit=5000, apr=0.2)
+        bank.add_account(card)
+        card.charge(1000)
+        close_at = card.cycle_start + 30 * self.DAY
+        card.billing_day = datetime.fromtimestamp(close_at).day
+        
+        interest = bank.close_billing_cycles(now=close_at)
+        assert interest == pytest.approx(100000 * 0.2 * 30 / 365, abs=1)
+        assert card.owed == Money(100000 + interest)
+        assert card.statement_balance == card.owed
+        assert card.minimum_payment == card.owed * 0.01 + Money(interest)
+        assert card.payment_due == close_at + CreditCard.GRACE_DAYS * self.DAY
+        assert card.transaction_history.total(TransactionLedger.FINANCE_CHARGE) == -interest
+        # Already closed for today
+        assert bank.close_billing_cycles(now=close_at) == 0
+    
+    def test_cards_not_due_are_skipped(self):
+        """Test only cards whose billing day is today are closed"""
+        bank = Bank("Card Bank")
+        card = CreditCard("John Doe")
+        bank.add_account(card)
+        card.charge(100)
+        close_at = card.cycle_start + 30 * self.DAY
+        card.billing_day = datetime.fromtimestamp(close_at).day % 28 + 1
+        assert bank.close_billing_cycles(now=close_at) == 0
+        assert card.payment_due is None
+    
+    def test_snapshot_round_trip_type(self, tmp_path):
+        """Test a card survives a checkpoint as a card"""
+        bank = Bank("Card Bank")
+        card = CreditCard("John Doe", credit_limit=750)
+        bank.add_account(card)
+        card.charge(80)
+        path = str(tmp_path / "cards.snap")
+        bank.checkpoint(path)
+        snapshot = AccountSnapshot(path)
+        restored = Bank._account_from_row(snapshot.row(0))
+        snapshot.close()
+        assert isinstance(restored, CreditCard)
+        assert restored.credit_limit == 750
+        assert restored.owed == 80
+    
+    def closed_card_bank(self, wal_path):
+        """A logged bank with one card that has closed a statement"""
+        bank = Bank("Card Bank", wal=WriteAheadLog(wal_path, group_latency=None))
+        card = CreditCard("John Doe", credit_limit=5000, apr=0.25)
+        bank.add_account(card)
+        card.charge(1000)
+        close_at = card.cycle_start + 30 * self.DAY
+        card.billing_day = datetime.fromtimestamp(close_at).day
+        bank.close_billing_cycles(now=close_at)
+        return bank, card
+    
+    def assert_same_card(self, restored, card):
+        assert isinstance(restored, CreditCard)
+        assert restored.apr == 0.25
+        assert restored.billing_day == card.billing_day
+        assert restored.cycle_start == card.cycle_start
+        assert restored.statement_balance == card.statement_balance > 0
+        assert restored.minimum_payment == card.minimum_payment
+        assert restored.payment_due == card.payment_due
+        assert restored.owed == card.owed
+    
+    def test_snapshot_keeps_card_state(self, tmp_path):
+        """Test APR and statement figures survive a checkpoint and restore"""
+        wal_path, snap_path = str(tmp_path / "cards.wal"), str(tmp_path / "cards.snap")
+        bank, card = self.closed_card_bank(wal_path)
+        bank.checkpoint(snap_path)
+        bank.wal.close()
+        restored = Bank.restore("Restored", snap_path, wal_path, group_latency=None)
+        try:
+            self.assert_same_card(restored.get_account(card.account_number), card)
+        finally:
+            restored.wal.close()
+    
+    def test_log_keeps_card_state(self, tmp_path):
+        """Test a card opened after its statement closed replays with its state"""
+        wal_path = str(tmp_path / "cards.wal")
+        bank, card = self.closed_card_bank(wal_path)
+        bank.close_account(card.account_number)
+        other = Bank("Other", wal=bank.wal)
+        other.add_account(card)
+        bank.wal.close()
+        recovered = Bank.recover("Recovered", wal_path, group_latency=None)
+        try:
+            self.assert_same_card(recovered.get_account(card.account_number), card)
+        finally:
+            recovered.wal.close()
+    
+    def test_restored_cycle_builds_only_due_cards(self, tmp_path):
+        """Test a billing run on a restored bank builds just the cards due"""
+        wal_path, snap_path = str(tmp_path / "cards.wal"), str(tmp_path / "cards.snap")
+        bank = Bank("Card Bank", wal=WriteAheadLog(wal_path, group_latency=None))
+        cards = [CreditCard(f"Holder {i}") for i in range(60)]
+        for card in cards:
+            bank.add_account(card)
+            card.charge(100)
+        bank.add_account(BankAccount("Jane Doe", 10))
+        # One card moved off its default day before the checkpoint
+        cards[0].billing_day = cards[1].billing_day
+        bank.checkpoint(snap_path)
+        bank.wal.close()
+        
+        card = cards[1]
+        due = sorted(c.account_number for c in cards if c.billing_day == card.billing_day)
+        assert 1 < len(due) < len(cards)
+        restored = Bank.restore("Restored", snap_path, wal_path, group_latency=None)
+        try:
+            close_at = next(card.cycle_start + days * self.DAY for days in range(1, 60)
+                            if datetime.fromtimestamp(card.cycle_start + days * self.DAY).day
+                            == card.billing_day)
+            assert restored.close_billing_cycles(now=close_at) > 0
+            assert sorted(restored._accounts) == due
+            assert all(restored.get_account(number).payment_due is not None for number in due)
+        finally:
+            restored.wal.close()
+    
+    def test_recovered_cycle_is_not_charged_twice(self, tmp_path):
+        """Test a closed statement replays, so a second run that day charges nothing"""
+        wal_path = str(tmp_path / "cards.wal")
+        bank, card = self.closed_card_bank(wal_path)
+        bank.wal.close()
+        recovered = Bank.recover("Recovered", wal_path, group_latency=None)
+        try:
+            self.assert_same_card(recovered.get_account(card.account_number), card)
+            assert recovered.close_billing_cycles(now=card.cycle_start) == 0
+            assert recovered.get_account(card.account_number).owed == card.owed
+        finally:
+            recovered.wal.close()
+    
+    def test_moved_billing_day_is_logged(self, tmp_path):
+        """Test a card moved to another billing day stays there after recovery"""
+        wal_path = str(tmp_path / "cards.wal")
+        bank = Bank("Card Bank", wal=WriteAheadLog(wal_path, group_latency=None))
+        card = CreditCard("John Doe")
+        bank.add_account(card)
+        card.billing_day = card.billing_day % 28 + 1
+        bank.wal.close()
+        recovered = Bank.recover("Recovered", wal_path, group_latency=None)
+        try:
+            assert recovered.get_account(card.account_number).billing_day == card.billing_day
+            assert recovered._cards_billed_on(card.billing_day)[0].account_number == card.account_number
+        finally:
+            recovered.wal.close()
+        with pytest.raises(ValueError):
+            card.billing_day = 29
+    
+    def test_only_card_ledgers_track_averages(self):
+        """Test the balance integral column is kept for cards only"""
+        assert CreditCard("John Doe").transaction_history.balance_seconds is not None
+        assert BankAccount("John Doe").transaction_history.balance_seconds is None
+    
+    def test_billing_index_follows_cards(self):
+        """Test cards are found by billing day without scanning other accounts"""
+        bank = Bank("Card Bank")
+        card = CreditCard("John Doe")
+        bank.add_account(card)
+        bank.add_account(BankAccount("Jane Doe", 10))
+        assert bank._cards_billed_on(card.billing_day) == [card]
+        card.billing_day = card.billing_day % 28 + 1
+        assert bank._cards_billed_on(card.billing_day) == [card]
+        bank.close_account(card.account_number)
+        assert bank._cards_billed_on(card.billing_day) == []
+
+
+class TestBank:
+    """Test the Bank registry and its indexes"""
+    
+    def test_lookup_by_number(self):
+        """Test finding an account by account number"""
+        bank = Bank("Test Bank")
+        account = BankAccount("John Doe", 100)
+        bank.add_account(account)
+        assert bank.get_account(account.account_number) is account
+        assert account.account_number in bank
+        assert bank.get_account("missing") is None
+    
+    def test_duplicate_account_rejected(self):
+        """Test the same account cannot be added twice"""
+        bank = Bank("Test Bank")
+        account = BankAccount("John Doe", 100)
+        bank.add_account(account)
+        with pytest.raises(ValueError):
+            bank.add_account(account)
+    
+    def test_lookup_by_holder(self):
+        """Test the secondary index by account holder"""
+        bank = Bank("Test Bank")
+        first = BankAccount("John Doe", 100)
+        second = SavingsAccount("John Doe", 200)
+        other = BankAccount("Jane Doe", 300)
+        for account in (first, second, other):
+            bank.add_account(account)
+        assert bank.accounts_for("John Doe") == [first, second]
+        assert bank.accounts_for("Nobody") == []
+    
+    def test_balance_index_follows_changes(self):
+        """Test the sorted balance index stays correct after transactions"""
+        bank = Bank("Test Bank")
+        low = BankAccount("Low", 10)
+        mid = BankAccount("Mid", 50)
+        high = BankAccount("High", 100)
+        for account in (low, mid, high):
+            bank.add_account(account)
+        
+        low.deposit(500)
+        high.withdraw(95)
+        assert bank.top_balances(1) == [low]
+        assert bank.accounts_by_balance() == [high, mid, low]
+        assert bank.accounts_by_balance(min_balance=5, max_balance=50) == [high, mid]
+        assert bank.total_balance() == 565
+    
+    def test_balance_index_resorts_after_query(self):
+        """Test changes made after a query show up in the next one"""
+        bank = Bank("Test Bank")
+        first = BankAccount("First", 10)
+        second = BankAccount("Second", 20)
+        bank.add_account(first)
+        bank.add_account(second)
+        assert bank.top_balances(1) == [second]
+        
+        first.deposit(100)
+        third = BankAccount("Third", 50)
+        bank.add_account(third)
+        assert bank.accounts_by_balance() == [second, third, first]
+        assert bank.total_balance() == 180
+    
+    def test_close_account(self):
+        """Test closing removes the account from every index"""
+        bank = Bank("Test Bank")
+        account = BankAccount("John Doe", 100)
+        bank.add_account(account)
+        bank.close_account(account.account_number)
+        assert len(bank) == 0
+        assert bank.accounts_for("John Doe") == []
+        assert bank.accounts_by_balance() == []
+        account.deposit(10)  # No longer tracked by the bank
+
+
+class TestAccrueInterest:
+    """Test bulk interest accrual over a bank's savings accounts"""
+    
+    def test_single_period_matches_add_interest(self):
+        """Test one yearly period equals calling add_interest once"""
+        bank = Bank("Interest Bank")
+        bulk = SavingsAccount("Bulk", 1000, 0.10)
+        bank.add_account(bulk)
+        single = SavingsAccount("Single", 1000, 0.10)
+        single.add_interest()
+        assert bank.accrue_interest(periods_per_year=1) == 10000
+        assert bulk.get_balance() == single.get_balance()
+        assert bulk.transaction_history[-1] == "Interest: +$100.00"
+    
+    def test_monthly_compounding(self):
+        """Test twelve monthly periods compound the rate"""
+        bank = Bank("Interest Bank")
+        account = SavingsAccount("Saver", 1000, 0.12)
+        bank.add_account(account)
+        bank.accrue_interest(periods_per_year=12, periods=12)
+        assert float(account.get_balance()) == pytest.approx(1000 * 1.01 ** 12, abs=0.01)
+        assert len(account.transaction_history) == 2
+    
+    def test_only_savings_accounts_earn(self):
+        """Test other account types are left alone"""
+        bank = Bank("Interest Bank")
+        saver = SavingsAccount("Saver", 100, 0.10)
+        basic = BankAccount("Basic", 100)
+        bank.add_account(saver)
+        bank.add_account(basic)
+        bank.accrue_interest(periods_per_year=1)
+        assert basic.get_balance() == 100
+        assert bank.top_balances(1) == [saver]
+    
+    def test_half_even_rounding(self):
+        """Test half-cent interest rounds to the even cent"""
+        bank = Bank("Interest Bank")
+        down = SavingsAccount("Down", 0.25, 0.10)   # 2.5 cents -> 2
+        up = SavingsAccount("Up", 0.35, 0.10)       # 3.5 cents -> 4
+        bank.add_account(down)
+        bank.add_account(up)
+        assert bank.accrue_interest(periods_per_year=1) == 6
+        assert down.get_balance() == 0.27
+        assert up.get_balance() == 0.39
+
+
+class FakeClock:
+    """Manually advanced clock for time-window tests"""
+    
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+    
+    def __call__(self) -> float:
+        return self.now
+
+
+class TestSavingsProjection:
+    """Test vectorised savings projections"""
+    
+    @pytest.fixture
+    def bank(self):
+        bank = Bank("Projection Bank")
+        for balance, rate in [(1000, 0.02), (2500, 0.02), (400, 0.05)]:
+            bank.add_account(SavingsAccount("Saver", balance, rate))
+        bank.add_account(BankAccount("Spender", 999))
+        return bank
+    
+    @staticmethod
+    def simulate(opening, rate, shifts, deposits, periods_per_year):
+        balance = opening
+        for shift, deposit in zip(shifts, deposits):
+            balance = balance * (1 + (rate + shift) / periods_per_year) + deposit
+        return balance
+    
+    def test_matches_period_by_period(self, bank):
+        """Test closed-form and varying rows match a direct simulation"""
+        shifts = [[0.01] * 12, [0.0, 0.01, -0.01, 0.02] * 3]
+        deposits = [[50.0] * 12, [0.0, 25.0, 100.0, 10.0] * 3]
+        projection = bank.project_savings(shifts, deposits)
+        savers = [a for a in bank if isinstance(a, SavingsAccount)]
+        assert projection.account_numbers == [a.account_number for a in savers]
+        for scenario in range(2):
+            expected = [self.simulate(float(a.balance), a.interest_rate,
+                                      shifts[scenario], deposits[scenario], 12) for a in savers]
+            assert list(projection.balances(scenario)) == pytest.approx(expected)
+            assert projection.final_totals()[scenario] == pytest.approx(sum(expected))
+            assert projection.path(scenario)[-1] == pytest.approx(sum(expected))
+    
+    def test_rate_groups_shared(self, bank):
+        """Test accounts with the same rate share one growth factor"""
+        projection = bank.project_savings([[0.0] * 3])
+        assert projection.rates == [0.02, 0.05]
+        assert len(projection.growth[0]) == 2
+    
+    def test_zero_rate_annuity(self):
+        """Test the constant-row formula when there is no growth"""
+        projection = SavingsProjection([SavingsAccount("Saver", 100, 0.0)], [[0.0] * 6], [[10.0] * 6])
+        assert projection.balances(0)[0] == pytest.approx(160)
+    
+    def test_shape_mismatch(self, bank):
+        """Test contributions must match the rate matrix"""
+        with pytest.raises(ValueError):
+            bank.project_savings([[0.0] * 3], [[1.0] * 2])
+
+
+class TestTransactionLimit:
+    """Test rolling 24-hour transaction limits"""
+    
+    def test_count_limit(self):
+        """Test the count limit refuses transactions until the window rolls"""
+        clock = FakeClock()
+        account = BankAccount("John Doe", 100)
+        account.transaction_limit = TransactionLimit(max_count=2, clock=clock)
+        account.deposit(10)
+        assert account.withdraw(5) is True
+        assert account.withdraw(5) is False
+        account.deposit(10)
+        assert account.get_balance() == 105
+        
+        clock.now += TransactionLimit.WINDOW
+        assert account.withdraw(5) is True
+    
+    def test_amount_limit_counts_debits_only(self):
+        """Test the amount limit applies to withdrawals, not deposits"""
+        clock = FakeClock()
+        account = CheckingAccount("John Doe", 1000, 100)
+        account.transaction_limit = TransactionLimit(max_amount=300, clock=clock)
+        account.deposit(500)
+        assert account.withdraw(200) is True
+        assert account.withdraw(150) is False
+        assert account.withdraw(100) is True
+        assert account.transaction_limit.debited_in_window() == 300
+        
+        clock.now += TransactionLimit.WINDOW
+        assert account.transaction_limit.debited_in_window() == 0
+        assert account.withdraw(300) is True
+    
+    def test_limit_applies_to_transfers(self, capsys):
+        """Test outgoing transfers count toward the amount limit"""
+        source = BankAccount("Source", 1000)
+        target = BankAccount("Target")
+        source.transaction_limit = TransactionLimit(max_amount=100, clock=FakeClock())
+        assert source.transfer(target, 80) is True
+        assert source.transfer(target, 30) is False
+        assert "limit" in capsys.readouterr().out.lower()
+        assert target.get_balance() == 80
+    
+    def test_limit_applies_to_batches(self):
+        """Test batch postings are checked against the limit"""
+        bank = Bank("Limit Bank")
+        account = BankAccount("John Doe", 1000)
+        account.transaction_limit = TransactionLimit(max_count=2, clock=FakeClock())
+        bank.add_account(account)
+        number = account.account_number
+        results = bank.apply_batch([number] * 3, [-10, 20, -30])
+        assert list(results) == [Bank.POSTED, Bank.POSTED, Bank.LIMIT_EXCEEDED]
+        assert account.get_balance() == 1010
+    
+    def test_constant_size_state(self):
+        """Test limit state does not grow with the number of transactions"""
+        clock = FakeClock()
+        limit = TransactionLimit(max_count=3, max_amount=10 ** 9, clock=clock)
+        for _ in range(1000):
+            clock.now += 9 * 3600
+            assert limit.try_use(100, debit=True)
+        assert len(limit._times) == 3
+        assert len(limit._bucket_cents) == TransactionLimit.BUCKETS
+
+
+class TestFraudDetector:
+    """Test streaming anomaly scoring of debits"""
+    
+    def test_online_statistics(self):
+        """Test Welford mean and deviation match a direct calculation"""
+        detector = FraudDetector()
+        amounts = [1000, 2000, 1500, 3000, 2500]
+        for i, cents in enumerate(amounts):
+            detector.observe("ACC1", cents, 100000, timestamp=i * 3600.0)
+        stats = detector.stats("ACC1")
+        assert stats["count"] == 5
+        assert stats["mean"] == pytest.approx(20.0)
+        assert stats["std"] == pytest.approx(statistics.stdev(amounts) / 100)
+    
+    def test_unusual_amount(self):
+        """Test a large outlier is flagged after enough samples"""
+        detector = FraudDetector(min_samples=5)
+        for i in range(10):
+            detector.observe("ACC1", 1000 + i, 100000, timestamp=i * 3600.0)
+        assert not detector.alerts
+        detector.observe("ACC1", 90000, 10000, timestamp=11 * 3600.0)
+        assert [alert.reason for alert in detector.alerts] == ["unusual amount"]
+        assert detector.alerts[0].amount == 900
+    
+    def test_constant_amounts_allow_small_changes(self):
+        """Test zero variance does not flag a debit a cent above the usual"""
+        detector = FraudDetector(velocity_count=0)
+        for i in range(10):
+            detector.observe("ACC1", 5000, 100000, timestamp=i * 3600.0)
+        assert detector.observe("ACC1", 5001, 100000, timestamp=10 * 3600.0) < 1
+        assert not detector.alerts
+        detector.observe("ACC1", 100000, 100000, timestamp=11 * 3600.0)
+        assert [alert.reason for alert in detector.alerts] == ["unusual amount"]
+    
+    def test_velocity(self):
+        """Test a burst of debits inside the window is flagged"""
+        detector = FraudDetector(velocity_count=3, velocity_window=60)
+        for second in (0, 10, 20):
+            detector.observe("ACC1", 500, 100000, timestamp=second)
+        assert not detector.alerts
+        detector.observe("ACC1", 500, 100000, timestamp=30)
+        assert detector.alerts[-1].reason == "velocity"
+        detector.observe("ACC1", 500, 100000, timestamp=500)
+        assert len(detector.alerts) == 1
+    
+    def test_overdraft_from_withdraw(self):
+        """Test account withdrawals feed the bank's detector"""
+        alerts = []
+        bank = Bank("Watched", detector=FraudDetector(on_alert=alerts.append))
+        account = CheckingAccount("John Doe", 100, 500)
+        bank.add_account(account)
+        account.withdraw(50)
+        assert not alerts
+        account.withdraw(200)
+        assert [alert.reason for alert in alerts] == ["overdraft"]
+        assert alerts[0].account_number == account.account_number
+    
+    def test_card_charges_are_not_overdrafts(self):
+        """Test a purchase on a paid-off card is not flagged as an overdraft"""
+        alerts = []
+        bank = Bank("Watched", detector=FraudDetector(on_alert=alerts.append))
+        card = CreditCard("John Doe")
+        bank.add_account(card)
+        assert card.charge(40)
+        bank.apply_batch([card.account_number], [-10])
+        assert not alerts
+    
+    def test_apply_batch_is_scored(self):
+        """Test batch postings are scored without rescanning history"""
+        detector = FraudDetector()
+        bank = Bank("Watched", detector=detector)
+        account = BankAccount("John Doe", 1000)
+        bank.add_account(account)
+        bank.apply_batch([account.account_number] * 3, [-10, 20, -30])
+        assert detector.stats(account.account_number)["count"] == 2
+
+
+class TestApplyBatch:
+    """Test bulk posting through Bank.apply_batch"""
+    
+    @pytest.fixture
+    def bank(self):
+        bank = Bank("Batch Bank")
+        bank.add_account(BankAccount("Basic", 100))
+        bank.add_account(CheckingAccount("Checker", 50, 100))
+        return bank
+    
+    def test_applies_rows_in_order(self, bank):
+        """Test deposits and withdrawals are applied with running balances"""
+        basic, checking = list(bank)
+        results = bank.apply_batch(
+            [basic.account_number, basic.account_number, checking.account_number],
+            [-80, 30, -120],
+        )
+        assert list(results) == [Bank.POSTED] * 3
+        assert basic.get_balance() == 50
+        assert checking.get_balance() == -70
+        assert len(basic.transaction_history) == 3
+        assert list(basic.transaction_history.balances) == [10000, 2000, 5000]
+    
+    def test_rejections(self, bank):
+        """Test each rejection reason gets its own result code"""
+        basic, checking = list(bank)
+        results = bank.apply_batch(
+            [basic.account_number, basic.account_number, "missing", checking.account_number],
+            [-150, 0, 10, -151],
+        )
+        assert list(results) == [
+            Bank.INSUFFICIENT_FUNDS, Bank.INVALID_AMOUNT,
+            Bank.UNKNOWN_ACCOUNT, Bank.OVERDRAFT_EXCEEDED,
+        ]
+        assert basic.get_balance() == 100
+        assert checking.get_balance() == 50
+    
+    def test_batch_is_silent(self, bank, capsys):
+        """Test batch posting does not print per row"""
+        basic, _ = list(bank)
+        bank.apply_batch([basic.account_number] * 10, [1] * 10)
+        assert capsys.readouterr().out == ""
+        assert bank.top_balances(1) == [basic]
+    
+    def test_length_mismatch(self, bank):
+        """Test mismatched columns are rejected"""
+        with pytest.raises(ValueError):
+            bank.apply_batch(["a", "b"], [1])
+    
+    def test_bad_amount_posts_nothing(self, bank):
+        """Test an amount that is not a number fails before any row is posted"""
+        basic, _ = list(bank)
+        with pytest.raises(ValueError):
+            bank.apply_batch([basic.account_number] * 2, [10, float("nan")])
+        assert basic.get_balance() == 100
+        assert len(basic.transaction_history) == 1
+    
+    def test_failure_mid_batch_keeps_balances_in_step(self, bank):
+        """Test rows already in the ledger also reach the balance if a row fails"""
+        basic, _ = list(bank)
+        
+        class FailingDetector:
+            def observe(self, *args):
+                raise RuntimeError("detector down")
+        
+        bank.detector = FailingDetector()
+        with pytest.raises(RuntimeError):
+            bank.apply_batch([basic.account_number] * 2, [10, -5])
+        assert basic.get_balance() == 105
+        assert bank.reconcile(LedgerReconciler(workers=1)).mismatches == []
+
+
+class TestTransfer:
+    """Test transfers and thread safety"""
+    
+    def test_transfer(self):
+        """Test money moves between accounts and both ledgers record it"""
+        source = BankAccount("Source", 100)
+        target = BankAccount("Target", 10)
+        assert source.transfer(target, 40) is True
+        assert source.get_balance() == 60
+        assert target.get_balance() == 50
+        assert source.transaction_history[-1] == "Transfer out: -$40.00"
+        assert target.transaction_history[-1] == "Transfer in: +$40.00"
+    
+    def test_transfer_insufficient_funds(self):
+        """Test a transfer that would overdraw is refused"""
+        source = BankAccount("Source", 100)
+        target = BankAccount("Target")
+        assert source.transfer(target, 150) is False
+        assert source.get_balance() == 100
+        assert target.get_balance() == 0
+    
+    def test_transfer_uses_overdraft(self):
+        """Test checking accounts may transfer into their overdraft"""
+        source = CheckingAccount("Source", 100, 50)
+        target = BankAccount("Target")
+        assert source.transfer(target, 150) is True
+        assert source.get_balance() == -50
+    
+    def test_bank_transfer_by_number(self):
+        """Test Bank.transfer looks up accounts and keeps the index in sync"""
+        bank = Bank("Test Bank")
+        source = BankAccount("Source", 100)
+        target = BankAccount("Target", 10)
+        bank.add_account(source)
+        bank.add_account(target)
+        assert bank.transfer(source.account_number, target.account_number, 95)
+        assert bank.top_balances(1) == [target]
+        with pytest.raises(KeyError):
+            bank.transfer(source.account_number, "missing", 1)
+    
+    def test_concurrent_opposite_transfers(self, capsys):
+        """Test opposite-direction transfers neither deadlock nor lose money"""
+        first = BankAccount("First", 1000)
+        second = BankAccount("Second", 1000)
+        
+        def move(source, target):
+            for _ in range(500):
+                source.transfer(target, 1)
+        
+        threads = [
+            threading.Thread(target=move, args=(first, second)),
+            threading.Thread(target=move, args=(second, first)),
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        assert not any(thread.is_alive() for thread in threads)
+        assert first.get_balance() + second.get_balance() == 2000
+    
+    def test_transfers_do_not_take_the_bank_lock(self):
+        """Test transfers between bank accounts finish while the index lock is held"""
+        bank = Bank("Lock Bank")
+        source = BankAccount("Source", 100)
+        target = BankAccount("Target", 0)
+        bank.add_account(source)
+        bank.add_account(target)
+        
+        with using_sink(NullSink()), bank._index_lock:
+            mover = threading.Thread(target=bank.transfer,
+                                     args=(source.account_number, target.account_number, 25))
+            mover.start()
+            mover.join(timeout=5)
+            assert not mover.is_alive()
+        assert bank.top_balances(1) == [source]
+        assert target.get_balance() == 25
+    
+    def test_account_numbers_unique_across_threads(self):
+        """Test the account id allocator is atomic"""
+        created = []
+        
+        def create():
+            for _ in range(200):
+                created.append(BankAccount("Threaded").account_number)
+        
+        threads = [threading.Thread(target=create) for _ in range(4)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        assert len(set(created)) == 800
+
+
+class TestShardedBank:
+    """Test the multi-process sharded bank"""
+    
+    @pytest.fixture
+    def sharded(self):
+        accounts = [BankAccount(f"Holder {i}", 100) for i in range(6)]
+        with ShardedBank("Sharded", shards=3) as bank:
+            bank.add_accounts(accounts)
+            yield bank, [account.account_number for account in accounts]
+    
+    def test_accounts_spread_over_shards(self, sharded):
+        """Test accounts are partitioned across every shard"""
+        bank, numbers = sharded
+        assert len(bank) == 6
+        assert {bank.shard_of(number) for number in numbers} == {0, 1, 2}
+    
+    def test_apply_batch_keeps_row_order(self, sharded):
+        """Test results come back in the caller's row order"""
+        bank, numbers = sharded
+        results = bank.apply_batch([numbers[0], numbers[1], "missing", numbers[0]],
+                                   [50, -500, 1, -150])
+        assert list(results) == [Bank.POSTED, Bank.INSUFFICIENT_FUNDS,
+                                 Bank.UNKNOWN_ACCOUNT, Bank.POSTED]
+        assert bank.get_balance(numbers[0]) == 0
+    
+    def test_cross_shard_transfer(self, sharded):
+        """Test two-phase transfers between shards"""
+        bank, numbers = sharded
+        source, target = numbers[0], next(
+            n for n in numbers if bank.shard_of(n) != bank.shard_of(numbers[0]))
+        assert bank.transfer(source, target, 60)
+        assert bank.get_balance(source) == 40
+        assert bank.get_balance(target) == 160
+        assert not bank.transfer(source, target, 60)
+        assert bank.get_balance(source) == 40
+    
+    def test_failed_credit_releases_hold(self, sharded):
+        """Test an aborted transfer gives the held money back"""
+        bank, numbers = sharded
+        missing = next(BankAccount.id_allocator.format(i) for i in range(10 ** 6, 10 ** 7)
+                       if i % 3 != bank.shard_of(numbers[0]))
+        results = bank.transfer_batch([numbers[0]], [missing], [30])
+        assert list(results) == [Bank.UNKNOWN_ACCOUNT]
+        assert bank.get_balance(numbers[0]) == 100
+    
+    def test_transfer_batch_conserves_money(self, sharded):
+        """Test a mixed batch of local and cross-shard transfers"""
+        bank, numbers = sharded
+        sources = [numbers[i % 6] for i in range(30)]
+        targets = [numbers[(i * 5 + 1) % 6] for i in range(30)]
+        bank.transfer_batch(sources, targets, [7] * 30)
+        assert bank.total_balance() == 600
+
+
+class TestStatements:
+    """Test end-of-day statement generation"""
+    
+    @pytest.fixture
+    def bank(self):
+        bank = Bank("Statement Bank")
+        for i in range(5):
+            account = BankAccount(f"Holder {i}", 100)
+            bank.add_account(account)
+            account.deposit(10 * (i + 1))
+        return bank
+    
+    def test_one_file_per_account(self, bank, tmp_path, capsys):
+        """Test per-account gzip files with every ledger row"""
+        summary = generate_statements(bank, str(tmp_path), accounts_per_file=1, workers=1)
+        assert capsys.readouterr().out == ""
+        assert summary["files"] == summary["accounts"] == 5
+        assert summary["rows"] == 10
+        account = next(iter(bank))
+        with gzip.open(tmp_path / f"{account.account_number}.txt.gz", "rt") as f:
+            text = f.read()
+        assert f"Account Number: {account.account_number}" in text
+        assert f"Closing Balance: {account.balance}" in text
+        assert f"{TransactionLedger.format_entry(TransactionLedger.DEPOSIT, 1000)}  Balance:" in text
+    
+    def test_bucketed_lzma(self, bank, tmp_path):
+        """Test grouping several accounts into each lzma file"""
+        summary = generate_statements(bank, str(tmp_path), accounts_per_file=2,
+                                      compression="lzma", workers=2)
+        assert summary["files"] == 3
+        text = "".join(lzma.open(path, "rt").read() for path in sorted(tmp_path.iterdir()))
+        assert text.count("--- Statement for") == 5
+    
+    def test_period_opening_balance(self, bank, tmp_path):
+        """Test a period after all activity shows only the carried balance"""
+        later = time.time() + 3600
+        summary = generate_statements(bank, str(tmp_path), start=later,
+                                      accounts_per_file=5, compression="text", workers=1)
+        assert summary["rows"] == 0
+        text = (tmp_path / "statements-000000.txt").read_text()
+        assert "Opening Balance: $110.00" in text
+    
+    def test_unknown_compression(self, bank, tmp_path):
+        """Test an unsupported format is rejected"""
+        with pytest.raises(ValueError):
+            generate_statements(bank, str(tmp_path), compression="zip")
+
+
+class TestReconciliation:
+    """Test balance-versus-ledger reconciliation"""
+    
+    @pytest.fixture
+    def bank(self):
+        bank = Bank("Audit Bank")
+        for i in range(4):
+            account = CheckingAccount(f"Holder {i}", 100, 500)
+            bank.add_account(account)
+            bank.apply_batch([account.account_number] * 9, [5, -20, 3, -1, 7, -200, 2, 2, 2])
+        return bank
+    
+    def test_clean_book(self, bank):
+        """Test a consistent book has no mismatches"""
+        report = bank.reconcile(LedgerReconciler(segment_rows=4, workers=1))
+        assert report.accounts == 4
+        assert report.mismatches == []
+        assert report.segments_checked == 12
+    
+    def test_stored_balance_mismatch(self, bank):
+        """Test a balance changed without a ledger entry is reported"""
+        account = next(iter(bank))
+        account._balance_cents = 123
+        report = bank.reconcile(LedgerReconciler(workers=1))
+        assert len(report.mismatches) == 1
+        mismatch = report.mismatches[0]
+        assert (mismatch.account_number, mismatch.problem) == (account.account_number, "balance")
+        assert mismatch.actual == Money(123)
+        assert "1 mismatches" in str(report)
+    
+    def test_incremental_rerun(self, bank):
+        """Test unchanged segments are skipped and changed ones rechecked"""
+        reconciler = LedgerReconciler(segment_rows=4, workers=1)
+        reconciler.run(bank)
+        report = reconciler.run(bank)
+        assert report.segments_skipped == 8
+        assert report.segments_checked == 4  # Partial last segments
+        
+        account = next(iter(bank))
+        account.transaction_history.amounts[1] += 100
+        report = reconciler.run(bank)
+        assert [m.problem for m in report.mismatches] == ["ledger"]
+        assert report.mismatches[0].row == 1
+    
+    def test_state_round_trip(self, bank, tmp_path):
+        """Test saved state lets a new reconciler skip verified segments"""
+        path = str(tmp_path / "reconcile.json")
+        first = LedgerReconciler(segment_rows=4, workers=1)
+        first.run(bank)
+        first.save(path)
+        second = LedgerReconciler(segment_rows=4, workers=1)
+        second.load(path)
+        assert second.run(bank).segments_skipped == 8
+    
+    def test_restored_overdraft_balance(self):
+        """Test a restored negative balance still reconciles"""
+        bank = Bank("Restored")
+        account = Bank._account_from_row(("ACC00000000992", "Holder", 2, -5000, 100.0))
+        bank.add_account(account)
+        assert bank.reconcile(LedgerReconciler(workers=1)).mismatches == []
+
+
+class TestWriteAheadLog:
+    """Test logging account mutations and recovering from the log"""
+    
+    def test_recover_replays_all_operations(self, tmp_path):
+        """Test a recovered bank matches the original"""
+        path = str(tmp_path / "bank.wal")
+        bank = Bank("Logged Bank", wal=WriteAheadLog(path))
+        savings = SavingsAccount("Saver", 1000, 0.10)
+        checking = CheckingAccount("Checker", 100, 50)
+        basic = BankAccount("Basic", 20)
+        for account in (savings, checking, basic):
+            bank.add_account(account)
+        
+        savings.deposit(500)
+        savings.add_interest()
+        checking.withdraw(130)
+        savings.transfer(checking, 200)
+        bank.apply_batch([basic.account_number], [-5])
+        bank.close_account(basic.account_number)
+        bank.wal.close()
+        
+        recovered = Bank.recover("Recovered", path, group_latency=None)
+        try:
+            assert len(recovered) == 2
+            saver = recovered.get_account(savings.account_number)
+            checker = recovered.get_account(checking.account_number)
+            assert isinstance(saver, SavingsAccount)
+            assert isinstance(checker, CheckingAccount)
+            assert saver.interest_rate == 0.10
+            assert checker.overdraft_limit == 50
+            assert saver.get_balance() == savings.get_balance()
+            assert checker.get_balance() == checking.get_balance()
+            assert saver.transaction_history[-1] == "Transfer out: -$200.00"
+        finally:
+            recovered.wal.close()
+    
+    def test_torn_tail_is_ignored(self, tmp_path):
+        """Test a partially written last record is dropped on recovery"""
+        path = str(tmp_path / "bank.wal")
+        bank = Bank("Logged Bank", wal=WriteAheadLog(path, group_latency=None))
+        account = BankAccount("Basic", 100)
+        bank.add_account(account)
+        account.deposit(50)
+        bank.wal.close()
+        with open(path, "ab") as f:
+            f.write(b"\x20\x00\x00\x00garbage")
+        
+        recovered = Bank.recover("Recovered", path, group_latency=None)
+        recovered.get_account(account.account_number).deposit(1)
+        recovered.wal.close()
+        
+        again = Bank.recover("Again", path, group_latency=None)
+        assert again.get_account(account.account_number).get_balance() == 151
+        again.wal.close()
+    
+    def test_wait_durable(self, tmp_path):
+        """Test a caller can block until its own last record is on disk"""
+        path = str(tmp_path / "bank.wal")
+        wal = WriteAheadLog(path, group_size=1000, group_latency=None)
+        bank = Bank("Durable Bank", wal=wal)
+        account = BankAccount("Basic", 100)
+        bank.add_account(account)
+        with using_sink(NullSink()):
+            account.deposit(25)
+        assert wal.durable_sequence == 0
+        assert wal.wait_durable() is True
+        assert wal.durable_sequence == 2
+        records = [record for _, record in WriteAheadLog.read_records(path)]
+        assert records[-1][2:] == (account.account_number, 2500)
+        wal.close()
+    
+    def test_wait_durable_with_background_flusher(self, tmp_path):
+        """Test waiting on an explicit sequence number with group latency"""
+        wal = WriteAheadLog(str(tmp_path / "bank.wal"), group_size=1000, group_latency=0.01)
+        sequence = wal.log_entry(1, "ACC1", 100)
+        assert wal.wait_durable(sequence, timeout=5) is True
+        assert wal.durable_sequence >= sequence
+        wal.close()
+    
+    def test_group_commit(self, tmp_path):
+        """Test records are fsynced in groups rather than one at a time"""
+        path = str(tmp_path / "bank.wal")
+        wal = WriteAheadLog(path, group_size=10, group_latency=None)
+        bank = Bank("Logged Bank", wal=wal)
+        account = BankAccount("Basic")
+        bank.add_account(account)
+        for _ in range(24):
+            account.deposit(1)
+        assert wal.fsync_count == 2
+        wal.close()
+        assert wal.fsync_count == 3
+        assert len(list(WriteAheadLog.read_records(path))) == 25
+
+
+class TestSnapshot:
+    """Test checkpoints and lazy restarts"""
+    
+    @pytest.fixture
+    def logged_bank(self, tmp_path):
+        wal_path = str(tmp_path / "bank.wal")
+        bank = Bank("Logged Bank", wal=WriteAheadLog(wal_path, group_latency=None))
+        accounts = [
+            SavingsAccount("Saver", 1000, 0.05),
+            CheckingAccount("Checker", 100, 75),
+            BankAccount("Basic", 20),
+        ]
+        for account in accounts:
+            bank.add_account(account)
+        yield bank, accounts, wal_path, str(tmp_path / "bank.snap")
+        bank.wal.close()
+    
+    def test_snapshot_rows(self, logged_bank):
+        """Test the snapshot stores fixed-width rows found by binary search"""
+        bank, accounts, _, snap_path = logged_bank
+        assert bank.checkpoint(snap_path) == 3
+        snapshot = AccountSnapshot(snap_path)
+        try:
+            assert len(snapshot) == 3
+            slot = snapshot.find(accounts[1].account_number)
+            assert snapshot.row(slot) == AccountRow(
+                accounts[1].account_number, "Checker", 2, 10000, 75.0
+            )
+            assert snapshot.find("ACC-missing") is None
+        finally:
+            snapshot.close()
+    
+    def test_restore_replays_only_log_tail(self, logged_bank):
+        """Test restart combines the snapshot with later log records"""
+        bank, (saver, checker, basic), wal_path, snap_path = logged_bank
+        saver.deposit(100)
+        bank.checkpoint(snap_path)
+        checker.withdraw(150)
+        saver.transfer(basic, 30)
+        bank.wal.sync()
+        
+        restored = Bank.restore("Restored", snap_path, wal_path, group_latency=None)
+        try:
+            # Only accounts touched by the log tail have been built
+            assert set(restored._accounts) == {
+                saver.account_number, checker.account_number, basic.account_number
+            }
+            assert restored.get_account(saver.account_number).get_balance() == 1070
+            assert restored.get_account(checker.account_number).get_balance() == -50
+            assert restored.get_account(basic.account_number).get_balance() == 50
+            assert restored.get_account(checker.account_number).overdraft_limit == 75
+        finally:
+            restored.wal.close()
+    
+    def test_restore_is_lazy(self, logged_bank):
+        """Test accounts are built on first lookup, not at restart"""
+        bank, (saver, checker, basic), wal_path, snap_path = logged_bank
+        bank.checkpoint(snap_path)
+        
+        restored = Bank.restore("Restored", snap_path, wal_path, group_latency=None)
+        try:
+            assert restored._accounts == {}
+            assert isinstance(restored.get_account(saver.account_number), SavingsAccount)
+            assert len(restored._accounts) == 1
+            assert len(restored) == 3
+            assert restored.total_balance() == 1120
+            assert restored.top_balances(1)[0].account_number == saver.account_number
+        finally:
+            restored.wal.close()
+    
+    def test_restore_skips_the_id_allocator(self, logged_bank, monkeypatch):
+        """Test restored accounts keep their ids and are not counted again"""
+        bank, (saver, _, _), wal_path, snap_path = logged_bank
+        bank.checkpoint(snap_path)
+        
+        def no_new_ids():
+            raise AssertionError("restore allocated an account id")
+        
+        monkeypatch.setattr(BankAccount, "_next_account_id", staticmethod(no_new_ids))
+        created = BankAccount.total_accounts
+        restored = Bank.restore("Restored", snap_path, wal_path, group_latency=None)
+        try:
+            account = restored.get_account(saver.account_number)
+            assert account._lock_order == saver._lock_order
+            assert len(restored) == 3
+            assert BankAccount.total_accounts == created
+        finally:
+            restored.wal.close()
+    
+    def test_restore_refuses_a_short_log(self, logged_bank):
+        """Test a log cut below the snapshot's offset fails instead of being padded"""
+        bank, _, wal_path, snap_path = logged_bank
+        bank.checkpoint(snap_path)
+        bank.wal.close()
+        with open(wal_path, "r+b") as f:
+            f.truncate(10)
+        with pytest.raises(ValueError):
+            Bank.restore("Restored", snap_path, wal_path, group_latency=None)
+        assert os.path.getsize(wal_path) == 10
+        os.remove(wal_path)
+        with pytest.raises(ValueError):
+            Bank.restore("Restored", snap_path, wal_path, group_latency=None)
+        assert not os.path.exists(wal_path)
+    
+    def test_len_and_str_stay_lazy(self, logged_bank):
+        """Test counting and printing a restored bank builds no accounts"""
+        bank, (saver, _, _), wal_path, snap_path = logged_bank
+        bank.checkpoint(snap_path)
+        
+        restored = Bank.restore("Restored", snap_path, wal_path, group_latency=None)
+        try:
+            assert len(restored) == 3
+            assert str(restored) == "Bank Restored: 3 accounts - $1120.00"
+            assert restored._accounts == {}
+            assert restored._snapshot is not None
+            
+            restored.close_account(saver.account_number)
+            restored.add_account(BankAccount("Newcomer", 5))
+            assert len(restored) == 3
+            assert restored.total_balance() == 125
+            assert len(restored._accounts) == 1
+        finally:
+            restored.wal.close()
+    
+    def test_closed_account_stays_closed(self, logged_bank):
+        """Test closing a snapshot account survives the full load"""
+        bank, (saver, _, _), wal_path, snap_path = logged_bank
+        bank.checkpoint(snap_path)
+        
+        restored = Bank.restore("Restored", snap_path, wal_path, group_latency=None)
+        try:
+            restored.close_account(saver.account_number)
+            assert saver.account_number not in restored
+            assert len(restored) == 2
+        finally:
+            restored.wal.close()
+
+
 @pytest.fixture
 def sample_accounts():
     """Provide sample accounts for testing"""
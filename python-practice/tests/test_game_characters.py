@@ -0,0 +1,492 @@
+# Tests for Week 12 Game Character System
+# Run: pytest python-practice/tests/test_game_characters.py -v
+
+import gc
+import pytest
+import sys
+import os
+import weakref
+
+# Add parent directory to path to import the module
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), '..'))
+
+from event_sink import NullSink, using_sink
+from projects.game_characters import (
+    Battle, Character, CharacterStore, Item, Mage, Party, Rogue, StatusEffects, Warrior,
+    describe_matchup, simulate_matchup,
+)
+
+
+@pytest.fixture(autouse=True)
+def quiet():
+    """Drop the messages characters emit"""
+    with using_sink(NullSink()):
+        yield
+
+
+@pytest.fixture
+def store():
+    return CharacterStore()
+
+
+class TestCharacterStore:
+    """Test the column store behind the characters"""
+    
+    def test_add_and_add_many(self, store):
+        """Test rows are appended with every stat filled in"""
+        row = store.add(100, 20, armor=5, mana=40, crit_chance=0.25)
+        rows = store.add_many(3, health=50, attack_power=10)
+        assert row == 0
+        assert rows == range(1, 4)
+        assert len(store) == 4
+        assert (store.health[0], store.max_health[0], store.armor[0]) == (100, 100, 5)
+        assert (store.mana[0], store.max_mana[0], store.crit_chance[0]) == (40, 40, 0.25)
+        assert list(store.attack_power[1:]) == [10, 10, 10]
+        assert store.alive_count() == 4
+    
+    def test_snapshot_and_restore(self, store):
+        """Test restore() puts every stat back"""
+        rows = store.add_many(2, health=50, attack_power=10)
+        saved = store.snapshot()
+        store.take_damage_batch(rows, 60)
+        assert store.alive_count() == 0
+        store.restore(saved)
+        assert list(store.health) == [50, 50]
+        assert store.alive_count() == 2
+    
+    def test_release_reuses_rows(self, store):
+        """Test a released row is cleared and handed out by the next add()"""
+        row = store.add(100, 20, armor=5)
+        store.add(80, 30)
+        store.release(row)
+        assert store.health[row] == store.alive[row] == store.armor[row] == 0
+        assert store.alive_count() == 1
+        assert store.add(60, 15) == row
+        assert (store.health[row], store.attack_power[row], store.armor[row]) == (60, 15, 0)
+        assert len(store) == 2
+    
+    def test_store_does_not_keep_parties_alive(self, store):
+        """Test a watching party can be garbage collected"""
+        party = Party("Temporary")
+        party.add_member(Warrior("Conan", store))
+        gone = weakref.ref(party)
+        del party
+        gc.collect()
+        assert gone() is None
+        assert store.notify_defeated([0]) is None
+
+
+class TestBatches:
+    """Test take_damage_batch and heal_batch"""
+    
+    def test_damage_with_armor(self, store):
+        """Test armor reduces each hit and defeated rows stop at 0"""
+        rows = store.add_many(3, health=100, attack_power=10, armor=10)
+        defeated = store.take_damage_batch(rows, [30, 5, 200])
+        assert list(store.health) == [80, 99, 0]
+        assert defeated == [2]
+        assert list(store.alive) == [1, 1, 0]
+    
+    def test_damage_ignoring_armor(self, store):
+        """Test ignore_armor applies the full amount"""
+        rows = list(store.add_many(2, health=100, attack_power=10, armor=10))
+        store.take_damage_batch(rows, 30, ignore_armor=True)
+        assert list(store.health) == [70, 70]
+    
+    def test_already_defeated_not_reported(self, store):
+        """Test rows that were already down are not returned again"""
+        rows = store.add_many(2, health=10, attack_power=1)
+        assert store.take_damage_batch(rows, 50) == [0, 1]
+        assert store.take_damage_batch(rows, 50) == []
+    
+    def test_heal_caps_and_skips_defeated(self, store):
+        """Test healing stops at max health and leaves defeated rows alone"""
+        rows = store.add_many(3, health=100, attack_power=10)
+        store.take_damage_batch(rows, [50, 5, 100])
+        store.heal_batch(rows, 20)
+        assert list(store.health) == [70, 100, 0]
+    
+    def test_batch_matches_single_hits(self, store):
+        """Test a batch leaves the same stats as take_damage one by one"""
+        warriors = [Warrior(f"W{i}", store) for i in range(4)]
+        other = CharacterStore()
+        copies = [Warrior(f"W{i}", other) for i in range(4)]
+        hits = [5, 25, 140, 200]
+        store.take_damage_batch([w.row for w in warriors], hits)
+        for copy, hit in zip(copies, hits):
+            copy.take_damage(hit)
+        assert [w.health for w in warriors] == [c.health for c in copies]
+        assert [w.is_alive for w in warriors] == [c.is_alive for c in copies]
+
+
+class TestCharacterViews:
+    """Test characters as thin views onto a store row"""
+    
+    def test_stats_read_through(self, store):
+        """Test the class stats land in the store and read back"""
+        warrior = Warrior("Thorin", store)
+        mage = Mage("Gandalf", store)
+        rogue = Rogue("Legolas", store)
+        assert (warrior.row, mage.row, rogue.row) == (0, 1, 2)
+        assert (warrior.health, warrior.attack_power, warrior.armor) == (150, 20, 10)
+        assert (mage.mana, mage.max_mana) == (100, 100)
+        assert rogue.crit_chance == 0.3
+        store.health[warrior.row] = 42
+        assert warrior.health == 42
+        assert not hasattr(warrior, "__dict__")
+    
+    def test_take_damage_and_heal(self, store):
+        """Test single-character damage, defeat and healing"""
+        rogue = Rogue("Legolas", store)
+        rogue.take_damage(30)
+        assert rogue.health == 70
+        rogue.heal(50)
+        assert rogue.health == 100
+        rogue.take_damage(150)
+        assert not rogue.is_alive
+        rogue.heal(50)
+        assert rogue.health == 0
+    
+    def test_cast_spell(self, store):
+        """Test mana is spent and refused when short"""
+        mage = Mage("Gandalf", store)
+        assert mage.cast_spell(80)
+        assert not mage.cast_spell(80)
+        mage.restore_mana(500)
+        assert mage.mana == 100
+    
+    def test_default_store_rows_are_released(self):
+        """Test characters made without a store give their row back"""
+        default = Character.default_store
+        Warrior("Passing")
+        Mage("Through")
+        size = len(default)
+        for i in range(100):
+            Rogue(f"Extra {i}")
+        assert len(default) == size
+    
+    def test_equipment_changes_stats(self, store):
+        """Test gear is added to the effective stats"""
+        warrior = Warrior("Thorin", store)
+        assert warrior.equip(Item("Sword", "weapon", attack=5)) is None
+        assert warrior.attack_power == 25
+        with pytest.raises(ValueError):
+            warrior.equip(Item("Hat", "head"))
+
+
+
+class TestSimulateMatchup:
+    """Test seeded Monte Carlo matchups across worker processes"""
+    
+    LINEUP_A = ["Warrior", "Mage", "Rogue"]
+    LINEUP_B = ["Warrior", "Warrior", "Rogue"]
+    
+    @staticmethod
+    def totals(result):
+        return result.wins_a, result.wins_b, result.draws, result.average_ticks
+    
+    def test_same_seed_same_totals(self, capsys):
+        """Test a seed always replays the same battles, silently"""
+        first = simulate_matchup(self.LINEUP_A, self.LINEUP_B, 60, seed=7, workers=1)
+        second = simulate_matchup(self.LINEUP_A, self.LINEUP_B, 60, seed=7, workers=1)
+        assert self.totals(first) == self.totals(second)
+        assert first.wins_a + first.wins_b + first.draws == 60
+        assert capsys.readouterr().out == ""
+    
+    def test_workers_and_chunks_do_not_change_totals(self):
+        """Test the totals are the same however the battles are split"""
+        single = simulate_matchup(self.LINEUP_A, self.LINEUP_B, 60, seed=3,
+                                  workers=1, chunk_size=60)
+        split = simulate_matchup(self.LINEUP_A, self.LINEUP_B, 60, seed=3,
+                                 workers=2, chunk_size=7)
+        assert self.totals(single) == self.totals(split)
+    
+    def test_unknown_class(self):
+        """Test lineups must name known classes"""
+        with pytest.raises(ValueError):
+            simulate_matchup(["Wizard"], ["Rogue"], 10, workers=1)
+    
+    def test_describe(self):
+        """Test the summary line names both lineups"""
+        result = simulate_matchup(self.LINEUP_A, self.LINEUP_B, 10, workers=1)
+        assert describe_matchup(self.LINEUP_A, self.LINEUP_B, result).startswith(
+            "Warrior/Mage/Rogue vs Warrior/Warrior/Rogue: 10 battles")
+
+
+class TestParty:
+    """Test the party's swap-remove member and alive lists"""
+    
+    @staticmethod
+    def assert_consistent(party):
+        """Every position map entry points at the character stored there"""
+        for members, positions in ((party.members, party._member_at),
+                                   (party._alive, party._alive_at)):
+            assert len(positions) == len(members)
+            for key, position in positions.items():
+                assert (members[position].store, members[position].row) == key
+        assert all(member.is_alive for member in party._alive)
+    
+    @pytest.fixture
+    def party(self, store):
+        party = Party("Fellowship")
+        for i in range(5):
+            party.add_member(Rogue(f"Rogue {i}", store))
+        return party
+    
+    def test_remove_moves_last_member(self, party):
+        """Test removing from the middle moves the last entry into the gap"""
+        first, middle, last = party.members[0], party.members[2], party.members[4]
+        party.remove_member(middle)
+        assert party.members[2] is last
+        assert party.members[0] is first
+        assert len(party) == 4 and party.alive_count() == 4
+        self.assert_consistent(party)
+        party.remove_member(last)
+        party.remove_member(first)
+        self.assert_consistent(party)
+        assert len(party) == 2
+    
+    def test_add_twice_and_remove_missing(self, party, store):
+        """Test duplicate adds and unknown removals are ignored"""
+        party.add_member(party.members[0])
+        party.remove_member(Warrior("Stranger", store))
+        assert len(party) == 5
+        self.assert_consistent(party)
+    
+    def test_defeat_from_take_damage(self, party):
+        """Test a single hit that defeats a member updates the alive list"""
+        victim = party.members[1]
+        victim.take_damage(500)
+        assert victim not in party.alive_members()
+        assert party.alive_count() == 4
+        self.assert_consistent(party)
+        victim.take_damage(500)  # Already down: no second notification
+        assert party.alive_count() == 4
+    
+    def test_defeat_from_batch(self, party, store):
+        """Test take_damage_batch tells the party about every defeated row"""
+        rows = [member.row for member in party.members]
+        store.take_damage_batch(rows, [500, 10, 500, 10, 500])
+        assert party.alive_count() == 2
+        assert sorted(member.row for member in party.alive_members()) == [rows[1], rows[3]]
+        self.assert_consistent(party)
+    
+    def test_defeat_while_iterating(self, party):
+        """Test every member can be defeated while looping over alive_members()"""
+        for member in party.alive_members():
+            member.take_damage(1000)
+        assert party.alive_count() == 0
+        assert not any(member.is_alive for member in party.members)
+        self.assert_consistent(party)
+    
+    def test_defeated_member_can_leave(self, party):
+        """Test removing a defeated member only touches the member list"""
+        victim = party.members[0]
+        victim.take_damage(500)
+        party.remove_member(victim)
+        assert len(party) == 4 and party.alive_count() == 4
+        self.assert_consistent(party)
+    
+    def test_refresh_after_restore(self, party, store):
+        """Test restoring a snapshot brings defeated members back"""
+        saved = store.snapshot()
+        store.take_damage_batch([member.row for member in party.members], 500)
+        assert party.alive_count() == 0
+        store.restore(saved)
+        assert party.alive_count() == 5
+        self.assert_consistent(party)
+        party.members[0].take_damage(500)
+        assert party.alive_count() == 4
+
+
+
+class TestStatusEffects:
+    """Test the timer wheel of poison, stun and buff effects"""
+    
+    @pytest.fixture
+    def effects(self, store):
+        return StatusEffects(store)
+    
+    def test_poison_pulses(self, store, effects):
+        """Test poison hits on every 'every'-th tick, ignoring armor, pulses times"""
+        warrior = Warrior("Thorin", store)
+        effects.poison(warrior.row, damage=10, pulses=3, every=2)
+        health = []
+        for _ in range(8):
+            effects.advance()
+            health.append(warrior.health)
+        assert health == [150, 140, 140, 130, 130, 120, 120, 120]
+        assert effects.active == 0
+    
+    def test_poison_reports_defeats(self, store, effects):
+        """Test advance() returns rows poison defeated and stops pulsing them"""
+        rogue = Rogue("Legolas", store)
+        effects.poison(rogue.row, damage=60, pulses=5)
+        assert effects.advance() == []
+        assert effects.advance() == [rogue.row]
+        assert effects.advance() == []  # The pulse already queued finds the row down
+        assert effects.active == 0
+    
+    def test_stun_lasts_its_ticks(self, store, effects):
+        """Test a stun covers the next few ticks and a longer stun wins"""
+        row = Mage("Gandalf", store).row
+        effects.stun(row, ticks=2)
+        effects.stun(row, ticks=4)
+        stunned = []
+        for _ in range(6):
+            effects.advance()
+            stunned.append(effects.is_stunned(row))
+        assert stunned == [True, True, True, True, False, False]
+    
+    def test_buff_lasts_its_ticks(self, store, effects):
+        """Test a buff raises attack now and for the next few ticks"""
+        warrior = Warrior("Thorin", store)
+        effects.buff(warrior.row, attack=15, ticks=3)
+        attack = [warrior.attack_power]
+        for _ in range(4):
+            effects.advance()
+            attack.append(warrior.attack_power)
+        assert attack == [35, 35, 35, 35, 20]
+    
+    def test_restore_ends_buffs(self, store, effects):
+        """Test a buff pending at restore() cannot drive attack below base"""
+        warrior = Warrior("Thorin", store)
+        saved = store.snapshot()
+        effects.buff(warrior.row, attack=15, ticks=2)
+        effects.stun(warrior.row, ticks=2)
+        store.restore(saved)
+        for _ in range(4):
+            effects.advance()
+        assert store.buff_attack[warrior.row] == 0
+        assert warrior.attack_power == 20
+        assert not effects.is_stunned(warrior.row)
+        assert effects.active == 0
+    
+    def test_tick_only_touches_due_events(self, store, effects, monkeypatch):
+        """Test a tick's cost follows the events due, not the effects running"""
+        rows = store.add_many(1000, health=1000, attack_power=1)
+        for row in rows:
+            effects.stun(row, ticks=500)
+        effects.poison(rows[0], damage=1, pulses=3)
+        batches = []
+        take_damage_batch = store.take_damage_batch
+        
+        def spy(hit_rows, damage, ignore_armor=False):
+            batches.append(len(hit_rows))
+            return take_damage_batch(hit_rows, damage, ignore_armor)
+        
+        monkeypatch.setattr(store, "take_damage_batch", spy)
+        for _ in range(5):
+            effects.advance()
+        assert batches == [1, 1, 1]
+        assert len(effects._wheel) == 1  # Just the stuns wearing off
+        assert effects.active == 1000
+
+
+class TestBattle:
+    """Test seeded battles between two parties"""
+    
+    @staticmethod
+    def parties(store):
+        heroes, raiders = Party("Heroes"), Party("Raiders")
+        for name in ("Thorin", "Balin"):
+            heroes.add_member(Warrior(name, store))
+        for name in ("Grishnakh", "Ugluk"):
+            raiders.add_member(Rogue(name, store))
+        return heroes, raiders
+    
+    def test_same_seed_same_battle(self):
+        """Test a seed always plays out the same way"""
+        results = []
+        for _ in range(2):
+            store = CharacterStore()
+            results.append(Battle(*self.parties(store), seed=5).run())
+        assert results[0] == results[1]
+        assert results[0].winner is not None
+    
+    def test_effect_defeats_bystander(self, store):
+        """Test a row outside both parties defeated by an effect is skipped"""
+        heroes, raiders = self.parties(store)
+        bystander = Mage("Radagast", store)
+        effects = StatusEffects(store)
+        effects.poison(bystander.row, damage=500, pulses=1)
+        battle = Battle(heroes, raiders, seed=1, effects=effects)
+        battle.tick()
+        assert not bystander.is_alive
+        assert battle.run().ticks > 1
+    
+    def test_stunned_members_skip_attacks(self, store):
+        """Test a party that is stunned the whole time never lands a hit"""
+        heroes, raiders = self.parties(store)
+        effects = StatusEffects(store)
+        for member in raiders.members:
+            effects.stun(member.row, ticks=100)
+        Battle(heroes, raiders, seed=2, effects=effects).run()
+        assert all(member.health == member.max_health for member in heroes.members)
+
+
+
+class TestEquipment:
+    """Test gear and the cached effective stats"""
+    
+    SWORD = Item("Sword", "weapon", attack=5)
+    AXE = Item("Axe", "weapon", attack=9)
+    MAIL = Item("Mail", "armor", armor=6)
+    
+    def test_equip_and_replace(self, store):
+        """Test equipping adds stats and returns what it replaced"""
+        warrior = Warrior("Thorin", store)
+        warrior.equip(self.SWORD)
+        warrior.equip(self.MAIL)
+        assert (warrior.attack_power, warrior.armor) == (25, 16)
+        assert warrior.equip(self.AXE) == self.SWORD
+        assert warrior.attack_power == 29
+        assert warrior.equipment == {"weapon": self.AXE, "armor": self.MAIL}
+    
+    def test_unequip(self, store):
+        """Test taking gear off removes its stats"""
+        rogue = Rogue("Legolas", store)
+        rogue.equip(self.MAIL)
+        assert rogue.unequip("armor") == self.MAIL
+        assert rogue.unequip("armor") is None
+        assert rogue.armor == 0
+        assert rogue.equipment == {}
+    
+    def test_only_dirty_rows_are_recomputed(self, store):
+        """Test the cached stats are only rebuilt for rows whose gear changed"""
+        warrior, rogue = Warrior("Thorin", store), Rogue("Legolas", store)
+        warrior.equip(self.SWORD)
+        assert store.dirty == {warrior.row}
+        store.attack_power[rogue.row] = 99  # Stale on purpose: not dirty, so kept
+        assert warrior.attack_power == 25
+        assert store.dirty == set()
+        assert rogue.attack_power == 99
+    
+    def test_batch_uses_new_armor(self, store):
+        """Test take_damage_batch refreshes the cache before reading armor"""
+        rogue = Rogue("Legolas", store)
+        rogue.equip(self.MAIL)
+        store.take_damage_batch([rogue.row], 10)
+        assert rogue.health == 96
+    
+    def test_restore_puts_gear_back(self, store):
+        """Test restore() brings back the saved gear and its stats"""
+        warrior = Warrior("Thorin", store)
+        warrior.equip(self.SWORD)
+        saved = store.snapshot()
+        warrior.equip(self.AXE)
+        warrior.equip(self.MAIL)
+        assert (warrior.attack_power, warrior.armor) == (29, 16)
+        store.restore(saved)
+        assert warrior.equipment == {"weapon": self.SWORD}
+        assert (warrior.attack_power, warrior.armor) == (25, 10)
+    
+    def test_restore_takes_new_gear_off(self, store):
+        """Test gear put on after the snapshot is removed with its stats"""
+        rogue = Rogue("Legolas", store)
+        saved = store.snapshot()
+        rogue.equip(self.AXE)
+        assert rogue.attack_power == 34
+        store.restore(saved)
+        assert rogue.equipment == {}
+        assert rogue.attack_power == 25
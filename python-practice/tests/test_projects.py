@@ -0,0 +1,36 @@
+# Tests for the importable projects package
+# Run: pytest python-practice/tests/test_projects.py -v
+
+import subprocess
+import sys
+import os
+
+# Add parent directory to path to import the package
+ROOT = os.path.join(os.path.dirname(__file__), '..')
+sys.path.insert(0, ROOT)
+
+import projects
+
+
+class TestProjects:
+    """Test the lazy project package"""
+    
+    def test_dir_lists_only_projects(self):
+        """Test dir() shows the project names and no helper imports"""
+        assert dir(projects) == sorted(projects.PROJECTS)
+        assert "tested_calculator" in dir(projects)
+    
+    def test_tested_calculator_imports(self):
+        """Test the week 14 project imports without running its demo"""
+        assert projects.tested_calculator.Calculator().add(5) == 5
+    
+    def test_bank_lesson_stays_light(self):
+        """Test importing the account classes loads none of the bank machinery"""
+        code = ("import sys, projects.bank_account; "
+                "print(*sorted(m for m in sys.modules if m.startswith('projects.')))")
+        result = subprocess.run([sys.executable, "-c", code], cwd=ROOT,
+                                capture_output=True, text=True, check=True)
+        assert result.stdout.split() == [
+            "projects.bank_account", "projects.banking",
+            "projects.banking.account_numbers", "projects.banking.ledger",
+        ]
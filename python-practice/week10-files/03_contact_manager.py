@@ -100,7 +100,8 @@ def main():
         else:
             print("Invalid option. Please choose 1-5")
 
-main()
+if __name__ == "__main__":
+    main()
 
 # TODO: Add a feature to edit existing contacts
 # TODO: Add a feature to export contacts to CSV
@@ -1,56 +1,253 @@
 # Week 11: Mini Project - Bank Account System
 # Run: python3 week11-oop/03_bank_account.py
+# The ledger, logging, Bank and benchmarks behind these classes live in
+# projects/banking/ (benchmarks: python3 -m projects.banking.benchmarks)
 
-from typing import List
+import os
+import sys
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+from typing import TYPE_CHECKING, Iterator, Optional, Union
+
+# Messages go through the shared event sink in python-practice/event_sink.py,
+# amounts use the shared Money type in python-practice/money.py, and the
+# ledger and account numbers come from the projects/banking package
+try:
+    from event_sink import emit
+    from money import Money, to_cents
+    from projects.banking.account_numbers import AccountNumberAllocator, account_id
+    from projects.banking.ledger import TransactionLedger, TransactionLimit
+except ImportError:  # Run as a script: all of them live one folder up
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from event_sink import emit
+    from money import Money, to_cents
+    from projects.banking.account_numbers import AccountNumberAllocator, account_id
+    from projects.banking.ledger import TransactionLedger, TransactionLimit
+
+if TYPE_CHECKING:  # projects.banking.bank imports this file
+    from projects.banking.bank import Bank
+    from projects.banking.storage import WriteAheadLog
 
 
 class BankAccount:
     """Represents a bank account with basic operations"""
     
+    # Fixed attribute slots: no per-instance __dict__
+    __slots__ = ("account_holder", "account_number", "transaction_history",
+                 "transaction_limit", "_balance_cents", "_bank", "_lock", "_lock_order")
+    
+    LIMIT_MESSAGE = "Daily transaction limit reached"
+    TRACK_AVERAGE = False   # Whether the ledger keeps a running balance integral
+    OVERDRAFT_ALERTS = True  # Whether dropping below zero raises a fraud alert
+    
     # Class variable to track total accounts
     total_accounts = 0
+    _id_lock = threading.Lock()
+    
+    # Source of account numbers; swap in one with a path to persist it
+    id_allocator = AccountNumberAllocator()
     
-    def __init__(self, account_holder: str, initial_balance: float = 0):
+    def __init__(self, account_holder: str, initial_balance: float = 0,
+                 account_number: Optional[str] = None):
         self.account_holder = account_holder
-        self.balance = initial_balance
-        self.transaction_history: List[str] = []
+        self._bank: Optional["Bank"] = None  # Set when a Bank takes ownership
+        self._balance_cents = to_cents(initial_balance)  # Money is built only when read
+        self.transaction_history = TransactionLedger(self.TRACK_AVERAGE)
+        self.transaction_limit: Optional[TransactionLimit] = None
         
-        # Generate account number
-        BankAccount.total_accounts += 1
-        self.account_number = f"ACC{BankAccount.total_accounts:04d}"
+        # Per-account lock; reentrant so transfer() can call into helpers
+        self._lock = threading.RLock()
+        
+        # Generate account number, or keep the one a restored account had
+        if account_number is None:
+            self._lock_order = BankAccount._next_account_id()
+            self.account_number = AccountNumberAllocator.format(self._lock_order)
+        else:
+            self._lock_order = account_id(account_number)
+            self.account_number = account_number
+            BankAccount._reserve_account_id(self._lock_order)
         
         # Record initial deposit
-        if initial_balance > 0:
-            self.transaction_history.append(f"Initial deposit: ${initial_balance:.2f}")
+        if self._balance_cents > 0:
+            self._record(TransactionLedger.INITIAL, Money(self._balance_cents))
+    
+    @classmethod
+    def _next_account_id(cls) -> int:
+        """Allocate the next account id and count the account"""
+        with BankAccount._id_lock:
+            BankAccount.total_accounts += 1
+        return BankAccount.id_allocator.next_id()
+    
+    @classmethod
+    def _reserve_account_id(cls, account_id: int) -> None:
+        """Make sure new ids never reuse a recovered account id"""
+        BankAccount.id_allocator.reserve(account_id)
     
-    def deposit(self, amount: float) -> None:
+    @property
+    def balance(self) -> Money:
+        return Money(self._balance_cents)
+    
+    @balance.setter
+    def balance(self, value: "Union[Money, float]") -> None:
+        """Update the balance and keep the owning bank's index in sync"""
+        old_cents = self._balance_cents
+        self._balance_cents = to_cents(value)
+        if self._bank is not None:
+            self._bank._balance_changed(self, old_cents)
+    
+    def _min_balance(self) -> Money:
+        """Lowest balance a withdrawal may leave behind"""
+        return Money(0)
+    
+    def _use_limit(self, amount: Money, debit: bool) -> bool:
+        """Count a transaction against the daily limit, if there is one"""
+        limit = self.transaction_limit
+        return limit is None or limit.try_use(amount._cents, debit)
+    
+    def _wal(self) -> Optional["WriteAheadLog"]:
+        """The write-ahead log of the owning bank, if any"""
+        return self._bank.wal if self._bank is not None else None
+    
+    def _record(self, kind: int, amount: Money, log: bool = True) -> None:
+        """Add a ledger entry for a change of the given signed amount"""
+        ledger = self.transaction_history
+        ledger.record(kind, amount._cents, self._balance_cents)
+        wal = self._wal()
+        if log and wal is not None:
+            wal.log_entry(kind, self.account_number, amount._cents)
+        if amount._cents < 0 and self._bank is not None and self._bank.detector is not None:
+            self._bank.detector.observe(self.account_number, -amount._cents,
+                                        self._balance_cents, ledger.timestamps[-1],
+                                        self.OVERDRAFT_ALERTS)
+    
+    def deposit(self, amount: "Union[Money, float]") -> None:
         """Deposit money into the account"""
+        amount = Money.of(amount)
         if amount > 0:
-            self.balance += amount
-            self.transaction_history.append(f"Deposit: +${amount:.2f}")
-            print(f"Deposited ${amount:.2f}. New balance: ${self.balance:.2f}")
+            with self._lock:
+                allowed = self._use_limit(amount, debit=False)
+                if allowed:
+                    self.balance += amount
+                    self._record(TransactionLedger.DEPOSIT, amount)
+                    new_balance = self.balance
+            if not allowed:
+                emit("deposit_refused", self.LIMIT_MESSAGE, account=self.account_number)
+                return
+            emit("deposit", "Deposited {amount}. New balance: {balance}",
+                 account=self.account_number, amount=amount, balance=new_balance)
         else:
-            print("Deposit amount must be positive")
+            emit("deposit_refused", "Deposit amount must be positive", account=self.account_number)
     
-    def withdraw(self, amount: float) -> bool:
+    def withdraw(self, amount: "Union[Money, float]") -> bool:
         """Withdraw money from the account"""
+        amount = Money.of(amount)
         if amount <= 0:
-            print("Withdrawal amount must be positive")
+            emit("withdraw_refused", "Withdrawal amount must be positive", account=self.account_number)
+            return False
+        
+        with self._lock:
+            balance = self.balance
+            if amount > balance:
+                problem = "Insufficient funds. Balance: {balance}"
+            elif not self._use_limit(amount, debit=True):
+                problem = self.LIMIT_MESSAGE
+            else:
+                self.balance -= amount
+                self._record(TransactionLedger.WITHDRAWAL, -amount)
+                balance = self.balance
+                problem = None
+        
+        if problem:
+            emit("withdraw_refused", problem, account=self.account_number, balance=balance)
             return False
+        emit("withdraw", "Withdrew {amount}. New balance: {balance}",
+             account=self.account_number, amount=amount, balance=balance)
+        return True
+    
+    def transfer(self, target: "BankAccount", amount: "Union[Money, float]") -> bool:
+        """Atomically move money from this account to another
         
-        if amount > self.balance:
-            print(f"Insufficient funds. Balance: ${self.balance:.2f}")
+        Both account locks are taken in account-id order, so two threads
+        transferring in opposite directions can never deadlock.
+        """
+        if target is self:
+            emit("transfer_refused", "Cannot transfer to the same account", account=self.account_number)
             return False
+        amount = Money.of(amount)
+        if amount <= 0:
+            emit("transfer_refused", "Transfer amount must be positive", account=self.account_number)
+            return False
+        
+        with locked(self, target):
+            balance = self.balance
+            if balance - amount < self._min_balance():
+                problem = "Insufficient funds for transfer. Balance: {balance}"
+            elif not self._use_limit(amount, debit=True):
+                problem = self.LIMIT_MESSAGE
+            else:
+                self.balance -= amount
+                self._record(TransactionLedger.TRANSFER_OUT, -amount, log=False)
+                target.balance += amount
+                target._record(TransactionLedger.TRANSFER_IN, amount, log=False)
+                self._log_transfer(target, amount)
+                problem = None
         
-        self.balance -= amount
-        self.transaction_history.append(f"Withdrawal: -${amount:.2f}")
-        print(f"Withdrew ${amount:.2f}. New balance: ${self.balance:.2f}")
+        if problem:
+            emit("transfer_refused", problem, account=self.account_number, balance=balance)
+            return False
+        emit("transfer", "Transferred {amount} from {account} to {target}",
+             account=self.account_number, target=target.account_number, amount=amount)
         return True
     
-    def get_balance(self) -> float:
+    def _log_transfer(self, target: "BankAccount", amount: Money) -> None:
+        """Log a transfer as one record when both sides share a log"""
+        wal, target_wal = self._wal(), target._wal()
+        cents = amount._cents
+        if wal is not None and wal is target_wal:
+            wal.log_transfer(self.account_number, target.account_number, cents)
+            return
+        if wal is not None:
+            wal.log_entry(TransactionLedger.TRANSFER_OUT, self.account_number, -cents)
+        if target_wal is not None:
+            target_wal.log_entry(TransactionLedger.TRANSFER_IN, target.account_number, cents)
+    
+    def get_balance(self) -> Money:
         """Return current balance"""
         return self.balance
     
+    def balance_at(self, timestamp: float) -> Money:
+        """Balance as of a moment in time, found by binary search"""
+        return Money(self.transaction_history.balance_at(timestamp))
+    
+    # Running totals kept by the ledger, so none of these rescan history
+    
+    @property
+    def total_deposits(self) -> Money:
+        """Initial deposit plus all later deposits"""
+        ledger = self.transaction_history
+        return Money(ledger.total(TransactionLedger.INITIAL) + ledger.total(TransactionLedger.DEPOSIT))
+    
+    @property
+    def total_withdrawals(self) -> Money:
+        """All withdrawals, as a positive amount"""
+        return Money(-self.transaction_history.total(TransactionLedger.WITHDRAWAL))
+    
+    @property
+    def interest_earned(self) -> Money:
+        """All interest credited to the account"""
+        return Money(self.transaction_history.total(TransactionLedger.INTEREST))
+    
+    @property
+    def overdraft_peak(self) -> Money:
+        """Deepest the balance has ever been below zero"""
+        return Money(max(0, -self.transaction_history.lowest_balance))
+    
+    @property
+    def transaction_count(self) -> int:
+        """Number of ledger entries"""
+        return len(self.transaction_history)
+    
     def show_transaction_history(self) -> None:
         """Display all transactions"""
         print(f"\n--- Transaction History for {self.account_holder} ---")
@@ -60,60 +257,209 @@ class BankAccount:
         else:
             for transaction in self.transaction_history:
                 print(f"  {transaction}")
-        print(f"Current Balance: ${self.balance:.2f}")
+        print(f"Current Balance: {self.balance}")
         print("-" * 50)
     
     def __str__(self) -> str:
         """String representation of the account"""
-        return f"Account {self.account_number}: {self.account_holder} - ${self.balance:.2f}"
+        return f"Account {self.account_number}: {self.account_holder} - {self.balance}"
 
 
 class SavingsAccount(BankAccount):
     """Savings account with interest rate"""
     
-    def __init__(self, account_holder: str, initial_balance: float = 0, interest_rate: float = 0.02):
-        super().__init__(account_holder, initial_balance)
+    __slots__ = ("interest_rate",)
+    
+    def __init__(self, account_holder: str, initial_balance: float = 0, interest_rate: float = 0.02,
+                 account_number: Optional[str] = None):
+        super().__init__(account_holder, initial_balance, account_number)
         self.interest_rate = interest_rate
     
     def add_interest(self) -> None:
         """Add interest to the account"""
-        interest = self.balance * self.interest_rate
-        self.balance += interest
-        self.transaction_history.append(f"Interest: +${interest:.2f}")
-        print(f"Added ${interest:.2f} interest. New balance: ${self.balance:.2f}")
+        with self._lock:
+            interest = self.balance * self.interest_rate
+            self.balance += interest
+            self._record(TransactionLedger.INTEREST, interest)
+            new_balance = self.balance
+        emit("interest", "Added {amount} interest. New balance: {balance}",
+             account=self.account_number, amount=interest, balance=new_balance)
 
 
 class CheckingAccount(BankAccount):
     """Checking account with overdraft protection"""
     
-    def __init__(self, account_holder: str, initial_balance: float = 0, overdraft_limit: float = 100):
-        super().__init__(account_holder, initial_balance)
-        self.overdraft_limit = overdraft_limit
+    __slots__ = ("overdraft_limit",)
+    
+    def __init__(self, account_holder: str, initial_balance: float = 0, overdraft_limit: float = 100,
+                 account_number: Optional[str] = None):
+        super().__init__(account_holder, initial_balance, account_number)
+        self.overdraft_limit = Money.of(overdraft_limit)
     
-    def withdraw(self, amount: float) -> bool:
+    def _min_balance(self) -> Money:
+        """Checking accounts may go negative down to the overdraft limit"""
+        return -self.overdraft_limit
+    
+    def withdraw(self, amount: "Union[Money, float]") -> bool:
         """Withdraw with overdraft protection"""
+        amount = Money.of(amount)
         if amount <= 0:
-            print("Withdrawal amount must be positive")
+            emit("withdraw_refused", "Withdrawal amount must be positive", account=self.account_number)
             return False
         
-        available = self.balance + self.overdraft_limit
+        with self._lock:
+            available = self.balance + self.overdraft_limit
+            if amount > available:
+                problem = "Exceeds overdraft limit. Available: {available}"
+            elif not self._use_limit(amount, debit=True):
+                problem = self.LIMIT_MESSAGE
+            else:
+                self.balance -= amount
+                self._record(TransactionLedger.WITHDRAWAL, -amount)
+                new_balance = self.balance
+                problem = None
         
-        if amount > available:
-            print(f"Exceeds overdraft limit. Available: ${available:.2f}")
+        if problem:
+            emit("withdraw_refused", problem, account=self.account_number, available=available)
             return False
         
-        self.balance -= amount
-        self.transaction_history.append(f"Withdrawal: -${amount:.2f}")
-        print(f"Withdrew ${amount:.2f}. New balance: ${self.balance:.2f}")
+        emit("withdraw", "Withdrew {amount}. New balance: {balance}",
+             account=self.account_number, amount=amount, balance=new_balance)
         
-        if self.balance < 0:
-            print(f"⚠️  Using overdraft: ${abs(self.balance):.2f}")
+        if new_balance < 0:
+            emit("overdraft", "⚠️  Using overdraft: {amount}",
+                 account=self.account_number, amount=abs(new_balance))
         
         return True
 
 
+class CreditCard(BankAccount):
+    """Credit card: charges take the balance below zero, down to a credit limit
+    
+    Each card closes a statement cycle once a month on its billing day.
+    Interest is charged on the cycle's average daily balance owed, and
+    the statement sets a minimum payment and a due date.
+    """
+    
+    __slots__ = ("credit_limit", "apr", "_billing_day", "cycle_start",
+                 "statement_balance", "minimum_payment", "payment_due")
+    
+    TRACK_AVERAGE = True        # Interest is charged on the average balance
+    OVERDRAFT_ALERTS = False    # Card balances are normally below zero
+    APR = 0.1999                # Default annual percentage rate
+    MIN_PAYMENT = Money(2500)   # Smallest minimum payment
+    MIN_PAYMENT_RATE = 0.01     # Share of the statement balance, plus interest
+    GRACE_DAYS = 25             # Days from statement to payment due date
+    
+    def __init__(self, account_holder: str, initial_balance: float = 0,
+                 credit_limit: float = 1000, apr: float = APR,
+                 account_number: Optional[str] = None):
+        super().__init__(account_holder, initial_balance, account_number)
+        self.credit_limit = Money.of(credit_limit)
+        self.apr = apr
+        self._billing_day = self.billing_day_for(self.account_number)
+        self.cycle_start = time.time()
+        self.statement_balance = Money(0)
+        self.minimum_payment = Money(0)
+        self.payment_due: Optional[float] = None
+    
+    @staticmethod
+    def billing_day_for(account_number: str) -> int:
+        """Default billing day of a card number, spreading cards over the month"""
+        return account_id(account_number) % 28 + 1
+    
+    @property
+    def billing_day(self) -> int:
+        """Day of the month (1-28) the statement cycle closes"""
+        return self._billing_day
+    
+    @billing_day.setter
+    def billing_day(self, day: int) -> None:
+        """Move the billing day; the owning bank re-indexes and logs the move"""
+        if not 1 <= day <= 28:
+            raise ValueError("Billing day must be between 1 and 28")
+        old_day = self._billing_day
+        self._billing_day = day
+        if self._bank is not None:
+            self._bank._billing_day_changed(self, old_day)
+    
+    def _min_balance(self) -> Money:
+        return -self.credit_limit
+    
+    @property
+    def owed(self) -> Money:
+        """Amount currently owed on the card"""
+        return max(-self.balance, Money(0))
+    
+    def charge(self, amount: "Union[Money, float]") -> bool:
+        """Make a purchase on the card"""
+        amount = Money.of(amount)
+        if amount <= 0:
+            emit("charge_refused", "Charge amount must be positive", account=self.account_number)
+            return False
+        
+        with self._lock:
+            available = self.balance + self.credit_limit
+            if amount > available:
+                problem = "Exceeds credit limit. Available: {available}"
+            elif not self._use_limit(amount, debit=True):
+                problem = self.LIMIT_MESSAGE
+            else:
+                self.balance -= amount
+                self._record(TransactionLedger.WITHDRAWAL, -amount)
+                owed = self.owed
+                problem = None
+        
+        if problem:
+            emit("charge_refused", problem, account=self.account_number, available=available)
+            return False
+        emit("charge", "Charged {amount}. Balance owed: {owed}",
+             account=self.account_number, amount=amount, owed=owed)
+        return True
+    
+    def withdraw(self, amount: "Union[Money, float]") -> bool:
+        """Cash advance: drawn against the credit limit like a purchase"""
+        return self.charge(amount)
+    
+    def pay(self, amount: "Union[Money, float]") -> None:
+        """Pay towards the card balance"""
+        self.deposit(amount)
+    
+    def _cycle_interest(self, now: float) -> int:
+        """Interest in cents on the average daily balance owed this cycle"""
+        average = self.transaction_history.average_balance(self.cycle_start, now)
+        if average >= 0:
+            return 0
+        years = (now - self.cycle_start) / (365 * 24 * 60 * 60)
+        return int(round(-average * self.apr * years))
+    
+    def _close_statement(self, now: float, interest: int) -> None:
+        """Fix the statement figures once interest has been charged"""
+        statement = self.owed
+        minimum = max(self.MIN_PAYMENT, statement * self.MIN_PAYMENT_RATE + Money(interest))
+        self.statement_balance = statement
+        self.minimum_payment = min(minimum, statement)
+        self.payment_due = now + self.GRACE_DAYS * 24 * 60 * 60 if statement > 0 else None
+        self.cycle_start = now
+    
+    def __str__(self) -> str:
+        return f"Card {self.account_number}: {self.account_holder} - owes {self.owed} of {self.credit_limit}"
+
+
+@contextmanager
+def locked(*accounts: BankAccount) -> Iterator[None]:
+    """Hold the locks of several accounts, always acquired in id order"""
+    with ExitStack() as stack:
+        for account in sorted(set(accounts), key=lambda a: a._lock_order):
+            stack.enter_context(account._lock)
+        yield
+
+
+
 # Demo the bank account system
 def main():
+    from projects.banking.bank import Bank
+    
     print("=== Bank Account System ===\n")
     
     # Create accounts
@@ -138,14 +484,42 @@ def main():
     
     # Show total accounts
     print(f"\nTotal accounts created: {BankAccount.total_accounts}")
+    
+    # Manage both accounts through a bank
+    print("\n--- Bank ---")
+    bank = Bank("First Python Bank")
+    bank.add_account(savings)
+    bank.add_account(checking)
+    print(bank)
+    print(f"Lookup {savings.account_number}: {bank.get_account(savings.account_number)}")
+    print(f"Richest account: {bank.top_balances(1)[0]}")
+    
+    # Post several transactions at once without per-row output
+    results = bank.apply_batch(
+        [savings.account_number, checking.account_number, checking.account_number],
+        [250, -50, -500],
+    )
+    print(f"Batch results: {list(results)} (0 = posted)")
+    print(bank)
+    
+    # Move money between the two accounts
+    print("\n--- Transfer ---")
+    savings.transfer(checking, 300)
+    print(savings)
+    print(checking)
+    
+    # Spend on a credit card; statements close on its billing day
+    print("\n--- Credit Card ---")
+    card = CreditCard("Carol White", credit_limit=2000)
+    bank.add_account(card)
+    card.charge(450)
+    card.pay(100)
+    print(card)
+    print(f"Statement closes on day {card.billing_day} of each month")
 
 
 if __name__ == "__main__":
+    # projects.banking imports these classes as projects.bank_account; point
+    # that name at this script so the Bank and the demo share the same classes
+    sys.modules.setdefault("projects.bank_account", sys.modules[__name__])
     main()
-
-
-# TODO: Add a transfer() method to transfer money between accounts
-# TODO: Create a CreditCard class that inherits from BankAccount
-# TODO: Add a transaction limit feature (max transactions per day)
-# TODO: Add a method to calculate total deposits and withdrawals
-# TODO: Create a Bank class that manages multiple accounts
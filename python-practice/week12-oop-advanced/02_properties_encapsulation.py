@@ -78,13 +78,41 @@ except AttributeError as e:
     print(f"Error: can't set attribute")
 
 
+# Immutable value type - money stored as whole cents
+# Money lives in python-practice/money.py so the bank projects share it.
+# It uses __slots__ (no per-instance __dict__) and a read-only cents
+# property with no setter, so a Money value never changes.
+import os
+import sys
+
+try:
+    from money import Money
+except ImportError:  # Run as a script: money.py lives one folder up
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from money import Money
+
+
+print("\n--- Money Example ---")
+print(f"Floats: 0.1 + 0.2 == 0.3? {0.1 + 0.2 == 0.3}")
+print(f"Money:  0.1 + 0.2 == 0.3? {Money.of(0.1) + Money.of(0.2) == Money.of(0.3)}")
+price = Money.of(19.99)
+print(f"Price: {price} ({price.cents} cents)")
+
+try:
+    price.cents = 0  # Will raise AttributeError (read-only)
+except AttributeError:
+    print("Cannot change Money (read-only property)")
+
+
 # More complex example - BankAccount with encapsulation
 class BankAccount:
     """Bank account with protected balance"""
     
+    __slots__ = ("_account_holder", "__balance", "_transaction_count")
+    
     def __init__(self, account_holder: str, initial_balance: float = 0):
         self._account_holder = account_holder
-        self.__balance = initial_balance  # Private attribute (double underscore)
+        self.__balance = Money.of(initial_balance)  # Private attribute (double underscore)
         self._transaction_count = 0
     
     @property
@@ -92,7 +120,7 @@ class BankAccount:
         return self._account_holder
     
     @property
-    def balance(self) -> float:
+    def balance(self) -> Money:
         """Get balance (read-only from outside)"""
         return self.__balance
     
@@ -103,14 +131,16 @@ class BankAccount:
     
     def deposit(self, amount: float) -> None:
         """Deposit money"""
+        amount = Money.of(amount)
         if amount <= 0:
             raise ValueError("Deposit amount must be positive")
         self.__balance += amount
         self._transaction_count += 1
-        print(f"Deposited ${amount:.2f}. New balance: ${self.__balance:.2f}")
+        print(f"Deposited {amount}. New balance: {self.__balance}")
     
     def withdraw(self, amount: float) -> bool:
         """Withdraw money"""
+        amount = Money.of(amount)
         if amount <= 0:
             raise ValueError("Withdrawal amount must be positive")
         if amount > self.__balance:
@@ -118,11 +148,11 @@ class BankAccount:
             return False
         self.__balance -= amount
         self._transaction_count += 1
-        print(f"Withdrew ${amount:.2f}. New balance: ${self.__balance:.2f}")
+        print(f"Withdrew {amount}. New balance: {self.__balance}")
         return True
     
     def __str__(self) -> str:
-        return f"Account: {self._account_holder}, Balance: ${self.__balance:.2f}"
+        return f"Account: {self._account_holder}, Balance: {self.__balance}"
 
 
 print("\n--- Bank Account Example ---")
@@ -130,7 +160,7 @@ account = BankAccount("Bob", 1000)
 print(account)
 
 # Can read balance but not modify directly
-print(f"Balance: ${account.balance:.2f}")
+print(f"Balance: {account.balance}")
 
 # Must use methods to modify
 account.deposit(500)
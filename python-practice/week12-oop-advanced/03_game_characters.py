@@ -1,65 +1,381 @@
 # Week 12: Mini Project - Game Character System
 # Run: python3 week12-oop-advanced/03_game_characters.py
 
-from typing import List
+import os
+import random
+import sys
+import time
+import weakref
+from array import array
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from itertools import compress, repeat
+from typing import Any, Dict, Iterable, List, NamedTuple, Optional, Sequence, Tuple, Union
 from abc import ABC, abstractmethod
 
+# Messages go through the shared event sink in python-practice/event_sink.py
+try:
+    from event_sink import NullSink, emit, using_sink
+except ImportError:  # Run as a script: the sink lives one folder up
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from event_sink import NullSink, emit, using_sink
+
+FIREBALL_COST = 30      # Mana a Fireball uses
+CRIT_MULTIPLIER = 2     # A rogue's critical hit does double damage
+EQUIPMENT_SLOTS = ("weapon", "armor", "trinket")
+
+
+class Item(NamedTuple):
+    """A piece of equipment and the stats it adds"""
+    name: str
+    slot: str
+    attack: int = 0
+    armor: int = 0
+    
+    def __str__(self) -> str:
+        return self.name
+
+
+class CharacterStore:
+    """Stats for many characters, kept in one array per stat
+    
+    Row i of every array belongs to the same character. Character objects
+    are thin views onto their row; the *_batch methods update many rows in
+    one loop without creating any objects, so a simulation can hold a
+    million units in a few dozen MB. When a Character object goes away its
+    row is released and the next add() reuses it; rows from add_many()
+    stay until the store itself is dropped.
+    
+    attack_power and armor hold effective stats: base stats plus equipment
+    plus buffs. They act as a cache that is only recomputed, by
+    update_stats(), for rows marked dirty because their gear or buffs
+    changed, so combat reads them directly without summing modifiers.
+    """
+    
+    def __init__(self):
+        self.health = array("q")
+        self.max_health = array("q")
+        self.attack_power = array("q")  # Effective: base + gear + buffs
+        self.alive = array("b")         # 1 = alive, 0 = defeated
+        self.armor = array("q")         # Effective: base + gear
+        self.mana = array("q")          # Only mages have mana
+        self.max_mana = array("q")
+        self.crit_chance = array("d")   # Only rogues have a crit chance
+        self.base_attack = array("q")
+        self.base_armor = array("q")    # Only warriors have base armor
+        self.buff_attack = array("q")   # Attack added by StatusEffects buffs
+        # row -> {slot: Item}, only for characters wearing something
+        self.equipment: Dict[int, Dict[str, Item]] = {}
+        # Rows whose effective stats are out of date
+        self.dirty: set = set()
+        # row -> parties to tell when that character is defeated; weak, so
+        # the store never keeps a party alive
+        self._watchers: Dict[int, weakref.WeakSet] = {}
+        self._free: List[int] = []  # Released rows, reused by add()
+        self._effects: weakref.WeakSet = weakref.WeakSet()  # StatusEffects on this store
+    
+    # Names of the per-stat arrays
+    COLUMNS = ("health", "max_health", "attack_power", "alive", "armor", "mana",
+               "max_mana", "crit_chance", "base_attack", "base_armor", "buff_attack")
+    
+    def __len__(self) -> int:
+        return len(self.health)
+    
+    def snapshot(self) -> Dict[str, Any]:
+        """Copy every stat and what everyone wears, e.g. to replay a battle"""
+        if self.dirty:
+            self.update_stats()
+        saved: Dict[str, Any] = {column: getattr(self, column)[:] for column in self.COLUMNS}
+        saved["equipment"] = {row: dict(worn) for row, worn in self.equipment.items()}
+        return saved
+    
+    def restore(self, snapshot: Dict[str, Any]) -> None:
+        """Put back the stats and equipment saved by snapshot()
+        
+        Rows whose gear is swapped back are marked dirty. Status effects
+        still running on the store end here: their pending events are
+        dropped and buff_attack goes back to zero, so a buff cannot wear
+        off later against stats it was never added to.
+        """
+        for column in self.COLUMNS:
+            getattr(self, column)[:] = snapshot[column]
+        self.dirty.update(self.equipment)
+        self.equipment.clear()
+        self.equipment.update((row, dict(worn)) for row, worn in snapshot["equipment"].items())
+        self.dirty.update(self.equipment)
+        for effects in list(self._effects):
+            effects.reset()
+        buffed = [row for row, attack in enumerate(self.buff_attack) if attack]
+        for row in buffed:
+            self.buff_attack[row] = 0
+        self.dirty.update(buffed)
+        # Characters may have come back to life
+        parties = {id(party): party for watching in list(self._watchers.values())
+                   for party in watching}
+        for party in parties.values():
+            party.refresh()
+    
+    def watch(self, row: int, party: "Party") -> None:
+        """Tell party when the character in row is defeated"""
+        self._watchers.setdefault(row, weakref.WeakSet()).add(party)
+    
+    def unwatch(self, row: int, party: "Party") -> None:
+        watching = self._watchers.get(row)
+        if watching is not None:
+            watching.discard(party)
+            if not watching:
+                del self._watchers[row]
+    
+    def notify_defeated(self, rows: Iterable[int]) -> None:
+        """Pass newly defeated rows on to the parties watching them"""
+        watchers = self._watchers
+        if watchers:
+            for row in rows:
+                for party in list(watchers.get(row, ())):
+                    party.member_defeated(self, row)
+    
+    def add(self, health: int, attack_power: int, armor: int = 0,
+            mana: int = 0, crit_chance: float = 0.0) -> int:
+        """Add one character and return its row, reusing a released row if there is one"""
+        if not self._free:
+            return self.add_many(1, health, attack_power, armor, mana, crit_chance).start
+        row = self._free.pop()
+        self.health[row] = self.max_health[row] = health
+        self.attack_power[row] = self.base_attack[row] = attack_power
+        self.armor[row] = self.base_armor[row] = armor
+        self.mana[row] = self.max_mana[row] = mana
+        self.crit_chance[row] = crit_chance
+        self.buff_attack[row] = 0
+        self.alive[row] = 1
+        return row
+    
+    def release(self, row: int) -> None:
+        """Free a row so a later add() can reuse it
+        
+        The row is left defeated with every stat at zero, and its gear and
+        watchers are dropped.
+        """
+        for column in self.COLUMNS:
+            getattr(self, column)[row] = 0
+        self.equipment.pop(row, None)
+        self.dirty.discard(row)
+        self._watchers.pop(row, None)
+        self._free.append(row)
+    
+    def add_many(self, count: int, health: int, attack_power: int, armor: int = 0,
+                 mana: int = 0, crit_chance: float = 0.0) -> range:
+        """Add count identical characters and return their rows"""
+        start = len(self.health)
+        self.health.extend(array("q", [health]) * count)
+        self.max_health.extend(array("q", [health]) * count)
+        self.attack_power.extend(array("q", [attack_power]) * count)
+        self.alive.extend(array("b", [1]) * count)
+        self.armor.extend(array("q", [armor]) * count)
+        self.mana.extend(array("q", [mana]) * count)
+        self.max_mana.extend(array("q", [mana]) * count)
+        self.crit_chance.extend(array("d", [crit_chance]) * count)
+        self.base_attack.extend(array("q", [attack_power]) * count)
+        self.base_armor.extend(array("q", [armor]) * count)
+        self.buff_attack.extend(array("q", [0]) * count)
+        return range(start, start + count)
+    
+    def update_stats(self) -> None:
+        """Recompute effective attack and armor for the dirty rows"""
+        for row in self.dirty:
+            items = self.equipment.get(row, {}).values()
+            self.attack_power[row] = (self.base_attack[row] + self.buff_attack[row]
+                                      + sum(item.attack for item in items))
+            self.armor[row] = self.base_armor[row] + sum(item.armor for item in items)
+        self.dirty.clear()
+    
+    def gather(self, column: array, rows: Iterable[int]) -> array:
+        """Copy a stat for the given rows into a new array"""
+        if isinstance(rows, range) and rows.step == 1:
+            return column[rows.start:rows.stop]  # One C-level slice copy
+        return array(column.typecode, map(column.__getitem__, rows))
+    
+    def scatter(self, column: array, rows: Iterable[int], values: Iterable) -> None:
+        """Write values back to a stat, one per row"""
+        if isinstance(rows, range) and rows.step == 1:
+            column[rows.start:rows.stop] = array(column.typecode, values)
+            return
+        for row, value in zip(rows, values):
+            column[row] = value
+    
+    def take_damage_batch(self, rows: Iterable[int], damage: Union[int, Sequence[int]],
+                          ignore_armor: bool = False) -> List[int]:
+        """Hit many characters at once; returns the rows that were defeated
+        
+        damage is one amount for every row or one amount per row. Armor
+        reduces each hit like Warrior.take_damage (unless ignore_armor),
+        and defeated rows stay at 0. Each row should appear once; add up
+        repeated hits first. Nothing is emitted.
+        
+        Rows are gathered into arrays, updated with comprehensions and
+        written back, and a range of rows is copied with slices, so this
+        runs several times faster than calling take_damage in a loop.
+        """
+        if self.dirty:
+            self.update_stats()
+        rows = rows if isinstance(rows, range) else list(rows)
+        health = self.gather(self.health, rows)
+        armor = array("q") if ignore_armor else self.gather(self.armor, rows)
+        amounts = repeat(damage) if isinstance(damage, int) else damage
+        if armor.count(0) != len(armor):
+            amounts = [(d - a if d - a > 1 else 1) if a else d for d, a in zip(amounts, armor)]
+        
+        # Health 0 means defeated, so defeated rows never go below or above 0
+        left = [h - d if h > d else 0 for h, d in zip(health, amounts)]
+        self.scatter(self.health, rows, left)
+        self.scatter(self.alive, rows, [1 if h else 0 for h in left])
+        defeated = list(compress(rows, [h and not l for h, l in zip(health, left)]))
+        self.notify_defeated(defeated)
+        return defeated
+    
+    def heal_batch(self, rows: Iterable[int], amount: Union[int, Sequence[int]]) -> None:
+        """Heal many characters at once, up to their max health
+        
+        Defeated rows are skipped, as in Character.heal. Nothing is emitted.
+        """
+        rows = rows if isinstance(rows, range) else list(rows)
+        health = self.gather(self.health, rows)
+        max_health = self.gather(self.max_health, rows)
+        amounts = repeat(amount) if isinstance(amount, int) else amount
+        healed = [(h + a if h + a < m else m) if h else 0
+                  for h, a, m in zip(health, amounts, max_health)]
+        self.scatter(self.health, rows, healed)
+    
+    def alive_count(self) -> int:
+        return self.alive.count(1)
+
 
 class Character(ABC):
-    """Abstract base class for game characters"""
+    """Abstract base class for game characters
+    
+    The stats live in a CharacterStore row; the character only keeps its
+    name and where that row is. The row is released when the character
+    is garbage collected, so characters made with the shared
+    default_store don't pile up in it.
+    """
+    
+    # Store used when a character is created without one
+    default_store = CharacterStore()
     
-    def __init__(self, name: str, health: int, attack_power: int):
+    __slots__ = ("_name", "_store", "_row")
+    
+    def __init__(self, name: str, health: int, attack_power: int,
+                 store: Optional[CharacterStore] = None, **stats):
         self._name = name
-        self._max_health = health
-        self._health = health
-        self._attack_power = attack_power
-        self._is_alive = True
+        self._store = store if store is not None else Character.default_store
+        self._row = self._store.add(health, attack_power, **stats)
+    
+    def __del__(self):
+        # Skip characters whose __init__ failed before they got a row
+        store = getattr(self, "_store", None)
+        if store is not None and hasattr(self, "_row"):
+            store.release(self._row)
     
     @property
     def name(self) -> str:
         return self._name
     
+    @property
+    def store(self) -> CharacterStore:
+        return self._store
+    
+    @property
+    def row(self) -> int:
+        return self._row
+    
     @property
     def health(self) -> int:
-        return self._health
+        return self._store.health[self._row]
     
     @property
     def max_health(self) -> int:
-        return self._max_health
+        return self._store.max_health[self._row]
     
     @property
     def attack_power(self) -> int:
-        return self._attack_power
+        """Attack including equipment and buffs"""
+        if self._store.dirty:
+            self._store.update_stats()
+        return self._store.attack_power[self._row]
+    
+    @property
+    def armor(self) -> int:
+        """Armor including equipment"""
+        if self._store.dirty:
+            self._store.update_stats()
+        return self._store.armor[self._row]
+    
+    @property
+    def equipment(self) -> Dict[str, Item]:
+        return dict(self._store.equipment.get(self._row, {}))
+    
+    def equip(self, item: Item) -> Optional[Item]:
+        """Wear an item; returns the item it replaced, if any"""
+        if item.slot not in EQUIPMENT_SLOTS:
+            raise ValueError(f"Unknown equipment slot {item.slot!r}")
+        worn = self._store.equipment.setdefault(self._row, {})
+        replaced = worn.get(item.slot)
+        worn[item.slot] = item
+        self._store.dirty.add(self._row)
+        emit("equip", "🎒 {name} equipped {item}", name=self._name, item=item.name)
+        return replaced
+    
+    def unequip(self, slot: str) -> Optional[Item]:
+        """Take off whatever is in a slot and return it"""
+        worn = self._store.equipment.get(self._row, {})
+        item = worn.pop(slot, None)
+        if item is not None:
+            self._store.dirty.add(self._row)
+            emit("unequip", "🎒 {name} took off {item}", name=self._name, item=item.name)
+        return item
     
     @property
     def is_alive(self) -> bool:
-        return self._is_alive
+        return bool(self._store.alive[self._row])
     
     @property
     def health_percentage(self) -> float:
         """Calculate health as percentage"""
-        return (self._health / self._max_health) * 100
+        return (self.health / self.max_health) * 100
     
     def take_damage(self, damage: int) -> None:
-        """Reduce health by damage amount"""
-        self._health -= damage
-        if self._health <= 0:
-            self._health = 0
-            self._is_alive = False
-            print(f"💀 {self._name} has been defeated!")
+        """Reduce health by damage amount (less armor, if any)"""
+        armor = self.armor
+        if armor:
+            reduced_damage = max(1, damage - armor)
+            emit("armor", "🛡️  {name}'s armor reduced damage by {blocked}",
+                 name=self._name, blocked=damage - reduced_damage)
+            damage = reduced_damage
+        store, row = self._store, self._row
+        health = store.health[row] - damage
+        if health <= 0:
+            was_alive = store.alive[row]
+            store.health[row] = 0
+            store.alive[row] = 0
+            if was_alive:
+                store.notify_defeated((row,))
+            emit("defeated", "💀 {name} has been defeated!", name=self._name)
         else:
-            print(f"❤️  {self._name} took {damage} damage. Health: {self._health}/{self._max_health}")
+            store.health[row] = health
+            emit("damage", "❤️  {name} took {damage} damage. Health: {health}/{max_health}",
+                 name=self._name, damage=damage, health=health, max_health=store.max_health[row])
     
     def heal(self, amount: int) -> None:
         """Restore health"""
-        if not self._is_alive:
-            print(f"{self._name} cannot be healed (defeated)")
+        if not self.is_alive:
+            emit("heal_refused", "{name} cannot be healed (defeated)", name=self._name)
             return
         
-        old_health = self._health
-        self._health = min(self._health + amount, self._max_health)
-        actual_heal = self._health - old_health
-        print(f"💚 {self._name} healed {actual_heal} HP. Health: {self._health}/{self._max_health}")
+        store, row = self._store, self._row
+        old_health = store.health[row]
+        store.health[row] = min(old_health + amount, store.max_health[row])
+        actual_heal = store.health[row] - old_health
+        emit("heal", "💚 {name} healed {amount} HP. Health: {health}/{max_health}",
+             name=self._name, amount=actual_heal, health=store.health[row],
+             max_health=store.max_health[row])
     
     @abstractmethod
     def special_ability(self) -> str:
@@ -67,106 +383,151 @@ class Character(ABC):
         pass
     
     def __str__(self) -> str:
-        status = "Alive" if self._is_alive else "Defeated"
-        return f"{self._name} ({self.__class__.__name__}) - HP: {self._health}/{self._max_health} - {status}"
+        status = "Alive" if self.is_alive else "Defeated"
+        return f"{self._name} ({self.__class__.__name__}) - HP: {self.health}/{self.max_health} - {status}"
     
     def __repr__(self) -> str:
-        return f"{self.__class__.__name__}('{self._name}', {self._health}, {self._attack_power})"
+        return f"{self.__class__.__name__}('{self._name}', {self.health}, {self.attack_power})"
 
 
 class Warrior(Character):
-    """Warrior class with high health and defense"""
+    """Warrior class with high health and defense
     
-    def __init__(self, name: str):
-        super().__init__(name, health=150, attack_power=20)
-        self._armor = 10
+    Warriors start with 10 armor, which take_damage subtracts from every
+    hit. Other classes only get armor from equipment.
+    """
     
-    @property
-    def armor(self) -> int:
-        return self._armor
+    __slots__ = ()
     
-    def take_damage(self, damage: int) -> None:
-        """Warriors reduce damage with armor"""
-        reduced_damage = max(1, damage - self._armor)
-        print(f"🛡️  {self._name}'s armor reduced damage by {damage - reduced_damage}")
-        super().take_damage(reduced_damage)
+    def __init__(self, name: str, store: Optional[CharacterStore] = None):
+        super().__init__(name, health=150, attack_power=20, store=store, armor=10)
     
     def special_ability(self) -> str:
         """Warrior's special: Shield Bash"""
-        return f"⚔️  {self._name} uses Shield Bash! Deals {self._attack_power * 2} damage and stuns enemy!"
+        return f"⚔️  {self._name} uses Shield Bash! Deals {self.attack_power * 2} damage and stuns enemy!"
 
 
 class Mage(Character):
     """Mage class with magic and mana"""
     
-    def __init__(self, name: str):
-        super().__init__(name, health=80, attack_power=30)
-        self._mana = 100
-        self._max_mana = 100
+    __slots__ = ()
+    
+    def __init__(self, name: str, store: Optional[CharacterStore] = None):
+        super().__init__(name, health=80, attack_power=30, store=store, mana=100)
     
     @property
     def mana(self) -> int:
-        return self._mana
+        return self._store.mana[self._row]
     
     @property
     def max_mana(self) -> int:
-        return self._max_mana
+        return self._store.max_mana[self._row]
     
     def cast_spell(self, mana_cost: int) -> bool:
         """Cast spell if enough mana"""
-        if self._mana >= mana_cost:
-            self._mana -= mana_cost
-            print(f"✨ {self._name} casts spell! Mana: {self._mana}/{self._max_mana}")
+        store, row = self._store, self._row
+        if store.mana[row] >= mana_cost:
+            store.mana[row] -= mana_cost
+            emit("spell", "✨ {name} casts spell! Mana: {mana}/{max_mana}",
+                 name=self._name, mana=store.mana[row], max_mana=store.max_mana[row])
             return True
         else:
-            print(f"❌ {self._name} doesn't have enough mana!")
+            emit("spell_failed", "❌ {name} doesn't have enough mana!", name=self._name)
             return False
     
     def restore_mana(self, amount: int) -> None:
         """Restore mana"""
-        self._mana = min(self._mana + amount, self._max_mana)
-        print(f"💙 {self._name} restored {amount} mana. Mana: {self._mana}/{self._max_mana}")
+        store, row = self._store, self._row
+        store.mana[row] = min(store.mana[row] + amount, store.max_mana[row])
+        emit("mana", "💙 {name} restored {amount} mana. Mana: {mana}/{max_mana}",
+             name=self._name, amount=amount, mana=store.mana[row], max_mana=store.max_mana[row])
     
     def special_ability(self) -> str:
         """Mage's special: Fireball"""
-        if self.cast_spell(30):
-            return f"🔥 {self._name} casts Fireball! Deals {self._attack_power * 3} damage!"
+        if self.cast_spell(FIREBALL_COST):
+            return f"🔥 {self._name} casts Fireball! Deals {self.attack_power * 3} damage!"
         return f"{self._name} failed to cast (not enough mana)"
 
 
 class Rogue(Character):
     """Rogue class with high damage and critical hits"""
     
-    def __init__(self, name: str):
-        super().__init__(name, health=100, attack_power=25)
-        self._crit_chance = 0.3  # 30% critical hit chance
+    __slots__ = ()
+    
+    def __init__(self, name: str, store: Optional[CharacterStore] = None):
+        # 30% critical hit chance
+        super().__init__(name, health=100, attack_power=25, store=store, crit_chance=0.3)
     
     @property
     def crit_chance(self) -> float:
-        return self._crit_chance
+        return self._store.crit_chance[self._row]
     
     def special_ability(self) -> str:
         """Rogue's special: Backstab"""
-        return f"🗡️  {self._name} uses Backstab! Deals {self._attack_power * 4} damage!"
+        return f"🗡️  {self._name} uses Backstab! Deals {self.attack_power * 4} damage!"
 
 
 class Party:
-    """Manages a party of characters"""
+    """Manages a party of characters
+    
+    Members and living members are kept in two lists, each with a dict of
+    where every character sits in it. Removing someone moves the last
+    entry into their place, so joining, leaving and being defeated are all
+    O(1) and the alive list never has to be rebuilt. The store tells the
+    party when a member is defeated, whether by take_damage or by a batch.
+    """
     
     def __init__(self, name: str):
         self.name = name
-        self.members: List[Character] = []
+        self.members: List[Character] = []  # Change through add/remove_member only
+        self._alive: List[Character] = []
+        # (store, row) -> index in members / in _alive
+        self._member_at: Dict[Tuple[CharacterStore, int], int] = {}
+        self._alive_at: Dict[Tuple[CharacterStore, int], int] = {}
+    
+    @staticmethod
+    def _swap_remove(items: List[Character], positions: Dict[Tuple[CharacterStore, int], int],
+                     key: Tuple[CharacterStore, int]) -> None:
+        """Remove an entry by moving the last one into its place"""
+        position = positions.pop(key)
+        last = items.pop()
+        if position < len(items):
+            items[position] = last
+            positions[(last.store, last.row)] = position
     
     def add_member(self, character: Character) -> None:
         """Add character to party"""
+        key = (character.store, character.row)
+        if key in self._member_at:
+            return
+        self._member_at[key] = len(self.members)
         self.members.append(character)
-        print(f"➕ {character.name} joined {self.name}!")
+        if character.is_alive:
+            self._alive_at[key] = len(self._alive)
+            self._alive.append(character)
+        character.store.watch(character.row, self)
+        emit("joined", "➕ {name} joined {party}!", name=character.name, party=self.name)
     
     def remove_member(self, character: Character) -> None:
         """Remove character from party"""
-        if character in self.members:
-            self.members.remove(character)
-            print(f"➖ {character.name} left {self.name}")
+        key = (character.store, character.row)
+        if key in self._member_at:
+            self._swap_remove(self.members, self._member_at, key)
+            if key in self._alive_at:
+                self._swap_remove(self._alive, self._alive_at, key)
+            character.store.unwatch(character.row, self)
+            emit("left", "➖ {name} left {party}", name=character.name, party=self.name)
+    
+    def member_defeated(self, store: CharacterStore, row: int) -> None:
+        """Called by the store when a member's health reaches zero"""
+        if (store, row) in self._alive_at:
+            self._swap_remove(self._alive, self._alive_at, (store, row))
+    
+    def refresh(self) -> None:
+        """Rebuild the alive list after stats were replaced wholesale"""
+        self._alive = [member for member in self.members if member.is_alive]
+        self._alive_at = {(member.store, member.row): position
+                          for position, member in enumerate(self._alive)}
     
     def show_status(self) -> None:
         """Display all party members"""
@@ -182,13 +543,329 @@ class Party:
         print(f"{'='*50}")
     
     def alive_members(self) -> List[Character]:
-        """Return list of alive members"""
-        return [m for m in self.members if m.is_alive]
+        """Return list of alive members
+        
+        The list is a copy, so members can be defeated while looping over it.
+        """
+        return list(self._alive)
+    
+    def alive_count(self) -> int:
+        return len(self._alive)
     
     def __len__(self) -> int:
         return len(self.members)
 
 
+class StatusEffects:
+    """Timed poison, stun and buff effects on the characters in one store
+    
+    Effects are filed in a timer wheel: a dict from tick number to the
+    events due on that tick (a poison pulse, or a stun or buff wearing
+    off). advance() moves on one tick and handles only that tick's list,
+    so its cost depends on how many effects pulse or expire right then,
+    not on how many are active. Poison damage for the tick is applied in
+    one take_damage_batch call; buffs change buff_attack and mark the row
+    dirty, so effective attack is recomputed once for all of them.
+    CharacterStore.restore() ends every effect on the store.
+    """
+    
+    # Event kinds in the wheel
+    POISON, STUN_END, BUFF_END = 0, 1, 2
+    
+    def __init__(self, store: CharacterStore):
+        self.store = store
+        self.now = 0
+        # tick -> [(kind, row, amount, pulses left, ticks between pulses)]
+        self._wheel: Dict[int, List[Tuple[int, int, int, int, int]]] = {}
+        self._stunned_until: Dict[int, int] = {}
+        self.active = 0  # Effects still running
+        store._effects.add(self)
+    
+    def reset(self) -> None:
+        """Forget every pending effect without touching the store's stats"""
+        self._wheel.clear()
+        self._stunned_until.clear()
+        self.active = 0
+    
+    def _schedule(self, tick: int, event: Tuple[int, int, int, int, int]) -> None:
+        self._wheel.setdefault(tick, []).append(event)
+    
+    def poison(self, row: int, damage: int, pulses: int, every: int = 1) -> None:
+        """Deal damage (ignoring armor) every few ticks, pulses times"""
+        if pulses < 1 or every < 1:
+            raise ValueError("pulses and every must be positive")
+        self._schedule(self.now + every, (self.POISON, row, damage, pulses, every))
+        self.active += 1
+    
+    def stun(self, row: int, ticks: int) -> None:
+        """Stop a character from attacking for the next few ticks"""
+        until = self.now + ticks + 1  # Wears off as that tick starts
+        if until > self._stunned_until.get(row, 0):
+            self._stunned_until[row] = until
+        self._schedule(until, (self.STUN_END, row, 0, 0, 0))
+        self.active += 1
+    
+    def buff(self, row: int, attack: int, ticks: int) -> None:
+        """Raise a character's attack power for the next few ticks"""
+        self.store.buff_attack[row] += attack
+        self.store.dirty.add(row)
+        self._schedule(self.now + ticks + 1, (self.BUFF_END, row, attack, 0, 0))
+        self.active += 1
+    
+    def is_stunned(self, row: int) -> bool:
+        return row in self._stunned_until
+    
+    def advance(self) -> List[int]:
+        """Move on one tick; returns the rows that poison defeated"""
+        self.now += 1
+        due = self._wheel.pop(self.now, None)
+        if not due:
+            return []
+        store = self.store
+        poison: Dict[int, int] = {}
+        attack: Dict[int, int] = {}
+        for event in due:
+            kind, row, amount, pulses, every = event
+            if kind == self.POISON:
+                poison[row] = poison.get(row, 0) + amount
+                if pulses > 1 and store.alive[row]:
+                    self._schedule(self.now + every, (kind, row, amount, pulses - 1, every))
+                    continue
+            elif kind == self.BUFF_END:
+                attack[row] = attack.get(row, 0) - amount
+            elif self._stunned_until.get(row, 0) <= self.now:
+                self._stunned_until.pop(row, None)
+            self.active -= 1
+        
+        buff_attack = store.buff_attack
+        for row, change in attack.items():
+            buff_attack[row] += change
+        store.dirty.update(attack)
+        if not poison:
+            return []
+        return store.take_damage_batch(list(poison), list(poison.values()), ignore_armor=True)
+
+
+# Character classes by name, so lineups can be plain lists of strings
+CHARACTER_CLASSES = {"Warrior": Warrior, "Mage": Mage, "Rogue": Rogue}
+
+
+class BattleResult(NamedTuple):
+    """How a battle ended"""
+    winner: Optional[str]   # Name of the winning party, None for a draw
+    ticks: int
+    survivors: int          # Members of the winning party still alive
+
+
+class Battle:
+    """Two parties fight in ticks until one side is defeated
+    
+    Every tick, each living member hits a random living enemy for its
+    attack power. Mages spend mana on Fireball (triple damage), rogues
+    may land a critical hit (double damage) and warriors' armor reduces
+    hits. Both sides choose their attacks from the state at the start of
+    the tick, then every hit lands together through one
+    CharacterStore.take_damage_batch call, so neither party strikes
+    first. All randomness comes from one seeded RNG, so the same parties
+    and seed always play out the same battle.
+    
+    With StatusEffects, each tick first advances the effects (poison
+    pulses, stuns and buffs wearing off) and stunned members skip their
+    attack. Rows outside both parties may share the store and the
+    effects; they are updated but not reported.
+    """
+    
+    def __init__(self, party_a: "Party", party_b: "Party", seed: int = 0,
+                 max_ticks: int = 1000, effects: Optional[StatusEffects] = None):
+        self.party_a = party_a
+        self.party_b = party_b
+        members = party_a.members + party_b.members
+        if not members:
+            raise ValueError("Cannot battle with empty parties")
+        self.store = members[0].store
+        if any(member.store is not self.store for member in members):
+            raise ValueError("Both parties must use the same CharacterStore")
+        self._names = {member.row: member.name for member in members}
+        if effects is not None and effects.store is not self.store:
+            raise ValueError("Status effects must use the parties' CharacterStore")
+        self.effects = effects
+        self.rng = random.Random(seed)
+        self.max_ticks = max_ticks
+        self.ticks = 0
+    
+    def _attack(self, attackers: "Party", defenders: "Party", hits: Dict[int, int]) -> None:
+        """Add each living attacker's hit to hits (target row -> damage)
+        
+        Hits are only collected here, so the parties' own alive lists are
+        read without copying them.
+        """
+        targets = defenders._alive
+        if not targets:
+            return
+        store, rng = self.store, self.rng
+        mana, attack_power, crit_chance = store.mana, store.attack_power, store.crit_chance
+        stunned = self.effects.is_stunned if self.effects else None
+        for attacker in attackers._alive:
+            row = attacker.row
+            if stunned and stunned(row):
+                continue
+            damage = attack_power[row]
+            if mana[row] >= FIREBALL_COST:
+                mana[row] -= FIREBALL_COST
+                damage *= 3
+            elif crit_chance[row] and rng.random() < crit_chance[row]:
+                damage *= CRIT_MULTIPLIER
+            target = targets[rng.randrange(len(targets))].row
+            hits[target] = hits.get(target, 0) + damage
+    
+    def is_over(self) -> bool:
+        return (self.ticks >= self.max_ticks
+                or not self.party_a.alive_count()
+                or not self.party_b.alive_count())
+    
+    def tick(self) -> bool:
+        """Play one tick; returns False once the battle is over"""
+        if self.is_over():
+            return False
+        if self.effects:
+            for row in self.effects.advance():
+                if row in self._names:
+                    emit("defeated", "💀 {name} has been defeated!", name=self._names[row])
+            if self.is_over():
+                self.ticks += 1
+                return False
+        if self.store.dirty:
+            self.store.update_stats()
+        hits: Dict[int, int] = {}
+        self._attack(self.party_a, self.party_b, hits)
+        self._attack(self.party_b, self.party_a, hits)
+        for row in self.store.take_damage_batch(list(hits), list(hits.values())):
+            emit("defeated", "💀 {name} has been defeated!", name=self._names[row])
+        self.ticks += 1
+        return not self.is_over()
+    
+    def run(self) -> BattleResult:
+        """Play ticks until the battle is over"""
+        while self.tick():
+            pass
+        alive_a = self.party_a.alive_count()
+        alive_b = self.party_b.alive_count()
+        if alive_a and not alive_b:
+            result = BattleResult(self.party_a.name, self.ticks, alive_a)
+        elif alive_b and not alive_a:
+            result = BattleResult(self.party_b.name, self.ticks, alive_b)
+        else:
+            result = BattleResult(None, self.ticks, 0)
+        if result.winner is None:
+            emit("battle_draw", "🤝 Draw after {ticks} ticks", ticks=result.ticks)
+        else:
+            emit("battle_won", "🏆 {winner} wins after {ticks} ticks!",
+                 winner=result.winner, ticks=result.ticks)
+        return result
+
+
+class MatchupResult(NamedTuple):
+    """Totals from many battles between the same two lineups"""
+    battles: int
+    wins_a: int
+    wins_b: int
+    draws: int
+    average_ticks: float
+    seconds: float
+    
+    @property
+    def win_rate_a(self) -> float:
+        return self.wins_a / self.battles if self.battles else 0.0
+    
+    @property
+    def win_rate_b(self) -> float:
+        return self.wins_b / self.battles if self.battles else 0.0
+    
+    @property
+    def battles_per_sec(self) -> float:
+        return self.battles / self.seconds if self.seconds else 0.0
+
+
+def _battle_seed(seed: int, number: int) -> int:
+    """Seed for battle number n of a matchup, whichever worker plays it"""
+    return seed * 2**32 + number
+
+
+def _simulate_chunk(lineup_a: Sequence[str], lineup_b: Sequence[str], seed: int,
+                    first: int, count: int) -> Tuple[int, int, int, int]:
+    """Play battles first .. first+count-1 in a worker process
+    
+    The parties are built once; before each battle their stats are reset
+    from a snapshot of the store. Returns (wins_a, wins_b, draws, ticks).
+    """
+    wins_a = wins_b = draws = ticks = 0
+    with using_sink(NullSink()):
+        store = CharacterStore()
+        party_a, party_b = Party("A"), Party("B")
+        for party, lineup in ((party_a, lineup_a), (party_b, lineup_b)):
+            for position, kind in enumerate(lineup, 1):
+                party.add_member(CHARACTER_CLASSES[kind](f"{kind} {position}", store))
+        start = store.snapshot()
+        for number in range(first, first + count):
+            store.restore(start)
+            result = Battle(party_a, party_b, seed=_battle_seed(seed, number)).run()
+            ticks += result.ticks
+            if result.winner == "A":
+                wins_a += 1
+            elif result.winner == "B":
+                wins_b += 1
+            else:
+                draws += 1
+    return wins_a, wins_b, draws, ticks
+
+
+def simulate_matchup(lineup_a: Sequence[str], lineup_b: Sequence[str], battles: int,
+                     seed: int = 0, workers: Optional[int] = None,
+                     chunk_size: int = 5000) -> MatchupResult:
+    """Play many seeded battles between two lineups and count the wins
+    
+    Lineups are lists of class names, e.g. ["Warrior", "Mage", "Rogue"].
+    Battles are split into chunks of chunk_size and played across a
+    process pool. Battle n always gets the same seed, so the totals are
+    the same whatever the number of workers or the chunk size. Nothing
+    is printed; see describe_matchup() for a one-line summary.
+    """
+    for kind in list(lineup_a) + list(lineup_b):
+        if kind not in CHARACTER_CLASSES:
+            raise ValueError(f"Unknown character class {kind!r}")
+    if not lineup_a or not lineup_b:
+        raise ValueError("Both lineups need at least one character")
+    workers = workers or os.cpu_count() or 1
+    wins_a = wins_b = draws = ticks = 0
+    
+    started = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as pool:
+        futures = [
+            pool.submit(_simulate_chunk, list(lineup_a), list(lineup_b), seed,
+                        first, min(chunk_size, battles - first))
+            for first in range(0, battles, chunk_size)
+        ]
+        for future in as_completed(futures):
+            chunk_a, chunk_b, chunk_draws, chunk_ticks = future.result()
+            wins_a += chunk_a
+            wins_b += chunk_b
+            draws += chunk_draws
+            ticks += chunk_ticks
+    elapsed = time.perf_counter() - started
+    
+    return MatchupResult(battles, wins_a, wins_b, draws,
+                         ticks / battles if battles else 0.0, elapsed)
+
+
+def describe_matchup(lineup_a: Sequence[str], lineup_b: Sequence[str],
+                     result: MatchupResult) -> str:
+    """One line summing up a simulate_matchup() result"""
+    return (f"{'/'.join(lineup_a)} vs {'/'.join(lineup_b)}: {result.battles:,} battles "
+            f"in {result.seconds:.2f}s ({result.battles_per_sec:,.0f}/sec) - "
+            f"A wins {result.win_rate_a:.1%}, B wins {result.win_rate_b:.1%}, "
+            f"draws {result.draws:,}")
+
+
 # Demo the game system
 def main():
     print("🎮 Welcome to the Character Battle System!\n")
@@ -233,15 +910,49 @@ def main():
     
     party.show_status()
     
-    print(f"\n✅ Alive members: {len(party.alive_members())}/{len(party)}")
+    print(f"\n✅ Alive members: {party.alive_count()}/{len(party)}")
+    
+    # Bulk simulation: stats only, no Character objects
+    print("\n⚡ Bulk simulation: 100,000 warriors vs 5 volleys")
+    store = CharacterStore()
+    army = store.add_many(100_000, health=150, attack_power=20, armor=10)
+    for volley in range(5):
+        store.take_damage_batch(army, 25 + volley * 5)
+        store.heal_batch(army, 10)
+    print(f"   Survivors: {store.alive_count():,} with {store.health[0]} HP each")
+    
+    # A seeded battle: the same seed always plays out the same way
+    print("\n⚔️  The Fellowship meets a raiding party!\n")
+    raiders = Party("Raiders")
+    raiders.add_member(Warrior("Grishnakh"))
+    raiders.add_member(Rogue("Ugluk"))
+    
+    # Gear up before the fight
+    print()
+    warrior.equip(Item("Anduril", "weapon", attack=12))
+    mage.equip(Item("Elven Cloak", "armor", armor=4))
+    print(f"⚔️  Thorin's attack: {warrior.attack_power}, 🛡️  Gandalf's armor: {mage.armor}")
+    
+    # Ugluk's blade is poisoned, Gandalf is stunned and Thorin is enraged
+    effects = StatusEffects(Character.default_store)
+    effects.poison(warrior.row, damage=8, pulses=4)
+    effects.stun(mage.row, ticks=2)
+    effects.buff(warrior.row, attack=15, ticks=3)
+    print(f"🧪 Thorin is poisoned, 💫 Gandalf is stunned, 💪 Thorin's attack is now {warrior.attack_power}")
+    result = Battle(party, raiders, seed=42, effects=effects).run()
+    party.show_status()
+    raiders.show_status()
+    print(f"\nWinner: {result.winner} with {result.survivors} standing")
 
 
 if __name__ == "__main__":
-    main()
+    if "--simulate" in sys.argv:
+        lineup_a, lineup_b = ["Warrior", "Mage", "Rogue"], ["Warrior", "Warrior", "Rogue"]
+        result = simulate_matchup(lineup_a, lineup_b, 200_000)
+        print(describe_matchup(lineup_a, lineup_b, result))
+    else:
+        main()
 
 
 # TODO: Add an Archer class with ranged attacks
-# TODO: Implement a battle system where characters fight each other
 # TODO: Add experience points and leveling system
-# TODO: Create equipment system (weapons, armor)
-# TODO: Add status effects (poison, stun, buff)
@@ -30,16 +30,28 @@ except InvalidEmailError as e:
     print(f"❌ {e}")
 
 
+# Money stored as whole cents, so balances and shortages are exact
+# (shared with the other projects in python-practice/money.py)
+import os
+import sys
+
+try:
+    from money import Money
+except ImportError:  # Run as a script: money.py lives one folder up
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from money import Money
+
+
 # Custom exception with additional data
 class InsufficientFundsError(Exception):
     """Raised when account has insufficient funds"""
     
-    def __init__(self, balance: float, amount: float):
+    def __init__(self, balance: Money, amount: Money):
         self.balance = balance
         self.amount = amount
         self.shortage = amount - balance
         super().__init__(
-            f"Insufficient funds: need ${amount:.2f}, have ${balance:.2f} (short ${self.shortage:.2f})"
+            f"Insufficient funds: need {amount}, have {balance} (short {self.shortage})"
         )
 
 
@@ -47,14 +59,15 @@ class BankAccount:
     """Bank account with custom exceptions"""
     
     def __init__(self, balance: float = 0):
-        self.balance = balance
+        self.balance = Money.of(balance)
     
     def withdraw(self, amount: float) -> None:
         """Withdraw money with error checking"""
+        amount = Money.of(amount)
         if amount > self.balance:
             raise InsufficientFundsError(self.balance, amount)
         self.balance -= amount
-        print(f"✅ Withdrew ${amount:.2f}. Balance: ${self.balance:.2f}")
+        print(f"✅ Withdrew {amount}. Balance: {self.balance}")
 
 
 print("\n=== Custom Exception with Data ===\n")
@@ -65,7 +78,7 @@ try:
     account.withdraw(80)  # Will fail
 except InsufficientFundsError as e:
     print(f"❌ {e}")
-    print(f"   You need ${e.shortage:.2f} more")
+    print(f"   You need {e.shortage} more")
 
 
 # Exception hierarchy
@@ -2,9 +2,17 @@
 # Run: python3 week13-error-handling/03_robust_file_processor.py
 
 import os
+import sys
 import json
 from typing import Optional, Dict, Any
 
+# Messages go through the shared event sink in python-practice/event_sink.py
+try:
+    from event_sink import emit
+except ImportError:  # Run as a script: the sink lives one folder up
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from event_sink import emit
+
 
 # Custom exceptions
 class FileProcessorError(Exception):
@@ -69,23 +77,24 @@ class FileProcessor:
             elif self.file_type == ".csv":
                 self.data = self._read_csv()
             
-            print(f"✅ Successfully read {self.filename}")
+            emit("read", "✅ Successfully read {filename}", filename=self.filename)
             return self.data
             
         except FileNotFoundError as e:
-            print(f"❌ File Error: {e}")
+            emit("read_failed", "❌ File Error: {error}", filename=self.filename, error=e)
             raise
         except PermissionError as e:
-            print(f"❌ Permission Error: {e}")
+            emit("read_failed", "❌ Permission Error: {error}", filename=self.filename, error=e)
             raise
         except FileEmptyError as e:
-            print(f"❌ Empty File: {e}")
+            emit("read_failed", "❌ Empty File: {error}", filename=self.filename, error=e)
             raise
         except json.JSONDecodeError as e:
-            print(f"❌ JSON Error: Invalid JSON format - {e}")
+            emit("read_failed", "❌ JSON Error: Invalid JSON format - {error}",
+                 filename=self.filename, error=e)
             raise
         except Exception as e:
-            print(f"❌ Unexpected Error: {e}")
+            emit("read_failed", "❌ Unexpected Error: {error}", filename=self.filename, error=e)
             raise
     
     def _read_text(self) -> str:
@@ -130,16 +139,17 @@ class FileProcessor:
             elif self.file_type == ".csv":
                 self._write_csv(data)
             
-            print(f"✅ Successfully wrote to {self.filename}")
+            emit("write", "✅ Successfully wrote to {filename}", filename=self.filename)
             
         except PermissionError as e:
-            print(f"❌ Permission Error: {e}")
+            emit("write_failed", "❌ Permission Error: {error}", filename=self.filename, error=e)
             raise
         except TypeError as e:
-            print(f"❌ Type Error: Invalid data type for {self.file_type} - {e}")
+            emit("write_failed", "❌ Type Error: Invalid data type for {file_type} - {error}",
+                 filename=self.filename, file_type=self.file_type, error=e)
             raise
         except Exception as e:
-            print(f"❌ Write Error: {e}")
+            emit("write_failed", "❌ Write Error: {error}", filename=self.filename, error=e)
             raise
     
     def _write_text(self, data: str) -> None:
@@ -2,10 +2,55 @@
 # Run: python3 week15-libraries/03_weather_analyzer.py
 # Install: pip install requests pandas
 
-import requests
-import pandas as pd
+from __future__ import annotations  # Type hints below never touch pandas
+
+import importlib.util
+import os
+import sys
 from datetime import datetime
-from typing import Dict, List, Optional
+from typing import Any, Dict, List, Optional
+
+
+def _lazy_import(name: str) -> Any:
+    """Import a module on first attribute access instead of right now
+    
+    Importing this file stays fast and works even when requests or pandas
+    are missing; the real import (or a helpful error) happens the first
+    time the module is used.
+    """
+    if name in sys.modules:
+        return sys.modules[name]
+    spec = importlib.util.find_spec(name)
+    if spec is None:
+        return _MissingModule(name)
+    spec.loader = importlib.util.LazyLoader(spec.loader)
+    module = importlib.util.module_from_spec(spec)
+    sys.modules[name] = module
+    spec.loader.exec_module(module)
+    return module
+
+
+class _MissingModule:
+    """Stands in for an uninstalled library until it is actually needed"""
+    
+    def __init__(self, name: str):
+        self._name = name
+    
+    def __getattr__(self, attribute: str) -> Any:
+        raise ModuleNotFoundError(
+            f"{self._name} is required for this feature. Install: pip install requests pandas"
+        )
+
+
+requests = _lazy_import("requests")
+pd = _lazy_import("pandas")
+
+# Messages go through the shared event sink in python-practice/event_sink.py
+try:
+    from event_sink import emit
+except ImportError:  # Run as a script: the sink lives one folder up
+    sys.path.append(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+    from event_sink import emit
 
 
 class WeatherAnalyzer:
@@ -22,7 +67,7 @@ class WeatherAnalyzer:
             data = response.json()
             return f'"{data["content"]}" - {data["author"]}'
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching quote: {e}")
+            emit("fetch_failed", "❌ Error fetching quote: {error}", source="quote", error=e)
             return None
     
     def fetch_github_user(self, username: str) -> Optional[Dict]:
@@ -42,12 +87,13 @@ class WeatherAnalyzer:
             }
         except requests.exceptions.HTTPError as e:
             if e.response.status_code == 404:
-                print(f"❌ User '{username}' not found")
+                emit("fetch_failed", "❌ User '{username}' not found", source="github_user",
+                     username=username, error=e)
             else:
-                print(f"❌ HTTP Error: {e}")
+                emit("fetch_failed", "❌ HTTP Error: {error}", source="github_user", error=e)
             return None
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error: {e}")
+            emit("fetch_failed", "❌ Error: {error}", source="github_user", error=e)
             return None
     
     def fetch_bitcoin_price(self) -> Optional[Dict]:
@@ -64,7 +110,7 @@ class WeatherAnalyzer:
                 "updated": data["time"]["updated"]
             }
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error fetching Bitcoin price: {e}")
+            emit("fetch_failed", "❌ Error fetching Bitcoin price: {error}", source="bitcoin", error=e)
             return None
     
     def search_github_repos(self, query: str, max_results: int = 10) -> pd.DataFrame:
@@ -95,7 +141,8 @@ class WeatherAnalyzer:
             return pd.DataFrame(repos)
         
         except requests.exceptions.RequestException as e:
-            print(f"❌ Error searching repositories: {e}")
+            emit("fetch_failed", "❌ Error searching repositories: {error}",
+                 source="github_search", error=e)
             return pd.DataFrame()
     
     def analyze_repos_dataframe(self, df: pd.DataFrame) -> None:
@@ -52,7 +52,8 @@ def calculator():
         else:
             print("Invalid choice. Please choose 1-5")
 
-calculator()
+if __name__ == "__main__":
+    calculator()
 
 # TODO: Add a power function (a ** b)
 # TODO: Add a square root function
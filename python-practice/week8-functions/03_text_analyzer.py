@@ -50,8 +50,9 @@ def analyze_text(text):
     print(f"Most common word: '{word}' (appears {count} times)")
 
 # Test the analyzer
-sample_text = input("Enter text to analyze: ")
-analyze_text(sample_text)
+if __name__ == "__main__":
+    sample_text = input("Enter text to analyze: ")
+    analyze_text(sample_text)
 
 # TODO: Add a function to find the longest word
 # TODO: Add a function to calculate average word length
@@ -81,7 +81,8 @@ def main():
         else:
             print("Invalid option. Please choose 1-5")
 
-main()
+if __name__ == "__main__":
+    main()
 
 # TODO: Add a feature to delete a specific note by number
 # TODO: Add a feature to search notes for a keyword